@@ -12,9 +12,14 @@ Input format:
     "operation": "dewatermark",
     "video_url": "https://...",
     "region": "x,y,width,height",  # OR
-    "mask_url": "https://..."      # Pre-made mask image
+    "mask_url": "https://...",     # Pre-made mask image
+    "roi": true,                   # Optional: inpaint only a crop around the mask
+    "memory_models": {...}         # Optional: calibrated memory models keyed by GPU name
 }
 
+{"operation": "calibrate"} fits a memory model for the worker's GPU and
+returns it as "memory_model".
+
 Output format:
 {
     "success": true,
@@ -26,6 +31,7 @@ Output format:
 """
 
 import os
+import re
 import shutil
 import subprocess
 import sys
@@ -60,6 +66,26 @@ MEMORY_PROFILES = {
 }
 
 
+# Calibrated memory models replace the per-frame constant used by
+# calculate_safe_resize_ratio with a fit of measured peak VRAM:
+#   peak_gb = base + megapixels * (frames * a + subvideo_length * b + neighbor_length * c)
+# Models come from the job input (saved by the client) or MEMORY_MODEL_DIR.
+MEMORY_MODEL_DIR = Path(os.environ.get("MEMORY_MODEL_DIR", "/runpod-volume/memory-models"))
+MEMORY_MODEL_HEADROOM = 1.15
+MEMORY_MODEL_TERMS = ("gb_per_frame_mpx", "gb_per_subvideo_frame_mpx", "gb_per_neighbor_frame_mpx")
+
+# Synthetic calibration clips: (width, height, frames, subvideo_length, neighbor_length)
+CALIBRATION_RUNS = [
+    (640, 360, 40, 20, 5),
+    (640, 360, 80, 20, 5),
+    (960, 540, 40, 20, 5),
+    (960, 540, 40, 40, 10),
+    (960, 540, 80, 40, 5),
+    (1280, 720, 40, 20, 5),
+    (1280, 720, 80, 40, 10),
+]
+
+
 def log(message: str) -> None:
     """Log message to stderr (visible in RunPod logs)."""
     print(message, file=sys.stderr, flush=True)
@@ -103,6 +129,85 @@ def get_gpu_vram_gb() -> int:
     return 16  # Default assumption
 
 
+def get_gpu_name() -> str:
+    """Name of the worker's GPU (used to pick its memory model)."""
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return torch.cuda.get_device_name(torch.cuda.current_device())
+    except Exception as e:
+        log(f"Warning: Could not read GPU name: {e}")
+    return "unknown"
+
+
+def _model_file(gpu_name: str, precision: str) -> Path:
+    slug = re.sub(r"[^a-z0-9]+", "-", gpu_name.lower()).strip("-")
+    return MEMORY_MODEL_DIR / f"{slug}-{precision}.json"
+
+
+def select_memory_model(job_models: Optional[dict], gpu_name: str, precision: str) -> Optional[dict]:
+    """Pick the calibrated model for this GPU and precision: from the job input, else from disk."""
+    model = (job_models or {}).get(gpu_name)
+    if not model:
+        try:
+            import json
+            model = json.loads(_model_file(gpu_name, precision).read_text())
+        except (OSError, ValueError):
+            return None
+    # An fp16 calibration underestimates fp32 runs
+    return model if model.get("precision") == precision else None
+
+
+def predict_peak_memory_gb(model: dict, width: int, height: int, frame_count: int, profile: dict) -> float:
+    """Peak VRAM predicted by a calibrated model (including headroom)."""
+    mpx = width * height / 1e6
+    per_mpx = (
+        model["gb_per_frame_mpx"] * frame_count
+        + model["gb_per_subvideo_frame_mpx"] * min(profile["subvideo_length"], frame_count)
+        + model["gb_per_neighbor_frame_mpx"] * profile["neighbor_length"]
+    )
+    return (model["base_gb"] + mpx * per_mpx) * MEMORY_MODEL_HEADROOM
+
+
+def fit_memory_model(samples: list) -> Optional[dict]:
+    """Least-squares fit of peak VRAM against the model terms (non-negative)."""
+    def features(s: dict) -> list:
+        mpx = s["width"] * s["height"] / 1e6
+        return [mpx * s["frames"], mpx * min(s["subvideo_length"], s["frames"]), mpx * s["neighbor_length"]]
+
+    active = list(range(len(MEMORY_MODEL_TERMS)))
+    while True:
+        rows = [[1.0] + [features(s)[i] for i in active] for s in samples]
+        ys = [s["peak_gb"] for s in samples]
+        n = len(rows[0])
+        if len(rows) < n:
+            return None
+
+        # Normal equations, solved by Gaussian elimination
+        a = [[sum(r[i] * r[j] for r in rows) for j in range(n)] + [sum(r[i] * y for r, y in zip(rows, ys))]
+             for i in range(n)]
+        for col in range(n):
+            pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+            if abs(a[pivot][col]) < 1e-12:
+                return None
+            a[col], a[pivot] = a[pivot], a[col]
+            for r in range(n):
+                if r != col:
+                    factor = a[r][col] / a[col][col]
+                    a[r] = [x - factor * p for x, p in zip(a[r], a[col])]
+        coef = [a[i][n] / a[i][i] for i in range(n)]
+
+        negative = [active[i - 1] for i in range(1, n) if coef[i] < 0]
+        if not negative:
+            break
+        active = [i for i in active if i not in negative]
+
+    model = {"base_gb": max(0.0, coef[0]), **{term: 0.0 for term in MEMORY_MODEL_TERMS}}
+    for i, term_index in enumerate(active):
+        model[MEMORY_MODEL_TERMS[term_index]] = coef[i + 1]
+    return model
+
+
 def get_memory_profile(vram_gb: int) -> dict:
     """Get optimal ProPainter settings based on available VRAM."""
     for threshold in sorted(MEMORY_PROFILES.keys(), reverse=True):
@@ -136,26 +241,61 @@ def download_file(url: str, output_path: str, description: str = "file") -> bool
         return False
 
 
-def upload_to_r2(file_path: str, job_id: str, r2_config: dict) -> tuple[Optional[str], Optional[str]]:
-    """Upload file to Cloudflare R2 and return (presigned_url, object_key)."""
-    try:
+# R2 clients are reused across jobs on a warm worker. Files above 16MB are
+# sent as 16MB parts, 8 at a time.
+_r2_clients = {}
+R2_MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+R2_MAX_CONCURRENCY = 8
+
+
+def get_r2_client(r2_config: dict):
+    """Return a boto3 S3 client for R2, cached per account."""
+    cache_key = (r2_config["endpoint_url"], r2_config["access_key_id"], r2_config["secret_access_key"])
+    client = _r2_clients.get(cache_key)
+    if client is None:
         import boto3
         from botocore.config import Config
-        import uuid
-
-        log(f"Uploading result to R2 ({Path(file_path).stat().st_size // (1024*1024)}MB)...")
 
         client = boto3.client(
             "s3",
             endpoint_url=r2_config["endpoint_url"],
             aws_access_key_id=r2_config["access_key_id"],
             aws_secret_access_key=r2_config["secret_access_key"],
-            config=Config(signature_version="s3v4"),
+            config=Config(
+                signature_version="s3v4",
+                max_pool_connections=R2_MAX_CONCURRENCY * 2,
+                retries={"max_attempts": 5, "mode": "adaptive"},
+            ),
         )
+        _r2_clients[cache_key] = client
+    return client
+
+
+def r2_transfer_config():
+    """Multipart settings for large R2 uploads."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=R2_MULTIPART_CHUNKSIZE,
+        multipart_chunksize=R2_MULTIPART_CHUNKSIZE,
+        max_concurrency=R2_MAX_CONCURRENCY,
+    )
+
+
+def upload_to_r2(file_path: str, job_id: str, r2_config: dict) -> tuple[Optional[str], Optional[str]]:
+    """Upload file to Cloudflare R2 and return (presigned_url, object_key)."""
+    try:
+        import uuid
+
+        log(f"Uploading result to R2 ({Path(file_path).stat().st_size // (1024*1024)}MB)...")
+
+        client = get_r2_client(r2_config)
 
         object_key = f"dewatermark/results/{job_id}_{uuid.uuid4().hex[:8]}.mp4"
 
-        client.upload_file(file_path, r2_config["bucket_name"], object_key)
+        upload_start = time.time()
+        client.upload_file(file_path, r2_config["bucket_name"], object_key, Config=r2_transfer_config())
+        upload_seconds = time.time() - upload_start
 
         # Generate presigned URL (valid for 2 hours)
         presigned_url = client.generate_presigned_url(
@@ -164,7 +304,9 @@ def upload_to_r2(file_path: str, job_id: str, r2_config: dict) -> tuple[Optional
             ExpiresIn=7200,
         )
 
-        log(f"  R2 upload complete: {object_key}")
+        size_mb = Path(file_path).stat().st_size / (1024 * 1024)
+        log(f"  R2 upload complete: {object_key} ({size_mb:.1f}MB in {upload_seconds:.1f}s, "
+            f"{size_mb / max(upload_seconds, 1e-6):.1f} MB/s)")
         return presigned_url, object_key
     except ImportError:
         log("Error: boto3 not available for R2 upload")
@@ -264,6 +406,8 @@ def calculate_safe_resize_ratio(
     frame_count: int,
     requested_ratio: float = 1.0,
     safety_margin: float = 0.7,
+    model: Optional[dict] = None,
+    profile: Optional[dict] = None,
 ) -> tuple[float, str]:
     """
     Calculate a safe resize_ratio based on available VRAM and video properties.
@@ -281,10 +425,30 @@ def calculate_safe_resize_ratio(
         frame_count: Number of frames in video
         requested_ratio: User's requested resize ratio (default 1.0 = full res)
         safety_margin: Use this fraction of VRAM (default 0.7 = 70%)
+        model: Calibrated memory model for this GPU (see handle_calibrate);
+               measured, so 90% of VRAM is used instead of safety_margin
+        profile: ProPainter settings the model is evaluated with
 
     Returns:
         (resize_ratio, reason): The ratio to use and why
     """
+    import math
+
+    if model and profile:
+        available_gb = vram_gb * 0.9
+        needed_gb = predict_peak_memory_gb(model, width, height, frame_count, profile)
+        if needed_gb <= available_gb:
+            log(f"Memory model: {needed_gb:.1f}GB needed, {available_gb:.1f}GB available - full resolution OK")
+            return (requested_ratio, "full_resolution_fits")
+
+        # Everything but the base scales with resize_ratio^2
+        base_gb = model["base_gb"] * MEMORY_MODEL_HEADROOM
+        if available_gb <= base_gb:
+            return (0.25, "very_low_vram")
+        safe_ratio = math.sqrt((available_gb - base_gb) / (needed_gb - base_gb))
+        log(f"Memory model: {needed_gb:.1f}GB needed at full res, {available_gb:.1f}GB available")
+        return _round_resize_ratio(safe_ratio, requested_ratio)
+
     # Calculate memory needed at full resolution
     pixels = width * height
     pixels_720p = 1280 * 720
@@ -319,9 +483,14 @@ def calculate_safe_resize_ratio(
     if usable_for_frames <= 0:
         return (0.25, "very_low_vram")
 
-    import math
     safe_ratio = math.sqrt(usable_for_frames / frame_memory)
 
+    log(f"Memory estimate: {total_needed_full_res / (1024**3):.1f}GB needed at full res, {available_bytes / (1024**3):.1f}GB available")
+    return _round_resize_ratio(safe_ratio, requested_ratio)
+
+
+def _round_resize_ratio(safe_ratio: float, requested_ratio: float) -> tuple[float, str]:
+    """Clamp a computed safe ratio, combine it with the request, and round it."""
     # Clamp to reasonable range [0.25, 1.0]
     safe_ratio = max(0.25, min(1.0, safe_ratio))
 
@@ -335,7 +504,6 @@ def calculate_safe_resize_ratio(
             final_ratio = nice
             break
 
-    log(f"Memory estimate: {total_needed_full_res / (1024**3):.1f}GB needed at full res, {available_bytes / (1024**3):.1f}GB available")
     log(f"Calculated safe ratio: {safe_ratio:.2f}, using: {final_ratio}")
 
     reason = "auto_calculated" if final_ratio < requested_ratio else "user_requested"
@@ -381,16 +549,119 @@ def create_mask_from_region(region: str, width: int, height: int, output_path: s
         return False
 
 
-def run_propainter(
+# Region-of-interest (ROI) mode: inpaint only a padded crop around the mask
+# and composite the patch back onto the untouched original frames.
+ROI_MIN_PADDING = 64       # Minimum context (px) on each side for flow propagation
+ROI_PADDING_FACTOR = 0.5   # Context as a fraction of the mask's larger side
+ROI_MIN_SIZE = 256         # RAFT flow needs a reasonably sized crop
+ROI_PATCH_MARGIN = 8       # Composite slightly beyond the mask (ProPainter dilates it)
+ROI_MAX_AREA_FRACTION = 0.6  # Above this, cropping saves too little to be worth it
+
+
+def get_mask_bbox(mask_path: str) -> Optional[tuple[int, int, int, int]]:
+    """Get the bounding box (x, y, w, h) of the white area in a mask image."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-i", mask_path, "-vf", "bbox", "-f", "null", "-"],
+            capture_output=True, text=True, timeout=30,
+        )
+        matches = re.findall(r"x1:(\d+) x2:(\d+) y1:(\d+) y2:(\d+)", result.stderr)
+        if not matches:
+            return None
+        x1, x2, y1, y2 = (int(v) for v in matches[-1])
+        return x1, y1, x2 - x1 + 1, y2 - y1 + 1
+    except Exception as e:
+        log(f"Warning: Could not read mask bounding box: {e}")
+        return None
+
+
+def calculate_roi(bbox: tuple[int, int, int, int], width: int, height: int) -> Optional[dict]:
+    """Calculate a padded, 8-aligned crop around a mask bounding box.
+
+    Returns crop (x, y, w, h) plus the patch to composite back (relative to
+    the crop), or None when the crop would cover most of the frame anyway.
+    """
+    bx, by, bw, bh = bbox
+    padding = max(ROI_MIN_PADDING, int(max(bw, bh) * ROI_PADDING_FACTOR))
+
+    def span(start: int, length: int, limit: int) -> tuple[int, int]:
+        size = max(length + 2 * padding, ROI_MIN_SIZE)
+        size = min(-(-size // 8) * 8, limit - limit % 8)
+        origin = start + length // 2 - size // 2
+        origin = max(0, min(origin, limit - size))
+        return origin, size
+
+    x, w = span(bx, bw, width)
+    y, h = span(by, bh, height)
+
+    if w * h > width * height * ROI_MAX_AREA_FRACTION:
+        return None
+
+    patch_x = max(bx - ROI_PATCH_MARGIN, x)
+    patch_y = max(by - ROI_PATCH_MARGIN, y)
+    patch_w = min(bx + bw + ROI_PATCH_MARGIN, x + w) - patch_x
+    patch_h = min(by + bh + ROI_PATCH_MARGIN, y + h) - patch_y
+
+    return {
+        "x": x, "y": y, "w": w, "h": h,
+        "patch_x": patch_x - x, "patch_y": patch_y - y,
+        "patch_w": patch_w, "patch_h": patch_h,
+    }
+
+
+def crop_to_roi(input_path: str, output_path: str, roi: dict) -> bool:
+    """Crop a video or mask image to the ROI (video is re-encoded, audio dropped)."""
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", input_path,
+        "-vf", f"crop={roi['w']}:{roi['h']}:{roi['x']}:{roi['y']}",
+    ]
+    if Path(output_path).suffix.lower() == ".mp4":
+        cmd.extend(["-an", "-c:v", "libx264", "-preset", "fast", "-crf", "18"])
+    cmd.append(output_path)
+
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=1800)
+    if result.returncode != 0:
+        log(f"FFmpeg crop error: {result.stderr[-1000:]}")
+        return False
+    return True
+
+
+def composite_roi(original_video: str, inpainted_roi: str, roi: dict, output_path: str) -> bool:
+    """Overlay the inpainted patch back onto the original full-size frames."""
+    log(f"Compositing {roi['w']}x{roi['h']} ROI back onto original frames...")
+    patch = (
+        f"[1:v]scale={roi['w']}:{roi['h']}:flags=lanczos,"
+        f"crop={roi['patch_w']}:{roi['patch_h']}:{roi['patch_x']}:{roi['patch_y']}[patch];"
+        f"[0:v][patch]overlay={roi['x'] + roi['patch_x']}:{roi['y'] + roi['patch_y']}:eof_action=pass[outv]"
+    )
+    result = subprocess.run([
+        "ffmpeg", "-y",
+        "-i", original_video,
+        "-i", inpainted_roi,
+        "-filter_complex", patch,
+        "-map", "[outv]",
+        "-c:v", "libx264",
+        "-preset", "medium",
+        "-crf", "18",
+        output_path,
+    ], capture_output=True, text=True, timeout=3600)
+
+    if result.returncode != 0:
+        log(f"FFmpeg composite error: {result.stderr[-1000:]}")
+        return False
+    return True
+
+
+def propainter_command(
     video_path: str,
     mask_path: str,
     output_dir: str,
     profile: dict,
     fp16: bool = True,
     resize_ratio: float = 1.0
-) -> Optional[str]:
-    """Run ProPainter inference and return path to output video."""
-
+) -> list:
+    """Build the ProPainter inference command."""
     inference_script = PROPAINTER_PATH / "inference_propainter.py"
 
     cmd = [
@@ -409,6 +680,45 @@ def run_propainter(
     if resize_ratio != 1.0:
         cmd.extend(["--resize_ratio", str(resize_ratio)])
 
+    return cmd
+
+
+def _gpu_memory_used_gb() -> Optional[float]:
+    """Current GPU memory use in GB (nvidia-smi)."""
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", "--query-gpu=memory.used", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, timeout=10,
+        )
+        return int(result.stdout.strip().split('\n')[0]) / 1024
+    except (ValueError, IndexError, OSError, subprocess.SubprocessError):
+        return None
+
+
+def measure_propainter_peak_gb(cmd: list, poll_interval: float = 0.2) -> Optional[float]:
+    """Run a ProPainter command and return its peak VRAM in GB (None if it failed)."""
+    baseline = _gpu_memory_used_gb() or 0.0
+    proc = subprocess.Popen(cmd, cwd=PROPAINTER_PATH, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak = 0.0
+    while proc.poll() is None:
+        used = _gpu_memory_used_gb()
+        if used is not None:
+            peak = max(peak, used - baseline)
+        time.sleep(poll_interval)
+    return peak if proc.returncode == 0 and peak > 0 else None
+
+
+def run_propainter(
+    video_path: str,
+    mask_path: str,
+    output_dir: str,
+    profile: dict,
+    fp16: bool = True,
+    resize_ratio: float = 1.0
+) -> Optional[str]:
+    """Run ProPainter inference and return path to output video."""
+    cmd = propainter_command(video_path, mask_path, output_dir, profile, fp16, resize_ratio)
+
     log(f"Running ProPainter with settings: {profile}, resize_ratio={resize_ratio}")
     log(f"Command: {' '.join(cmd)}")
 
@@ -473,6 +783,10 @@ def handle_dewatermark(job_input: dict, job_id: str, work_dir: Path) -> dict:
         fp16: Use half precision (default: true, faster)
         resize_ratio: Scale factor for processing (default: "auto" - calculated based on VRAM)
                       Set to a specific value (0.25-1.0) to override auto-calculation
+        roi: Inpaint only a padded crop around the mask and composite it back (default: false).
+             Memory then scales with the crop, so long videos rarely need resize_ratio < 1.0
+        memory_models: Calibrated memory models keyed by GPU name; the one for this GPU
+                       (or one saved in MEMORY_MODEL_DIR) replaces the default estimate
         r2: R2 config for result upload (endpoint_url, access_key_id, secret_access_key, bucket_name)
     """
     start_time = time.time()
@@ -484,6 +798,7 @@ def handle_dewatermark(job_input: dict, job_id: str, work_dir: Path) -> dict:
     fp16 = job_input.get("fp16", True)
     requested_resize_ratio = job_input.get("resize_ratio", "auto")  # Default to auto-calculation
     r2_config = job_input.get("r2")  # Optional R2 config for result upload
+    use_roi = job_input.get("roi", False)
 
     if not video_url:
         return {"error": "Missing required 'video_url' in input"}
@@ -492,7 +807,7 @@ def handle_dewatermark(job_input: dict, job_id: str, work_dir: Path) -> dict:
 
     if r2_config:
         log("R2 config provided - will upload result to R2")
-    log(f"Processing options: fp16={fp16}, requested_resize_ratio={requested_resize_ratio}")
+    log(f"Processing options: fp16={fp16}, requested_resize_ratio={requested_resize_ratio}, roi={use_roi}")
 
     # Download video
     video_path = str(work_dir / "input_video.mp4")
@@ -510,22 +825,57 @@ def handle_dewatermark(job_input: dict, job_id: str, work_dir: Path) -> dict:
 
     log(f"Video: {width}x{height}, {duration:.1f}s, {frame_count} frames")
 
+    # Prepare mask
+    mask_path = str(work_dir / "mask.png")
+
+    if mask_url:
+        if not download_file(mask_url, mask_path, "mask"):
+            return {"error": "Failed to download mask from URL"}
+    else:
+        if not create_mask_from_region(region, width, height, mask_path):
+            return {"error": f"Failed to create mask from region: {region}"}
+
+    # ROI mode: process only a padded crop around the mask
+    roi = None
+    inpaint_video_path = video_path
+    inpaint_width, inpaint_height = width, height
+    if use_roi:
+        bbox = get_mask_bbox(mask_path)
+        roi = calculate_roi(bbox, width, height) if bbox else None
+        if roi:
+            log(f"ROI: {roi['w']}x{roi['h']} at ({roi['x']},{roi['y']})")
+            inpaint_video_path = str(work_dir / "roi.mp4")
+            roi_mask_path = str(work_dir / "roi_mask.png")
+            if not crop_to_roi(video_path, inpaint_video_path, roi) or not crop_to_roi(mask_path, roi_mask_path, roi):
+                return {"error": "Failed to crop video to ROI"}
+            mask_path = roi_mask_path
+            inpaint_width, inpaint_height = roi["w"], roi["h"]
+        else:
+            log("ROI would cover most of the frame (or mask is empty), processing full frame")
+
     # Detect GPU and get optimal settings
     vram_gb = get_gpu_vram_gb()
     profile = get_memory_profile(vram_gb)
     log(f"GPU VRAM: {vram_gb}GB, using profile: {profile}")
 
+    gpu_name = get_gpu_name()
+    memory_model = select_memory_model(job_input.get("memory_models"), gpu_name, "fp16" if fp16 else "fp32")
+    if memory_model:
+        log(f"Using calibrated memory model for {gpu_name}")
+
     # Calculate safe resize_ratio based on VRAM and video properties
     if requested_resize_ratio == "auto":
         # Auto mode: calculate optimal ratio, aim for full resolution if possible
         resize_ratio, resize_reason = calculate_safe_resize_ratio(
-            vram_gb, width, height, frame_count, requested_ratio=1.0
+            vram_gb, inpaint_width, inpaint_height, frame_count, requested_ratio=1.0,
+            model=memory_model, profile=profile,
         )
     else:
         # User specified a ratio - use it but warn if it might OOM
         user_ratio = float(requested_resize_ratio)
         safe_ratio, _ = calculate_safe_resize_ratio(
-            vram_gb, width, height, frame_count, requested_ratio=user_ratio
+            vram_gb, inpaint_width, inpaint_height, frame_count, requested_ratio=user_ratio,
+            model=memory_model, profile=profile,
         )
         if safe_ratio < user_ratio:
             log(f"WARNING: Requested resize_ratio={user_ratio} may cause OOM. Safe ratio is {safe_ratio}")
@@ -534,25 +884,21 @@ def handle_dewatermark(job_input: dict, job_id: str, work_dir: Path) -> dict:
 
     log(f"Using resize_ratio={resize_ratio} ({resize_reason})")
 
-    # Prepare mask
-    mask_path = str(work_dir / "mask.png")
-
-    if mask_url:
-        if not download_file(mask_url, mask_path, "mask"):
-            return {"error": "Failed to download mask from URL"}
-    else:
-        if not create_mask_from_region(region, width, height, mask_path):
-            return {"error": f"Failed to create mask from region: {region}"}
-
     # Run ProPainter
     output_dir = str(work_dir / "results")
     os.makedirs(output_dir, exist_ok=True)
 
-    result_path = run_propainter(video_path, mask_path, output_dir, profile, fp16, resize_ratio)
+    result_path = run_propainter(inpaint_video_path, mask_path, output_dir, profile, fp16, resize_ratio)
 
     if not result_path:
         return {"error": "ProPainter processing failed - check logs for details"}
 
+    if roi:
+        composited_path = str(work_dir / "composited.mp4")
+        if not composite_roi(video_path, result_path, roi, composited_path):
+            return {"error": "Failed to composite ROI onto original video"}
+        result_path = composited_path
+
     # Upload result (to R2 if configured, otherwise RunPod storage)
     upload_result = upload_file(result_path, job_id, r2_config)
 
@@ -571,9 +917,13 @@ def handle_dewatermark(job_input: dict, job_id: str, work_dir: Path) -> dict:
         "profile_used": profile,
         "resize_ratio": resize_ratio,
         "resize_reason": resize_reason,
+        "memory_model": gpu_name if memory_model else None,
         "processing_time_seconds": round(elapsed, 2),
     }
 
+    if roi:
+        result["roi"] = roi
+
     # Include R2 key if result was uploaded to R2
     if upload_result.get("r2_key"):
         result["r2_key"] = upload_result["r2_key"]
@@ -581,12 +931,86 @@ def handle_dewatermark(job_input: dict, job_id: str, work_dir: Path) -> dict:
     return result
 
 
+def handle_calibrate(job_input: dict, job_id: str, work_dir: Path) -> dict:
+    """
+    Fit a memory model for this worker's GPU from synthetic ProPainter runs.
+
+    The model is returned as "memory_model" (the client saves it and sends it
+    with later jobs) and also written to MEMORY_MODEL_DIR when that exists,
+    e.g. on a network volume.
+
+    Optional inputs:
+        fp16: Use half precision (default: true, should match later jobs)
+    """
+    start_time = time.time()
+    fp16 = job_input.get("fp16", True)
+    gpu_name = get_gpu_name()
+    vram_gb = get_gpu_vram_gb()
+    samples = []
+
+    log(f"Calibrating memory model for {gpu_name} ({len(CALIBRATION_RUNS)} runs, fp16={fp16})")
+
+    for width, height, frames, subvideo_length, neighbor_length in CALIBRATION_RUNS:
+        clip = str(work_dir / f"clip_{width}x{height}_{frames}.mp4")
+        mask = str(work_dir / f"mask_{width}x{height}.png")
+        if not Path(clip).exists():
+            made = subprocess.run([
+                "ffmpeg", "-y", "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=25",
+                "-frames:v", str(frames), "-c:v", "libx264", "-pix_fmt", "yuv420p", clip,
+            ], capture_output=True, text=True, timeout=300)
+            region = f"{width // 3},{height // 3},{width // 3},{height // 6}"
+            if made.returncode != 0 or not create_mask_from_region(region, width, height, mask):
+                return {"error": "Failed to create calibration clip"}
+
+        profile = {"subvideo_length": subvideo_length, "neighbor_length": neighbor_length, "ref_stride": 10}
+        cmd = propainter_command(clip, mask, str(work_dir / "results"), profile, fp16)
+        peak = measure_propainter_peak_gb(cmd)
+        log(f"  {width}x{height}, {frames} frames, {profile}: {f'{peak:.2f}GB' if peak else 'failed'}")
+        if peak:
+            samples.append({
+                "width": width, "height": height, "frames": frames,
+                "subvideo_length": subvideo_length, "neighbor_length": neighbor_length,
+                "peak_gb": round(peak, 3),
+            })
+
+    fitted = fit_memory_model(samples)
+    if not fitted:
+        return {"error": f"Only {len(samples)}/{len(CALIBRATION_RUNS)} calibration runs succeeded, cannot fit a model"}
+
+    model = {
+        "version": 1,
+        "device": gpu_name,
+        "memory_gb": vram_gb,
+        "precision": "fp16" if fp16 else "fp32",
+        "calibrated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **fitted,
+        "samples": samples,
+    }
+    log(f"Fitted memory model: {fitted}")
+
+    if MEMORY_MODEL_DIR.parent.exists():
+        try:
+            import json
+            MEMORY_MODEL_DIR.mkdir(parents=True, exist_ok=True)
+            _model_file(gpu_name, model["precision"]).write_text(json.dumps(model, indent=2))
+            log(f"Saved memory model to {_model_file(gpu_name, model['precision'])}")
+        except OSError as e:
+            log(f"Warning: Could not save memory model: {e}")
+
+    return {
+        "success": True,
+        "memory_model": model,
+        "processing_time_seconds": round(time.time() - start_time, 2),
+    }
+
+
 def handler(job: dict) -> dict:
     """
     Main RunPod handler - routes to specific operations.
 
     Supports operations:
         - dewatermark: Remove watermarks using ProPainter
+        - calibrate: Fit a memory model for this GPU
         - (future: upscale, denoise, etc.)
     """
     job_id = job.get("id", "unknown")
@@ -602,8 +1026,10 @@ def handler(job: dict) -> dict:
     try:
         if operation == "dewatermark":
             return handle_dewatermark(job_input, job_id, work_dir)
+        elif operation == "calibrate":
+            return handle_calibrate(job_input, job_id, work_dir)
         else:
-            return {"error": f"Unknown operation: {operation}. Supported: dewatermark"}
+            return {"error": f"Unknown operation: {operation}. Supported: dewatermark, calibrate"}
     except Exception as e:
         import traceback
         log(f"Handler exception: {e}")
@@ -11,44 +11,73 @@ This is Worker 1 in the video generation pipeline:
 Input format:
 {
     "input": {
-        "image_base64": str,           # Required - primary input image (base64 encoded)
-        "images_base64": [str],        # Optional - additional reference images (up to 2 more)
+        "image_url": str,              # Required (or image_base64) - primary input image URL
+        "image_urls": [str],           # Optional - additional reference image URLs (up to 2 more)
+        "image_base64": str,           # Alternative to image_url - inline base64 image
+        "images_base64": [str],        # Alternative to image_urls - inline base64 references
         "prompt": str,                  # Required - edit instruction
         "negative_prompt": str,         # Optional (default: "")
         "num_inference_steps": int,     # Optional (default: 4 for Lightning, 8 for FP8)
         "guidance_scale": float,        # Optional (default: 1.0)
         "seed": int,                    # Optional (random if not set)
         "use_fp8": bool,               # Optional (default: true, uses FP8 quantization)
-        "auto_resize": bool,           # Optional (default: true)
+        "auto_resize": bool,           # Optional (default: true) - resize to a resolution bucket
+        "max_pixels": int,             # Optional (default: 1048576) - pixel budget cap for auto_resize
+        "restore_size": bool | [w, h], # Optional - resize the result back to the input (or given) size
+        "variants": [                  # Optional - several edits of the same inputs in one job
+            {"prompt": str, "seed": int, "negative_prompt": str},  # each key defaults to the above
+        ],
+        "r2": dict,                    # Optional - R2 config for result upload
     }
 }
 
 Multi-image editing:
-- Pass up to 3 images total (1 primary + 2 in images_base64)
+- Pass up to 3 images total (1 primary + 2 in image_urls / images_base64)
 - Reference images in prompt: "the cat from the first image" + "the people from the second image"
 - Example: "Place the cat from the first image on the table with the people from the second image"
 
 Output format:
 {
     "success": true,
-    "edited_image_base64": str,
+    "output_url": str,             # With r2 - presigned URL of the PNG result
+    "r2_key": str,                 # With r2
+    "edited_image_base64": str,    # Without r2 (or if the R2 upload failed)
     "seed": int,
     "inference_time_ms": int,
-    "image_size": [width, height]
+    "image_size": [width, height],
+    "processed_size": [width, height]   # Size the pipeline ran at
+}
+
+With auto_resize, every input is resized to the largest supported pixel budget
+it fills (512^2, 768^2 or 1024^2, capped by max_pixels), keeping its aspect
+ratio on a 32px grid. Inference time and VRAM grow steeply with pixel count,
+and the model is trained around 1MP, so larger inputs only cost time.
+
+With "variants", the inputs are decoded once and the variants are run through
+the pipeline in batches sized to free GPU memory. Each result is in "outputs"
+(same image fields as above, plus its prompt and seed), in variant order:
+{
+    "success": true,
+    "outputs": [{"prompt": str, "seed": int, "output_url": str, ...}],
+    "variant_batch_size": int,
+    "inference_time_ms": int
 }
 """
 
 import base64
 import io
+import math
 import os
 import random
 import shutil
 import sys
 import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+import requests
 import runpod
 import torch
 from PIL import Image
@@ -61,6 +90,17 @@ FP8_MODEL_ID = "lightx2v/Qwen-Image-Edit-2511-Lightning"
 _pipeline = None
 _pipeline_config = {}
 
+# Resolution bucketing (auto_resize): supported pixel budgets, and the grid
+# bucket sizes snap to (VAE downsampling x transformer patch size, rounded up)
+PIXEL_BUDGETS = (512 * 512, 768 * 768, 1024 * 1024)
+BUCKET_MULTIPLE = 32
+
+# Variant batching: rough activation memory per output megapixel in one
+# pipeline call (bf16, CFG doubles the batch), and a cap on variants per call
+VARIANT_GB_PER_MEGAPIXEL = 6.0
+MAX_VARIANT_BATCH = 8
+MAX_VARIANTS = 16
+
 
 def log(message: str) -> None:
     """Log message to stderr (visible in RunPod logs)."""
@@ -112,6 +152,58 @@ def decode_base64_image(image_base64: str) -> Optional[Image.Image]:
         return None
 
 
+def download_image(url: str, output_path: str, description: str = "image") -> Optional[Image.Image]:
+    """Download an image URL to output_path (streamed) and open it as RGB."""
+    try:
+        log(f"Downloading {description} from {url[:80]}...")
+        response = requests.get(url, stream=True, timeout=300)
+        response.raise_for_status()
+
+        with open(output_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                f.write(chunk)
+
+        log(f"  Downloaded {description}: {Path(output_path).stat().st_size // 1024}KB")
+        return Image.open(output_path).convert("RGB")
+    except Exception as e:
+        log(f"Error downloading {description}: {e}")
+        return None
+
+
+def load_input_images(job_input: dict, work_dir: Path) -> tuple[list[Image.Image], Optional[str]]:
+    """Load the primary image and up to 2 references, from URLs or base64.
+
+    URLs are fetched in parallel. Returns (images, error).
+    """
+    image_url = job_input.get("image_url")
+    if image_url:
+        urls = [image_url] + list(job_input.get("image_urls") or [])[:2]
+        paths = [str(work_dir / f"input_{i}") for i in range(len(urls))]
+        descriptions = ["primary image"] + [f"reference image {i + 2}" for i in range(len(urls) - 1)]
+        with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+            images = list(pool.map(download_image, urls, paths, descriptions))
+        for description, image in zip(descriptions, images):
+            if image is None:
+                return [], f"Failed to download {description}"
+        return images, None
+
+    image_base64 = job_input.get("image_base64")
+    if not image_base64:
+        return [], "Missing required 'image_url' (or 'image_base64') in input"
+
+    input_image = decode_base64_image(image_base64)
+    if input_image is None:
+        return [], "Failed to decode input image from base64"
+
+    images = [input_image]
+    for i, ref_b64 in enumerate((job_input.get("images_base64") or [])[:2]):  # Max 2 additional images
+        ref_image = decode_base64_image(ref_b64)
+        if ref_image is None:
+            return [], f"Failed to decode reference image {i+2} from base64"
+        images.append(ref_image)
+    return images, None
+
+
 def encode_image_base64(image: Image.Image, format: str = "PNG") -> str:
     """Encode PIL Image to base64 string."""
     buffer = io.BytesIO()
@@ -166,32 +258,64 @@ def get_pipeline(use_fp8: bool = True):
     return _pipeline
 
 
-def upload_to_r2(image_base64: str, job_id: str, r2_config: dict) -> tuple[Optional[str], Optional[str]]:
-    """Upload image to Cloudflare R2 and return (presigned_url, object_key)."""
-    try:
+# R2 clients are reused across jobs on a warm worker. Files above 16MB are
+# sent as 16MB parts, 8 at a time.
+_r2_clients = {}
+R2_MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+R2_MAX_CONCURRENCY = 8
+
+
+def get_r2_client(r2_config: dict):
+    """Return a boto3 S3 client for R2, cached per account."""
+    cache_key = (r2_config["endpoint_url"], r2_config["access_key_id"], r2_config["secret_access_key"])
+    client = _r2_clients.get(cache_key)
+    if client is None:
         import boto3
         from botocore.config import Config
-        import uuid
-
-        log("Uploading to R2...")
 
         client = boto3.client(
             "s3",
             endpoint_url=r2_config["endpoint_url"],
             aws_access_key_id=r2_config["access_key_id"],
             aws_secret_access_key=r2_config["secret_access_key"],
-            config=Config(signature_version="s3v4"),
+            config=Config(
+                signature_version="s3v4",
+                max_pool_connections=R2_MAX_CONCURRENCY * 2,
+                retries={"max_attempts": 5, "mode": "adaptive"},
+            ),
         )
+        _r2_clients[cache_key] = client
+    return client
+
+
+def r2_transfer_config():
+    """Multipart settings for large R2 uploads."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=R2_MULTIPART_CHUNKSIZE,
+        multipart_chunksize=R2_MULTIPART_CHUNKSIZE,
+        max_concurrency=R2_MAX_CONCURRENCY,
+    )
+
+
+def upload_to_r2(file_path: str, job_id: str, r2_config: dict) -> tuple[Optional[str], Optional[str]]:
+    """Upload image file to Cloudflare R2 and return (presigned_url, object_key)."""
+    try:
+        import uuid
+
+        log("Uploading to R2...")
+
+        client = get_r2_client(r2_config)
 
         object_key = f"qwen-edit/results/{job_id}_{uuid.uuid4().hex[:8]}.png"
 
-        # Decode and upload
-        image_bytes = base64.b64decode(image_base64)
-        client.put_object(
-            Bucket=r2_config["bucket_name"],
-            Key=object_key,
-            Body=image_bytes,
-            ContentType="image/png"
+        client.upload_file(
+            file_path,
+            r2_config["bucket_name"],
+            object_key,
+            ExtraArgs={"ContentType": "image/png"},
+            Config=r2_transfer_config(),
         )
 
         presigned_url = client.generate_presigned_url(
@@ -207,29 +331,129 @@ def upload_to_r2(image_base64: str, job_id: str, r2_config: dict) -> tuple[Optio
         return None, None
 
 
+def resolution_bucket(size: tuple[int, int], max_pixels: int = PIXEL_BUDGETS[-1]) -> tuple[int, int]:
+    """Bucketed (width, height) for an image size.
+
+    Picks the largest pixel budget (up to max_pixels) the image fills, or the
+    smallest budget for tiny images, and snaps the scaled size to the grid.
+    """
+    width, height = size
+    budgets = [budget for budget in PIXEL_BUDGETS if budget <= max_pixels] or [PIXEL_BUDGETS[0]]
+    budget = max([b for b in budgets if b <= width * height], default=budgets[0])
+    scale = math.sqrt(budget / (width * height))
+    return (
+        max(BUCKET_MULTIPLE, round(width * scale / BUCKET_MULTIPLE) * BUCKET_MULTIPLE),
+        max(BUCKET_MULTIPLE, round(height * scale / BUCKET_MULTIPLE) * BUCKET_MULTIPLE),
+    )
+
+
+def resize_to_bucket(image: Image.Image, max_pixels: int = PIXEL_BUDGETS[-1]) -> Image.Image:
+    """Resize an image to its resolution bucket (Lanczos)."""
+    target = resolution_bucket(image.size, max_pixels)
+    if target == image.size:
+        return image
+    return image.resize(target, Image.LANCZOS)
+
+
+def variant_batch_size(image_size: tuple[int, int]) -> int:
+    """How many variants fit in one pipeline call with the GPU memory left."""
+    try:
+        free_bytes, _ = torch.cuda.mem_get_info()
+    except Exception:
+        return 1
+    megapixels = max(image_size[0] * image_size[1] / 1e6, 0.25)
+    free_gb = free_bytes / (1024 ** 3)
+    # Leave headroom for the VAE decode and allocator fragmentation
+    return max(1, min(MAX_VARIANT_BATCH, int(free_gb * 0.8 / (megapixels * VARIANT_GB_PER_MEGAPIXEL))))
+
+
+def generate_images(
+    pipe,
+    images: list[Image.Image],
+    variants: list[dict],
+    num_inference_steps: int,
+    guidance_scale: float,
+    batch_size: int = 1,
+    output_size: Optional[tuple[int, int]] = None,
+) -> tuple[list[Image.Image], int]:
+    """Run variants through the pipeline, batch_size prompts per call.
+
+    A batch that runs out of GPU memory is retried at half the size.
+    Returns (images, batch size that fit).
+    """
+    # Generate at the bucketed size; without it the pipeline picks ~1MP itself
+    size_args = {"width": output_size[0], "height": output_size[1]} if output_size else {}
+    outputs = []
+    start = 0
+    while start < len(variants):
+        group = variants[start:start + batch_size]
+        try:
+            output = pipe(
+                image=images,  # Pass all images (1-3) for multi-image editing
+                prompt=[v["prompt"] for v in group],
+                negative_prompt=[v["negative_prompt"] or " " for v in group],
+                num_inference_steps=num_inference_steps,
+                guidance_scale=guidance_scale,
+                true_cfg_scale=4.0,
+                generator=[torch.Generator(device="cuda").manual_seed(v["seed"]) for v in group],
+                num_images_per_prompt=1,
+                **size_args,
+            )
+        except torch.cuda.OutOfMemoryError:
+            if batch_size == 1:
+                raise
+            torch.cuda.empty_cache()
+            batch_size = max(1, batch_size // 2)
+            log(f"  Out of GPU memory, retrying with {batch_size} variants per call")
+            continue
+        outputs.extend(output.images)
+        start += len(group)
+        if len(variants) > 1:
+            log(f"  Generated {len(outputs)}/{len(variants)} variants")
+    return outputs, batch_size
+
+
+def package_output(image: Image.Image, job_id: str, work_dir: Path, r2_config: Optional[dict], index: int = 0) -> dict:
+    """Upload a result to R2 if configured; return inline base64 only without it."""
+    result = {"image_size": list(image.size)}
+    url = None
+    if r2_config:
+        output_path = str(work_dir / f"output_{index}.png")
+        image.save(output_path)
+        url, r2_key = upload_to_r2(output_path, job_id, r2_config)
+        if url:
+            result["output_url"] = url
+            result["r2_key"] = r2_key
+    if not url:
+        result["edited_image_base64"] = encode_image_base64(image)
+    return result
+
+
 def handle_edit(job_input: dict, job_id: str, work_dir: Path) -> dict:
     """
     Handle image edit operation using Qwen-Image-Edit.
 
     Required inputs:
-        image_base64: Base64 encoded input image
+        image_url: URL of the input image (or image_base64: base64 encoded image)
         prompt: Edit instruction (e.g., "Change the background to an office")
 
     Optional inputs:
-        images_base64: Additional reference images (list, up to 2 more for 3 total)
+        image_urls: Additional reference image URLs (list, up to 2 more for 3 total)
+        images_base64: Additional reference images as base64, with image_base64
         negative_prompt: Things to avoid (default: "")
         num_inference_steps: Number of diffusion steps (default: 4 for LoRA, 8 for FP8)
         guidance_scale: CFG scale (default: 1.0)
         seed: Random seed for reproducibility
         use_fp8: Use FP8 quantization (default: true)
-        auto_resize: Automatically resize for optimal processing (default: true)
-        r2: R2 config for result upload
+        auto_resize: Resize inputs to a resolution bucket before inference (default: true)
+        max_pixels: Pixel budget cap for auto_resize (default: 1024*1024)
+        restore_size: Resize the result back to the input size (true) or to [width, height]
+        variants: List of {prompt, seed, negative_prompt} to run on the same inputs
+        r2: R2 config for result upload; the result is then returned as a URL only
     """
     start_time = time.time()
 
     # Extract inputs
-    image_base64 = job_input.get("image_base64")
-    images_base64 = job_input.get("images_base64", [])  # Additional reference images
     prompt = job_input.get("prompt")
     negative_prompt = job_input.get("negative_prompt", "")
     # Default to BF16 (full quality) - requires 48GB+ GPU
@@ -238,62 +462,78 @@ def handle_edit(job_input: dict, job_id: str, work_dir: Path) -> dict:
     guidance_scale = job_input.get("guidance_scale", 1.0)
     seed = job_input.get("seed")
     auto_resize = job_input.get("auto_resize", True)
+    max_pixels = int(job_input.get("max_pixels") or PIXEL_BUDGETS[-1])
+    restore_size = job_input.get("restore_size")
     r2_config = job_input.get("r2")
 
+    # Each variant falls back to the top-level prompt / negative prompt / seed
+    variants = job_input.get("variants")
+    batched = bool(variants)
+    if batched:
+        if not isinstance(variants, list) or not all(isinstance(v, dict) for v in variants):
+            return {"error": "'variants' must be a list of objects"}
+        if len(variants) > MAX_VARIANTS:
+            return {"error": f"At most {MAX_VARIANTS} variants per job"}
+    else:
+        variants = [{}]
+    variants = [
+        {
+            "prompt": v.get("prompt") or prompt,
+            "negative_prompt": v.get("negative_prompt", negative_prompt),
+            "seed": v.get("seed", seed),
+        }
+        for v in variants
+    ]
+
     # Validate required inputs
-    if not image_base64:
-        return {"error": "Missing required 'image_base64' in input"}
-    if not prompt:
+    if not all(v["prompt"] for v in variants):
         return {"error": "Missing required 'prompt' in input"}
 
-    # Decode primary input image
-    input_image = decode_base64_image(image_base64)
-    if input_image is None:
-        return {"error": "Failed to decode input image from base64"}
-
-    log(f"Primary image size: {input_image.size}")
+    # Load primary input image + references
+    all_images, error = load_input_images(job_input, work_dir)
+    if error:
+        return {"error": error}
 
-    # Build list of all images (primary + references)
-    all_images = [input_image]
-    for i, ref_b64 in enumerate(images_base64[:2]):  # Max 2 additional images
-        ref_image = decode_base64_image(ref_b64)
-        if ref_image is None:
-            return {"error": f"Failed to decode reference image {i+2} from base64"}
-        all_images.append(ref_image)
+    log(f"Primary image size: {all_images[0].size}")
+    for i, ref_image in enumerate(all_images[1:]):
         log(f"Reference image {i+2} size: {ref_image.size}")
 
     log(f"Total images for edit: {len(all_images)}")
 
-    # Save input image to temp file (LightX2V expects file path)
-    input_path = str(work_dir / "input.png")
-    input_image.save(input_path)
-
-    # Generate seed if not provided
-    if seed is None:
-        seed = random.randint(0, 2**32 - 1)
-    log(f"Using seed: {seed}")
+    input_size = all_images[0].size
+    output_size = None
+    if auto_resize:
+        all_images = [resize_to_bucket(image, max_pixels) for image in all_images]
+        output_size = all_images[0].size
+        if output_size != input_size:
+            log(f"Resized to bucket: {output_size[0]}x{output_size[1]}")
+
+    if restore_size is True:
+        restore_size = input_size
+    elif restore_size:
+        restore_size = tuple(int(v) for v in restore_size)
+
+    # Generate seeds if not provided
+    for variant in variants:
+        if variant["seed"] is None:
+            variant["seed"] = random.randint(0, 2**32 - 1)
+    log(f"Using seed{'s' if batched else ''}: {', '.join(str(v['seed']) for v in variants)}")
 
     # Get pipeline
     pipe = get_pipeline(use_fp8=use_fp8)
 
-    log(f"Running edit with diffusers: steps={num_inference_steps}, guidance={guidance_scale}")
+    batch_size = variant_batch_size(all_images[0].size) if batched else 1
+    log(
+        f"Running edit with diffusers: steps={num_inference_steps}, guidance={guidance_scale}"
+        + (f", {len(variants)} variants, up to {batch_size} per call" if batched else "")
+    )
     gen_start = time.time()
 
     # Use diffusers API
     try:
-        generator = torch.Generator(device="cuda").manual_seed(seed)
-
-        output = pipe(
-            image=all_images,  # Pass all images (1-3) for multi-image editing
-            prompt=prompt,
-            negative_prompt=negative_prompt if negative_prompt else " ",
-            num_inference_steps=num_inference_steps,
-            guidance_scale=guidance_scale,
-            true_cfg_scale=4.0,
-            generator=generator,
-            num_images_per_prompt=1,
+        output_images, batch_size = generate_images(
+            pipe, all_images, variants, num_inference_steps, guidance_scale, batch_size, output_size
         )
-        output_image = output.images[0]
     except Exception as e:
         import traceback
         log(f"Generation error: {e}")
@@ -302,27 +542,34 @@ def handle_edit(job_input: dict, job_id: str, work_dir: Path) -> dict:
 
     gen_time = time.time() - gen_start
     log(f"Generation completed in {gen_time:.1f}s")
-    output_base64 = encode_image_base64(output_image)
 
-    elapsed_ms = int((time.time() - start_time) * 1000)
+    processed_size = output_images[0].size
+    if restore_size and tuple(restore_size) != processed_size:
+        log(f"Resizing result back to {restore_size[0]}x{restore_size[1]}")
+        output_images = [image.resize(restore_size, Image.LANCZOS) for image in output_images]
 
     result = {
         "success": True,
-        "edited_image_base64": output_base64,
-        "seed": seed,
-        "inference_time_ms": elapsed_ms,
-        "image_size": list(output_image.size),
+        "inference_time_ms": int((time.time() - start_time) * 1000),
         "num_inference_steps": num_inference_steps,
         "use_fp8": use_fp8,
+        "processed_size": list(processed_size),
     }
 
-    # Upload to R2 if configured
-    if r2_config:
-        url, r2_key = upload_to_r2(output_base64, job_id, r2_config)
-        if url:
-            result["output_url"] = url
-            result["r2_key"] = r2_key
-
+    if not batched:
+        result["seed"] = variants[0]["seed"]
+        result.update(package_output(output_images[0], job_id, work_dir, r2_config))
+        return result
+
+    result["variant_batch_size"] = batch_size
+    result["outputs"] = [
+        {
+            "prompt": variant["prompt"],
+            "seed": variant["seed"],
+            **package_output(image, job_id, work_dir, r2_config, index),
+        }
+        for index, (variant, image) in enumerate(zip(variants, output_images))
+    ]
     return result
 
 
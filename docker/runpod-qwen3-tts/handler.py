@@ -228,31 +228,67 @@ def generate_clone_voice(text: str, language: str, ref_audio_path: Path, ref_tex
     return wavs[0], sr
 
 
-def upload_to_r2(file_path: Path, job_id: str, r2_config: dict, content_type: str = "audio/mpeg") -> tuple[Optional[str], Optional[str]]:
-    """Upload audio to Cloudflare R2 and return (presigned_url, object_key)."""
-    try:
+# R2 clients are reused across jobs on a warm worker. Files above 16MB are
+# sent as 16MB parts, 8 at a time.
+_r2_clients = {}
+R2_MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+R2_MAX_CONCURRENCY = 8
+
+
+def get_r2_client(r2_config: dict):
+    """Return a boto3 S3 client for R2, cached per account."""
+    cache_key = (r2_config["endpoint_url"], r2_config["access_key_id"], r2_config["secret_access_key"])
+    client = _r2_clients.get(cache_key)
+    if client is None:
         import boto3
         from botocore.config import Config
 
-        log("Uploading to R2...")
-
         client = boto3.client(
             "s3",
             endpoint_url=r2_config["endpoint_url"],
             aws_access_key_id=r2_config["access_key_id"],
             aws_secret_access_key=r2_config["secret_access_key"],
-            config=Config(signature_version="s3v4"),
+            config=Config(
+                signature_version="s3v4",
+                max_pool_connections=R2_MAX_CONCURRENCY * 2,
+                retries={"max_attempts": 5, "mode": "adaptive"},
+            ),
         )
+        _r2_clients[cache_key] = client
+    return client
+
+
+def r2_transfer_config():
+    """Multipart settings for large R2 uploads."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=R2_MULTIPART_CHUNKSIZE,
+        multipart_chunksize=R2_MULTIPART_CHUNKSIZE,
+        max_concurrency=R2_MAX_CONCURRENCY,
+    )
+
+
+def upload_to_r2(file_path: Path, job_id: str, r2_config: dict, content_type: str = "audio/mpeg") -> tuple[Optional[str], Optional[str]]:
+    """Upload audio to Cloudflare R2 and return (presigned_url, object_key)."""
+    try:
+
+        log("Uploading to R2...")
+
+        client = get_r2_client(r2_config)
 
         ext = file_path.suffix
         object_key = f"qwen3-tts/results/{job_id}_{uuid.uuid4().hex[:8]}{ext}"
 
+        upload_start = time.time()
         client.upload_file(
             str(file_path),
             r2_config["bucket_name"],
             object_key,
             ExtraArgs={"ContentType": content_type},
+            Config=r2_transfer_config(),
         )
+        upload_seconds = time.time() - upload_start
 
         presigned_url = client.generate_presigned_url(
             "get_object",
@@ -260,7 +296,9 @@ def upload_to_r2(file_path: Path, job_id: str, r2_config: dict, content_type: st
             ExpiresIn=7200,
         )
 
-        log(f"  R2 upload complete: {object_key}")
+        size_mb = Path(file_path).stat().st_size / (1024 * 1024)
+        log(f"  R2 upload complete: {object_key} ({size_mb:.1f}MB in {upload_seconds:.1f}s, "
+            f"{size_mb / max(upload_seconds, 1e-6):.1f} MB/s)")
         return presigned_url, object_key
     except Exception as e:
         log(f"Error uploading to R2: {e}")
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 """
-RunPod serverless handler for Real-ESRGAN image upscaling.
+RunPod serverless handler for Real-ESRGAN image and video upscaling.
 
 Supports:
 - upscale: Upscale images using Real-ESRGAN models
+- upscale_video: Upscale every frame of a video, keeping its audio
 
 Input format:
 {
@@ -12,7 +13,8 @@ Input format:
     "scale": 4,              # 2 or 4 (default: 4)
     "model": "general",      # general, anime, or photo (default: general)
     "face_enhance": false,   # Use GFPGAN for face enhancement (default: false)
-    "output_format": "png"   # png, jpg, webp (default: png)
+    "output_format": "png",  # png, jpg, webp (default: png)
+    "tile": 512              # Optional tile size in input pixels, 0 = whole image (default: auto)
 }
 
 Output format:
@@ -22,15 +24,45 @@ Output format:
     "input_dimensions": "800x600",
     "output_dimensions": "3200x2400",
     "model_used": "RealESRGAN_x4plus",
+    "tile_size": 0,          # Tile used (0 = whole image), after any OOM retries
     "processing_time_seconds": 2.5
 }
+
+Tiling: unless "tile" is given, the tile size is picked from free VRAM and the
+input size (the whole image if it fits). A tile that runs out of GPU memory is
+retried at the next smaller size within the same job, and later jobs with that
+model start from the size that worked.
+
+Several images in one job: pass "images" (a list of URLs, or of
+{"image_url", "name"}) instead of "image_url"; the other options apply to all.
+The output then has "results", one entry per image in input order with its
+own "success" or "error", plus "succeeded" and "failed" counts.
+
+Video input (operation "upscale_video"):
+{
+    "operation": "upscale_video",
+    "video_url": "https://...",
+    "scale": 4, "model": "general", "face_enhance": false, "tile": null,
+    "output_size": [1920, 1080],  # Optional exact output size (lanczos after upscaling)
+    "crf": 18                     # x264 quality (default: 18)
+}
+
+Frames are decoded by ffmpeg into a pipe, upscaled in batches on the GPU and
+piped straight into an x264 encoder, so no frames are written to disk. Audio
+is copied from the source (re-encoded to AAC if MP4 can't hold it). The
+result is an MP4 with "frames", "fps", "frame_batch_size" and "audio" added.
 """
 
+import json
 import os
+import queue
 import shutil
+import subprocess
 import sys
 import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
@@ -52,6 +84,53 @@ MODEL_PATHS = {
 # Cached upscaler instances
 _upscalers = {}
 
+# Tiling. Estimated VRAM per input pixel of a tile (RRDBNet x4, fp16, incl.
+# activations), plus the 4x fp16 output canvas RealESRGANer keeps on the GPU.
+TILE_SIZES = (1024, 768, 512, 384, 256, 192, 128)
+TILE_PAD = 10
+TILE_BYTES_PER_PIXEL = 12 * 1024
+OUTPUT_BYTES_PER_PIXEL = 4 * 4 * 3 * 2
+FACE_ENHANCE_RESERVE_GB = 1.5
+
+# Largest tile known to fit, per upscaler, lowered after an OOM
+_tile_ceilings = {}
+
+# Multi-image jobs: most images per job, and parallel downloads/uploads
+MAX_BATCH_IMAGES = 64
+BATCH_IO_WORKERS = 8
+
+# Video: whole frames per forward pass, and x264 settings
+MAX_FRAME_BATCH = 8
+VIDEO_CRF = 18
+VIDEO_PRESET = "medium"
+# Audio codecs MP4 holds as-is; anything else is re-encoded to AAC
+MP4_AUDIO_CODECS = {"aac", "mp3", "ac3", "eac3", "alac", "opus", "flac"}
+
+
+class TileOutOfMemory(Exception):
+    """CUDA OOM in the upscaler's forward pass.
+
+    RealESRGANer catches RuntimeError around each tile (and CUDA OOM is one),
+    then carries on with the previous tile's output. Raising a non-RuntimeError
+    lets the OOM reach handle_upscale so it can retry at a smaller tile.
+    """
+
+
+class OutOfMemoryGuard:
+    """Wraps the upscaler's network so CUDA OOM raises TileOutOfMemory."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(self, *args, **kwargs):
+        try:
+            return self.model(*args, **kwargs)
+        except torch.cuda.OutOfMemoryError as e:
+            raise TileOutOfMemory(str(e)) from e
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
 
 def log(message: str) -> None:
     """Log message to stderr (visible in RunPod logs)."""
@@ -93,12 +172,13 @@ def get_upscaler(model: str = "general", scale: int = 4, face_enhance: bool = Fa
         model_path=model_path,
         dni_weight=None,
         model=net,
-        tile=0,  # 0 = no tiling
-        tile_pad=10,
+        tile=0,  # Set per image by upscale_image()
+        tile_pad=TILE_PAD,
         pre_pad=0,
         half=True,  # Use fp16 for speed
         gpu_id=0,
     )
+    upscaler.model = OutOfMemoryGuard(upscaler.model)
 
     # Add face enhancement if requested
     if face_enhance:
@@ -117,6 +197,335 @@ def get_upscaler(model: str = "general", scale: int = 4, face_enhance: bool = Fa
     return upscaler
 
 
+def choose_tile_size(width: int, height: int, cache_key: str, face_enhance: bool = False) -> int:
+    """Pick a tile size (0 = whole image) that fits the free VRAM."""
+    try:
+        free_bytes, _ = torch.cuda.mem_get_info()
+    except Exception:
+        return 512
+
+    budget = free_bytes * 0.8 - (FACE_ENHANCE_RESERVE_GB * 1024 ** 3 if face_enhance else 0)
+    budget -= width * height * OUTPUT_BYTES_PER_PIXEL
+    ceiling = _tile_ceilings.get(cache_key)
+
+    if ceiling is None and (width + 2 * TILE_PAD) * (height + 2 * TILE_PAD) * TILE_BYTES_PER_PIXEL <= budget:
+        return 0
+    for tile in TILE_SIZES:
+        if ceiling is not None and tile > ceiling:
+            continue
+        if tile < max(width, height) and (tile + 2 * TILE_PAD) ** 2 * TILE_BYTES_PER_PIXEL <= budget:
+            return tile
+    return TILE_SIZES[-1]
+
+
+def smaller_tile_size(tile: int, width: int, height: int) -> Optional[int]:
+    """Next tile size to try after an OOM, or None if already at the smallest."""
+    limit = max(width, height) if tile == 0 else tile
+    return next((t for t in TILE_SIZES if t < limit), None)
+
+
+def upscale_image(
+    img: np.ndarray,
+    model: str = "general",
+    scale: int = 4,
+    face_enhance: bool = False,
+    tile: Optional[int] = None,
+) -> tuple[np.ndarray, int]:
+    """Upscale one image on the cached upscaler, retrying smaller tiles on OOM.
+
+    tile=None picks the tile size from free VRAM. Returns (output, tile used).
+    """
+    upscaler = get_upscaler(model=model, scale=scale, face_enhance=face_enhance)
+    cache_key = f"{model}_{scale}_{face_enhance}"
+    # GFPGANer tiles through its background upsampler
+    realesrganer = upscaler.bg_upsampler if face_enhance else upscaler
+
+    height, width = img.shape[:2]
+    if tile is None:
+        tile = choose_tile_size(width, height, cache_key, face_enhance)
+
+    while True:
+        realesrganer.tile_size = tile
+        try:
+            if face_enhance:
+                # GFPGAN returns (cropped_faces, restored_faces, restored_img)
+                _, _, output = upscaler.enhance(
+                    img,
+                    has_aligned=False,
+                    only_center_face=False,
+                    paste_back=True
+                )
+            else:
+                output, _ = upscaler.enhance(img, outscale=scale)
+            return output, tile
+        except (TileOutOfMemory, torch.cuda.OutOfMemoryError):
+            torch.cuda.empty_cache()
+            smaller = smaller_tile_size(tile, width, height)
+            if smaller is None:
+                raise
+            log(f"  Out of GPU memory at tile {tile or 'none'}, retrying with tile {smaller}")
+            _tile_ceilings[cache_key] = smaller
+            tile = smaller
+
+
+def frame_batch_size(width: int, height: int, face_enhance: bool = False) -> int:
+    """Whole frames of this size that fit in one forward pass (0 = needs tiling)."""
+    if face_enhance:
+        # GFPGANer works one image at a time
+        return 0
+    try:
+        free_bytes, _ = torch.cuda.mem_get_info()
+    except Exception:
+        return 1
+    per_frame = width * height * (TILE_BYTES_PER_PIXEL + OUTPUT_BYTES_PER_PIXEL)
+    return max(0, min(MAX_FRAME_BATCH, int(free_bytes * 0.8 // per_frame)))
+
+
+def upscale_batch(upscaler, frames: list[np.ndarray], scale: int) -> list[np.ndarray]:
+    """Upscale same-sized BGR frames in one forward pass of a RealESRGANer's network."""
+    batch = np.ascontiguousarray(np.stack(frames)[..., ::-1])  # BGR -> RGB
+    tensor = torch.from_numpy(batch).permute(0, 3, 1, 2).to(upscaler.device).float().div_(255)
+    if upscaler.half:
+        tensor = tensor.half()
+
+    with torch.no_grad():
+        output = upscaler.model(tensor)
+    output = output.float().clamp_(0, 1).mul_(255).round_().byte().permute(0, 2, 3, 1).cpu().numpy()
+    output = [np.ascontiguousarray(frame[..., ::-1]) for frame in output]  # RGB -> BGR
+
+    if scale != upscaler.scale:
+        height, width = frames[0].shape[:2]
+        output = [
+            cv2.resize(frame, (width * scale, height * scale), interpolation=cv2.INTER_LANCZOS4)
+            for frame in output
+        ]
+    return output
+
+
+def upscale_frames(
+    frames: list[np.ndarray],
+    model: str,
+    scale: int,
+    face_enhance: bool,
+    batch_size: int,
+    tile: Optional[int],
+) -> tuple[list[np.ndarray], int, Optional[int]]:
+    """Upscale video frames, batched when batch_size > 0, else one by one (tiled).
+
+    A batch that runs out of GPU memory is halved and retried, down to single
+    tiled frames. Returns (outputs, batch_size, tile) to carry into the next call.
+    """
+    outputs = []
+    upscaler = get_upscaler(model=model, scale=scale, face_enhance=face_enhance)
+    while len(outputs) < len(frames) and batch_size > 0:
+        chunk = frames[len(outputs):len(outputs) + batch_size]
+        try:
+            outputs.extend(upscale_batch(upscaler, chunk, scale))
+        except (TileOutOfMemory, torch.cuda.OutOfMemoryError):
+            torch.cuda.empty_cache()
+            batch_size //= 2
+            log(f"  Out of GPU memory, {'batch size ' + str(batch_size) if batch_size else 'tiling frames'}")
+
+    for frame in frames[len(outputs):]:
+        output, tile = upscale_image(frame, model, scale, face_enhance, tile)
+        outputs.append(output)
+    return outputs, batch_size, tile
+
+
+def probe_video(video_path: str) -> dict:
+    """Size, frame rate, frame count and audio codec of a video, via ffprobe."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_streams", "-of", "json", video_path],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr.strip()[:500]}")
+
+    streams = json.loads(result.stdout).get("streams", [])
+    video = next((st for st in streams if st.get("codec_type") == "video"
+                  and not st.get("disposition", {}).get("attached_pic")), None)
+    if video is None:
+        raise RuntimeError("No video stream found")
+    audio = next((st for st in streams if st.get("codec_type") == "audio"), None)
+
+    fps = video.get("avg_frame_rate")
+    if not fps or fps.startswith("0"):
+        fps = video.get("r_frame_rate", "30")
+    return {
+        "width": int(video["width"]),
+        "height": int(video["height"]),
+        "fps": fps,
+        "frames": int(video["nb_frames"]) if str(video.get("nb_frames", "")).isdigit() else None,
+        "audio_codec": audio.get("codec_name") if audio else None,
+    }
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put unless the pipeline was stopped; False if it was."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Next item, or None once the pipeline was stopped."""
+    while True:
+        try:
+            return q.get(timeout=1)
+        except queue.Empty:
+            if stop.is_set():
+                return None
+
+
+def upscale_video_stream(
+    input_path: str,
+    output_path: str,
+    info: dict,
+    model: str,
+    scale: int,
+    face_enhance: bool,
+    tile: Optional[int],
+    crf: int,
+    output_size: Optional[tuple[int, int]],
+) -> dict:
+    """Decode -> upscale -> encode a video through pipes. Returns frame stats.
+
+    Decoding and encoding run in their own threads (ffmpeg does the work in
+    its own processes), so they overlap with inference on the GPU.
+    """
+    width, height = info["width"], info["height"]
+    frame_bytes = width * height * 3
+
+    if tile:
+        batch_size = 0
+    else:
+        batch_size = frame_batch_size(width, height, face_enhance)
+    log(f"  Frame batch: {batch_size or 'none (tiled)'}")
+
+    encode_cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "rawvideo", "-pix_fmt", "bgr24",
+        "-s", f"{width * scale}x{height * scale}", "-r", info["fps"],
+        "-i", "-",
+        "-i", input_path,
+        "-map", "0:v:0", "-map", "1:a:0?",
+    ]
+    if output_size:
+        encode_cmd += ["-vf", f"scale={output_size[0]}:{output_size[1]}:flags=lanczos"]
+    encode_cmd += [
+        "-c:v", "libx264", "-preset", VIDEO_PRESET, "-crf", str(crf), "-pix_fmt", "yuv420p",
+    ]
+    if info["audio_codec"] in MP4_AUDIO_CODECS:
+        encode_cmd += ["-c:a", "copy"]
+    else:
+        encode_cmd += ["-c:a", "aac", "-b:a", "192k"]
+    encode_cmd += ["-movflags", "+faststart", "-shortest", output_path]
+
+    decoder = subprocess.Popen(
+        ["ffmpeg", "-v", "error", "-i", input_path, "-f", "rawvideo", "-pix_fmt", "bgr24", "-"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    encoder = subprocess.Popen(encode_cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    stop = threading.Event()
+    decoded = queue.Queue(maxsize=MAX_FRAME_BATCH * 2)
+    upscaled = queue.Queue(maxsize=MAX_FRAME_BATCH * 2)
+    errors = []
+
+    def read_frames():
+        try:
+            while True:
+                data = decoder.stdout.read(frame_bytes)
+                if len(data) < frame_bytes:
+                    break
+                frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+                if not _put(decoded, frame, stop):
+                    return
+        finally:
+            _put(decoded, None, stop)
+
+    def write_frames():
+        try:
+            while True:
+                frame = _get(upscaled, stop)
+                if frame is None:
+                    break
+                encoder.stdin.write(frame.tobytes())
+        except (BrokenPipeError, OSError) as e:
+            errors.append(f"Encoder stopped: {e}")
+            stop.set()
+        finally:
+            try:
+                encoder.stdin.close()
+            except OSError:
+                pass
+
+    reader = threading.Thread(target=read_frames, daemon=True)
+    writer = threading.Thread(target=write_frames, daemon=True)
+    reader.start()
+    writer.start()
+
+    frames_done = 0
+    inference_seconds = 0.0
+    try:
+        finished = False
+        while not finished and not stop.is_set():
+            # Fill a batch (short at the end of the video)
+            batch = [_get(decoded, stop)]
+            while batch[-1] is not None and len(batch) < max(1, batch_size):
+                batch.append(_get(decoded, stop))
+            if batch[-1] is None:
+                finished = True
+                batch.pop()
+            if not batch:
+                break
+
+            inference_start = time.time()
+            outputs, batch_size, tile = upscale_frames(batch, model, scale, face_enhance, batch_size, tile)
+            inference_seconds += time.time() - inference_start
+
+            for output in outputs:
+                if not _put(upscaled, output, stop):
+                    break
+            frames_done += len(batch)
+            if frames_done % 100 < len(batch):
+                total = f"/{info['frames']}" if info["frames"] else ""
+                log(f"  Frames: {frames_done}{total} ({frames_done / max(inference_seconds, 1e-6):.1f} fps)")
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        if not stop.is_set():
+            _put(upscaled, None, stop)
+        writer.join()
+        stop.set()
+        decoder.kill()
+        decoder.wait()
+        reader.join(timeout=5)
+        encoder_stderr = encoder.stderr.read().decode(errors="replace")
+        encoder.wait()
+
+    if errors or encoder.returncode != 0:
+        raise RuntimeError(f"Encoding failed: {(encoder_stderr or '; '.join(errors)).strip()[:500]}")
+    if frames_done == 0:
+        raise RuntimeError("No frames decoded from video")
+
+    return {
+        "frames": frames_done,
+        "frame_batch_size": batch_size,
+        "tile_size": tile,
+        "inference_time_seconds": round(inference_seconds, 2),
+        "frames_per_second": round(frames_done / max(inference_seconds, 1e-6), 2),
+    }
+
+
 def download_file(url: str, output_path: str, description: str = "file") -> bool:
     """Download file from URL with progress logging."""
     try:
@@ -139,22 +548,55 @@ def download_file(url: str, output_path: str, description: str = "file") -> bool
         return False
 
 
-def upload_to_r2(file_path: str, job_id: str, r2_config: dict, extension: str = "png") -> tuple[Optional[str], Optional[str]]:
-    """Upload file to Cloudflare R2 and return (presigned_url, object_key)."""
-    try:
+# R2 clients are reused across jobs on a warm worker. Files above 16MB are
+# sent as 16MB parts, 8 at a time.
+_r2_clients = {}
+R2_MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+R2_MAX_CONCURRENCY = 8
+
+
+def get_r2_client(r2_config: dict):
+    """Return a boto3 S3 client for R2, cached per account."""
+    cache_key = (r2_config["endpoint_url"], r2_config["access_key_id"], r2_config["secret_access_key"])
+    client = _r2_clients.get(cache_key)
+    if client is None:
         import boto3
         from botocore.config import Config
-        import uuid
-
-        log(f"Uploading result to R2 ({Path(file_path).stat().st_size // 1024}KB)...")
 
         client = boto3.client(
             "s3",
             endpoint_url=r2_config["endpoint_url"],
             aws_access_key_id=r2_config["access_key_id"],
             aws_secret_access_key=r2_config["secret_access_key"],
-            config=Config(signature_version="s3v4"),
+            config=Config(
+                signature_version="s3v4",
+                max_pool_connections=R2_MAX_CONCURRENCY * 2,
+                retries={"max_attempts": 5, "mode": "adaptive"},
+            ),
         )
+        _r2_clients[cache_key] = client
+    return client
+
+
+def r2_transfer_config():
+    """Multipart settings for large R2 uploads."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=R2_MULTIPART_CHUNKSIZE,
+        multipart_chunksize=R2_MULTIPART_CHUNKSIZE,
+        max_concurrency=R2_MAX_CONCURRENCY,
+    )
+
+
+def upload_to_r2(file_path: str, job_id: str, r2_config: dict, extension: str = "png") -> tuple[Optional[str], Optional[str]]:
+    """Upload file to Cloudflare R2 and return (presigned_url, object_key)."""
+    try:
+        import uuid
+
+        log(f"Uploading result to R2 ({Path(file_path).stat().st_size // 1024}KB)...")
+
+        client = get_r2_client(r2_config)
 
         object_key = f"upscale/results/{job_id}_{uuid.uuid4().hex[:8]}.{extension}"
 
@@ -164,15 +606,19 @@ def upload_to_r2(file_path: str, job_id: str, r2_config: dict, extension: str =
             "jpg": "image/jpeg",
             "jpeg": "image/jpeg",
             "webp": "image/webp",
+            "mp4": "video/mp4",
         }
         content_type = content_types.get(extension.lower(), "application/octet-stream")
 
+        upload_start = time.time()
         client.upload_file(
             file_path,
             r2_config["bucket_name"],
             object_key,
-            ExtraArgs={"ContentType": content_type}
+            ExtraArgs={"ContentType": content_type},
+            Config=r2_transfer_config(),
         )
+        upload_seconds = time.time() - upload_start
 
         # Generate presigned URL (valid for 2 hours)
         presigned_url = client.generate_presigned_url(
@@ -181,7 +627,9 @@ def upload_to_r2(file_path: str, job_id: str, r2_config: dict, extension: str =
             ExpiresIn=7200,
         )
 
-        log(f"  R2 upload complete: {object_key}")
+        size_mb = Path(file_path).stat().st_size / (1024 * 1024)
+        log(f"  R2 upload complete: {object_key} ({size_mb:.1f}MB in {upload_seconds:.1f}s, "
+            f"{size_mb / max(upload_seconds, 1e-6):.1f} MB/s)")
         return presigned_url, object_key
     except ImportError:
         log("Error: boto3 not available for R2 upload")
@@ -216,6 +664,92 @@ def upload_file(file_path: str, job_id: str, r2_config: Optional[dict] = None, e
         return {}
 
 
+def upscale_file(
+    input_path: str,
+    output_path: str,
+    model: str,
+    scale: int,
+    face_enhance: bool,
+    output_format: str,
+    tile: Optional[int] = None,
+) -> dict:
+    """Read an image, upscale it and write the result. Returns its stats, or {"error": ...}."""
+    # Read image
+    try:
+        img = cv2.imread(input_path, cv2.IMREAD_UNCHANGED)
+        if img is None:
+            return {"error": "Failed to read image file"}
+
+        input_height, input_width = img.shape[:2]
+        log(f"Input image: {input_width}x{input_height}")
+    except Exception as e:
+        return {"error": f"Failed to read image: {e}"}
+
+    # Upscale
+    try:
+        log("Upscaling...")
+        inference_start = time.time()
+
+        output, tile = upscale_image(img, model, scale, face_enhance, tile)
+
+        inference_time = time.time() - inference_start
+        log(f"  Inference time: {inference_time:.2f}s (tile: {tile or 'none'})")
+
+        output_height, output_width = output.shape[:2]
+        log(f"Output image: {output_width}x{output_height}")
+
+    except (TileOutOfMemory, torch.cuda.OutOfMemoryError):
+        return {"error": f"Upscale failed: out of GPU memory even at tile {TILE_SIZES[-1]}"}
+    except Exception as e:
+        import traceback
+        log(f"Upscale error: {e}")
+        log(traceback.format_exc())
+        return {"error": f"Upscale failed: {e}"}
+
+    # Save output
+    try:
+        if output_format in ["jpg", "jpeg"]:
+            cv2.imwrite(output_path, output, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        elif output_format == "webp":
+            cv2.imwrite(output_path, output, [cv2.IMWRITE_WEBP_QUALITY, 95])
+        else:  # png
+            cv2.imwrite(output_path, output, [cv2.IMWRITE_PNG_COMPRESSION, 6])
+
+        log(f"Saved output: {Path(output_path).stat().st_size // 1024}KB")
+    except Exception as e:
+        return {"error": f"Failed to save output: {e}"}
+
+    return {
+        "input_dimensions": f"{input_width}x{input_height}",
+        "output_dimensions": f"{output_width}x{output_height}",
+        "tile_size": tile,
+        "inference_time_seconds": round(inference_time, 2),
+    }
+
+
+def validate_upscale_options(scale: int, model: str, output_format: str, tile: Optional[int]) -> Optional[str]:
+    """Error message for invalid upscale options, or None."""
+    if scale not in [2, 4]:
+        return f"Invalid scale: {scale}. Must be 2 or 4"
+
+    if model not in MODEL_PATHS:
+        return f"Invalid model: {model}. Must be one of: {list(MODEL_PATHS.keys())}"
+
+    if output_format not in ["png", "jpg", "jpeg", "webp"]:
+        return f"Invalid output_format: {output_format}. Must be png, jpg, or webp"
+
+    if tile is not None and (not isinstance(tile, int) or tile < 0):
+        return f"Invalid tile: {tile}. Must be a non-negative integer"
+
+    return None
+
+
+def input_path_for(url: str, work_dir: Path, stem: str = "input") -> str:
+    """Local path for a downloaded input, keeping the URL's extension."""
+    url_path = url.split("?")[0]  # Remove query params
+    return str(work_dir / f"{stem}{Path(url_path).suffix.lower() or '.png'}")
+
+
 def handle_upscale(job_input: dict, job_id: str, work_dir: Path) -> dict:
     """
     Handle upscale operation using Real-ESRGAN.
@@ -228,6 +762,7 @@ def handle_upscale(job_input: dict, job_id: str, work_dir: Path) -> dict:
         model: general, anime, or photo (default: general)
         face_enhance: Use GFPGAN for face enhancement (default: false)
         output_format: png, jpg, webp (default: png)
+        tile: Tile size in input pixels, 0 = whole image (default: picked from free VRAM)
         r2: R2 config for result upload
     """
     start_time = time.time()
@@ -238,114 +773,262 @@ def handle_upscale(job_input: dict, job_id: str, work_dir: Path) -> dict:
     model = job_input.get("model", "general")
     face_enhance = job_input.get("face_enhance", False)
     output_format = job_input.get("output_format", "png").lower()
+    tile = job_input.get("tile")
     r2_config = job_input.get("r2")
 
     if not image_url:
         return {"error": "Missing required 'image_url' in input"}
 
-    if scale not in [2, 4]:
-        return {"error": f"Invalid scale: {scale}. Must be 2 or 4"}
-
-    if model not in MODEL_PATHS:
-        return {"error": f"Invalid model: {model}. Must be one of: {list(MODEL_PATHS.keys())}"}
-
-    if output_format not in ["png", "jpg", "jpeg", "webp"]:
-        return {"error": f"Invalid output_format: {output_format}. Must be png, jpg, or webp"}
+    error = validate_upscale_options(scale, model, output_format, tile)
+    if error:
+        return {"error": error}
 
     log(f"Processing options: scale={scale}, model={model}, face_enhance={face_enhance}, format={output_format}")
 
     # Download image
-    # Determine input extension from URL
-    url_path = image_url.split("?")[0]  # Remove query params
-    input_ext = Path(url_path).suffix.lower() or ".png"
-    input_path = str(work_dir / f"input{input_ext}")
-
+    input_path = input_path_for(image_url, work_dir)
     if not download_file(image_url, input_path, "image"):
         return {"error": "Failed to download image from URL"}
 
-    # Read image
-    try:
-        img = cv2.imread(input_path, cv2.IMREAD_UNCHANGED)
-        if img is None:
-            return {"error": "Failed to read image file"}
-
-        input_height, input_width = img.shape[:2]
-        log(f"Input image: {input_width}x{input_height}")
-    except Exception as e:
-        return {"error": f"Failed to read image: {e}"}
-
     # Get upscaler
     try:
-        upscaler = get_upscaler(model=model, scale=scale, face_enhance=face_enhance)
+        get_upscaler(model=model, scale=scale, face_enhance=face_enhance)
     except Exception as e:
         return {"error": f"Failed to load model: {e}"}
 
-    # Upscale
-    try:
-        log("Upscaling...")
-        inference_start = time.time()
+    output_ext = "jpg" if output_format == "jpeg" else output_format
+    output_path = str(work_dir / f"output.{output_ext}")
+    stats = upscale_file(input_path, output_path, model, scale, face_enhance, output_format, tile)
+    if stats.get("error"):
+        return stats
 
-        if face_enhance:
-            # GFPGAN returns (cropped_faces, restored_faces, restored_img)
-            _, _, output = upscaler.enhance(
-                img,
-                has_aligned=False,
-                only_center_face=False,
-                paste_back=True
-            )
-        else:
-            output, _ = upscaler.enhance(img, outscale=scale)
+    # Upload result
+    upload_result = upload_file(output_path, job_id, r2_config, output_ext)
 
-        inference_time = time.time() - inference_start
-        log(f"  Inference time: {inference_time:.2f}s")
+    if not upload_result.get("output_url"):
+        return {"error": "Failed to upload result image"}
 
-        output_height, output_width = output.shape[:2]
-        log(f"Output image: {output_width}x{output_height}")
+    elapsed = time.time() - start_time
 
+    result = {
+        "success": True,
+        "output_url": upload_result["output_url"],
+        "input_dimensions": stats["input_dimensions"],
+        "output_dimensions": stats["output_dimensions"],
+        "scale": scale,
+        "model_used": model,
+        "face_enhance": face_enhance,
+        "output_format": output_format,
+        "tile_size": stats["tile_size"],
+        "inference_time_seconds": stats["inference_time_seconds"],
+        "processing_time_seconds": round(elapsed, 2),
+    }
+
+    # Include R2 key if result was uploaded to R2
+    if upload_result.get("r2_key"):
+        result["r2_key"] = upload_result["r2_key"]
+
+    return result
+
+
+def handle_upscale_batch(job_input: dict, job_id: str, work_dir: Path) -> dict:
+    """
+    Handle upscale of several images in one job.
+
+    Required inputs:
+        images: List of image URLs, or of {"image_url": ..., "name": ...}
+
+    Optional inputs: as for upscale, applied to every image.
+
+    Downloads run in parallel, images are upscaled back to back on the cached
+    model, and each result is uploaded in the background while the next image
+    is upscaled. Returns per-image results in input order; one image failing
+    doesn't fail the others.
+    """
+    start_time = time.time()
+
+    images = job_input.get("images")
+    scale = job_input.get("scale", 4)
+    model = job_input.get("model", "general")
+    face_enhance = job_input.get("face_enhance", False)
+    output_format = job_input.get("output_format", "png").lower()
+    tile = job_input.get("tile")
+    r2_config = job_input.get("r2")
+
+    if not isinstance(images, list) or not images:
+        return {"error": "'images' must be a non-empty list"}
+
+    if len(images) > MAX_BATCH_IMAGES:
+        return {"error": f"Too many images: {len(images)}. At most {MAX_BATCH_IMAGES} per job"}
+
+    items = [image if isinstance(image, dict) else {"image_url": image} for image in images]
+    if not all(isinstance(item.get("image_url"), str) and item["image_url"] for item in items):
+        return {"error": "Every entry in 'images' needs an image_url"}
+
+    error = validate_upscale_options(scale, model, output_format, tile)
+    if error:
+        return {"error": error}
+
+    log(f"Processing {len(items)} images: scale={scale}, model={model}, "
+        f"face_enhance={face_enhance}, format={output_format}")
+
+    try:
+        get_upscaler(model=model, scale=scale, face_enhance=face_enhance)
     except Exception as e:
-        import traceback
-        log(f"Upscale error: {e}")
-        log(traceback.format_exc())
-        return {"error": f"Upscale failed: {e}"}
+        return {"error": f"Failed to load model: {e}"}
 
-    # Save output
     output_ext = "jpg" if output_format == "jpeg" else output_format
-    output_path = str(work_dir / f"output.{output_ext}")
+    results = [{"index": index, "name": item.get("name")} for index, item in enumerate(items)]
+
+    def upload(index: int, output_path: str) -> dict:
+        upload_result = upload_file(output_path, f"{job_id}_{index}", r2_config, output_ext)
+        if not upload_result.get("output_url"):
+            return {"error": "Failed to upload result image"}
+        return upload_result
+
+    with ThreadPoolExecutor(max_workers=BATCH_IO_WORKERS) as pool:
+        input_paths = [input_path_for(item["image_url"], work_dir, f"input_{index}") for index, item in enumerate(items)]
+        downloads = [
+            pool.submit(download_file, item["image_url"], path, f"image {index}")
+            for index, (item, path) in enumerate(zip(items, input_paths))
+        ]
+
+        uploads = {}
+        for index, (download, input_path) in enumerate(zip(downloads, input_paths)):
+            if not download.result():
+                results[index]["error"] = "Failed to download image from URL"
+                continue
+
+            output_path = str(work_dir / f"output_{index}.{output_ext}")
+            stats = upscale_file(input_path, output_path, model, scale, face_enhance, output_format, tile)
+            results[index].update(stats)
+            if stats.get("error"):
+                continue
+            uploads[index] = pool.submit(upload, index, output_path)
+
+        for index, future in uploads.items():
+            results[index].update(future.result())
+            if not results[index].get("error"):
+                results[index]["success"] = True
+
+    failed = sum(1 for result in results if result.get("error"))
+    log(f"Batch done: {len(results) - failed}/{len(results)} images succeeded")
+
+    return {
+        "success": True,
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "scale": scale,
+        "model_used": model,
+        "face_enhance": face_enhance,
+        "output_format": output_format,
+        "processing_time_seconds": round(time.time() - start_time, 2),
+    }
+
+
+def handle_upscale_video(job_input: dict, job_id: str, work_dir: Path) -> dict:
+    """
+    Handle video upscale: every frame through Real-ESRGAN, audio copied.
+
+    Required inputs:
+        video_url: URL to video file
+
+    Optional inputs:
+        scale, model, face_enhance, tile: As for upscale
+        output_size: [width, height] to scale the upscaled frames to (lanczos)
+        crf: x264 CRF (default: 18)
+        r2: R2 config for result upload
+    """
+    start_time = time.time()
+
+    video_url = job_input.get("video_url")
+    scale = job_input.get("scale", 4)
+    model = job_input.get("model", "general")
+    face_enhance = job_input.get("face_enhance", False)
+    tile = job_input.get("tile")
+    output_size = job_input.get("output_size")
+    crf = job_input.get("crf", VIDEO_CRF)
+    r2_config = job_input.get("r2")
+
+    if not video_url:
+        return {"error": "Missing required 'video_url' in input"}
+
+    if scale not in [2, 4]:
+        return {"error": f"Invalid scale: {scale}. Must be 2 or 4"}
+
+    if model not in MODEL_PATHS:
+        return {"error": f"Invalid model: {model}. Must be one of: {list(MODEL_PATHS.keys())}"}
+
+    if tile is not None and (not isinstance(tile, int) or tile < 0):
+        return {"error": f"Invalid tile: {tile}. Must be a non-negative integer"}
+
+    if not isinstance(crf, int) or not 0 <= crf <= 51:
+        return {"error": f"Invalid crf: {crf}. Must be 0-51"}
+
+    if output_size is not None:
+        if (not isinstance(output_size, (list, tuple)) or len(output_size) != 2
+                or not all(isinstance(v, int) and v > 0 for v in output_size)):
+            return {"error": f"Invalid output_size: {output_size}. Must be [width, height]"}
+        # yuv420p needs even dimensions
+        output_size = (output_size[0] - output_size[0] % 2, output_size[1] - output_size[1] % 2)
+
+    log(f"Processing options: scale={scale}, model={model}, face_enhance={face_enhance}, crf={crf}")
+
+    url_path = video_url.split("?")[0]
+    input_path = str(work_dir / f"input{Path(url_path).suffix.lower() or '.mp4'}")
+    if not download_file(video_url, input_path, "video"):
+        return {"error": "Failed to download video from URL"}
 
     try:
-        if output_format in ["jpg", "jpeg"]:
-            cv2.imwrite(output_path, output, [cv2.IMWRITE_JPEG_QUALITY, 95])
-        elif output_format == "webp":
-            cv2.imwrite(output_path, output, [cv2.IMWRITE_WEBP_QUALITY, 95])
-        else:  # png
-            cv2.imwrite(output_path, output, [cv2.IMWRITE_PNG_COMPRESSION, 6])
+        info = probe_video(input_path)
+    except Exception as e:
+        return {"error": f"Failed to read video: {e}"}
+    log(f"Input video: {info['width']}x{info['height']} @ {info['fps']} fps, "
+        f"{info['frames'] or '?'} frames, audio: {info['audio_codec'] or 'none'}")
 
-        log(f"Saved output: {Path(output_path).stat().st_size // 1024}KB")
+    try:
+        get_upscaler(model=model, scale=scale, face_enhance=face_enhance)
     except Exception as e:
-        return {"error": f"Failed to save output: {e}"}
+        return {"error": f"Failed to load model: {e}"}
 
-    # Upload result
-    upload_result = upload_file(output_path, job_id, r2_config, output_ext)
+    output_path = str(work_dir / "output.mp4")
+    try:
+        log("Upscaling frames...")
+        stats = upscale_video_stream(
+            input_path, output_path, info, model, scale, face_enhance, tile, crf, output_size,
+        )
+        log(f"  {stats['frames']} frames in {stats['inference_time_seconds']:.1f}s "
+            f"({stats['frames_per_second']:.1f} fps)")
+    except (TileOutOfMemory, torch.cuda.OutOfMemoryError):
+        return {"error": f"Upscale failed: out of GPU memory even at tile {TILE_SIZES[-1]}"}
+    except Exception as e:
+        import traceback
+        log(f"Upscale error: {e}")
+        log(traceback.format_exc())
+        return {"error": f"Upscale failed: {e}"}
 
-    if not upload_result.get("output_url"):
-        return {"error": "Failed to upload result image"}
+    log(f"Saved output: {Path(output_path).stat().st_size // (1024 * 1024)}MB")
 
-    elapsed = time.time() - start_time
+    upload_result = upload_file(output_path, job_id, r2_config, "mp4")
+    if not upload_result.get("output_url"):
+        return {"error": "Failed to upload result video"}
 
+    output_width, output_height = output_size or (info["width"] * scale, info["height"] * scale)
     result = {
         "success": True,
         "output_url": upload_result["output_url"],
-        "input_dimensions": f"{input_width}x{input_height}",
+        "input_dimensions": f"{info['width']}x{info['height']}",
         "output_dimensions": f"{output_width}x{output_height}",
         "scale": scale,
         "model_used": model,
         "face_enhance": face_enhance,
-        "output_format": output_format,
-        "inference_time_seconds": round(inference_time, 2),
-        "processing_time_seconds": round(elapsed, 2),
+        "output_format": "mp4",
+        "fps": info["fps"],
+        "audio": None if not info["audio_codec"] else ("copy" if info["audio_codec"] in MP4_AUDIO_CODECS else "aac"),
+        **stats,
+        "processing_time_seconds": round(time.time() - start_time, 2),
     }
-
-    # Include R2 key if result was uploaded to R2
     if upload_result.get("r2_key"):
         result["r2_key"] = upload_result["r2_key"]
 
@@ -357,7 +1040,8 @@ def handler(job: dict) -> dict:
     Main RunPod handler - routes to specific operations.
 
     Supports operations:
-        - upscale: Upscale images using Real-ESRGAN
+        - upscale: Upscale an image (or a list of "images") using Real-ESRGAN
+        - upscale_video: Upscale video frames using Real-ESRGAN
     """
     job_id = job.get("id", "unknown")
     job_input = job.get("input", {})
@@ -370,10 +1054,14 @@ def handler(job: dict) -> dict:
     log(f"Working directory: {work_dir}")
 
     try:
-        if operation == "upscale":
+        if operation == "upscale" and "images" in job_input:
+            return handle_upscale_batch(job_input, job_id, work_dir)
+        elif operation == "upscale":
             return handle_upscale(job_input, job_id, work_dir)
+        elif operation == "upscale_video":
+            return handle_upscale_video(job_input, job_id, work_dir)
         else:
-            return {"error": f"Unknown operation: {operation}. Supported: upscale"}
+            return {"error": f"Unknown operation: {operation}. Supported: upscale, upscale_video"}
     except Exception as e:
         import traceback
         log(f"Handler exception: {e}")
@@ -47,10 +47,18 @@ Chunking:
 - Audio >45s is split into chunks to prevent drift
 - Each chunk processed independently
 - Results concatenated with ffmpeg
+
+Models:
+- SadTalker's models (and GFPGAN) are loaded once per worker and kept warm
+- The source image's face crop and 3DMM coefficients are computed once per job
+  and reused for every chunk
+- If the models can't be loaded in-process, each chunk falls back to running
+  SadTalker's inference.py (set SADTALKER_IN_PROCESS=0 to force that)
 """
 
 import base64
 import io
+import math
 import os
 import shutil
 import subprocess
@@ -61,6 +69,7 @@ import uuid
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import runpod
 import requests
 
@@ -71,6 +80,24 @@ CHECKPOINT_DIR = SADTALKER_DIR / "checkpoints"
 # Chunk size in seconds (to prevent drift)
 CHUNK_DURATION = 45
 
+# Chunk cuts move to the quietest point within CUT_SEARCH_SECONDS of an even
+# split. Energy is measured on 16kHz mono in 20ms frames, smoothed over 300ms
+# so a cut needs a pause rather than a gap between syllables.
+CUT_SEARCH_SECONDS = 5.0
+ANALYSIS_RATE = 16000
+ENERGY_FRAME_SECONDS = 0.02
+PAUSE_SECONDS = 0.3
+
+# Render chunks with models kept in this process instead of one inference.py
+# subprocess per chunk
+SADTALKER_IN_PROCESS = os.getenv("SADTALKER_IN_PROCESS", "1") != "0"
+
+# Frames per face render batch (inference.py's default)
+FACERENDER_BATCH_SIZE = 2
+
+# Loaded SadTalker models, keyed by the settings that select checkpoints
+_pipelines = {}
+
 
 def log(message: str) -> None:
     """Log message to stderr (visible in RunPod logs)."""
@@ -137,41 +164,108 @@ def get_audio_duration(audio_path: Path) -> float:
         return 0.0
 
 
+def load_audio_samples(audio_path: Path, rate: int = ANALYSIS_RATE) -> Optional[np.ndarray]:
+    """Decode audio to mono 16-bit samples at rate, for analysis."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-v", "error", "-i", str(audio_path), "-ac", "1", "-ar", str(rate), "-f", "s16le", "-"],
+            capture_output=True,
+            timeout=120,
+        )
+    except Exception as e:
+        log(f"Error decoding audio: {e}")
+        return None
+    if result.returncode != 0 or not result.stdout:
+        log(f"Error decoding audio: {result.stderr.decode(errors='replace')[-300:]}")
+        return None
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def find_cut_points(
+    samples: Optional[np.ndarray],
+    duration: float,
+    chunk_duration: int = CHUNK_DURATION,
+    rate: int = ANALYSIS_RATE,
+) -> list[float]:
+    """Chunk boundaries (seconds) placed in pauses near evenly spaced targets.
+
+    Audio is split into equal-length chunks of at most chunk_duration, then
+    each boundary moves to the quietest point (RMS energy smoothed over
+    PAUSE_SECONDS) within CUT_SEARCH_SECONDS of it, so cuts fall between words.
+    The search never lets a chunk, or the audio left after a cut, outgrow
+    chunk_duration, since that is the drift limit. Quieter points further
+    from the target are penalised slightly. Without samples the boundaries
+    stay evenly spaced.
+    """
+    if duration <= chunk_duration:
+        return []
+    count = math.ceil(duration / chunk_duration)
+    targets = [i * duration / count for i in range(1, count)]
+    if samples is None or len(samples) < rate:
+        return targets
+
+    frame = int(rate * ENERGY_FRAME_SECONDS)
+    frames = len(samples) // frame
+    energy = np.sqrt(np.mean(
+        np.square(samples[:frames * frame].astype(np.float32).reshape(frames, frame)), axis=1,
+    ))
+    window = max(1, int(PAUSE_SECONDS / ENERGY_FRAME_SECONDS))
+    smoothed = np.convolve(energy, np.ones(window, dtype=np.float32) / window, mode="same")
+
+    search = CUT_SEARCH_SECONDS / ENERGY_FRAME_SECONDS
+    cuts = []
+    for index, target in enumerate(targets, start=1):
+        previous = cuts[-1] if cuts else 0.0
+        # Keep this chunk, and the count - index chunks after it, within chunk_duration
+        earliest = max(
+            target - CUT_SEARCH_SECONDS, duration - (count - index) * chunk_duration, previous + PAUSE_SECONDS,
+        )
+        latest = min(target + CUT_SEARCH_SECONDS, previous + chunk_duration)
+        low = math.ceil(earliest / ENERGY_FRAME_SECONDS)
+        high = min(frames, math.floor(latest / ENERGY_FRAME_SECONDS) + 1)
+        if high <= low:
+            cuts.append(min(max(target, earliest), latest))
+            continue
+        distance = np.abs(np.arange(low, high) - target / ENERGY_FRAME_SECONDS) / search
+        best = low + int(np.argmin(smoothed[low:high] * (1 + 0.5 * distance)))
+        cuts.append(best * ENERGY_FRAME_SECONDS)
+    return cuts
+
+
 def split_audio_chunks(audio_path: Path, work_dir: Path, chunk_duration: int = CHUNK_DURATION) -> list[Path]:
-    """Split audio into chunks to prevent drift."""
+    """Split audio into chunks to prevent drift, cutting in pauses.
+
+    All chunks are written in one ffmpeg pass with the segment muxer.
+    """
     duration = get_audio_duration(audio_path)
     log(f"Audio duration: {duration:.1f}s")
 
     if duration <= chunk_duration:
         return [audio_path]
 
-    chunks = []
-    start = 0.0
-    chunk_idx = 0
-
-    while start < duration:
-        chunk_path = work_dir / f"audio_chunk_{chunk_idx:03d}.wav"
-        end = min(start + chunk_duration, duration)
-
-        subprocess.run(
-            [
-                "ffmpeg", "-y",
-                "-i", str(audio_path),
-                "-ss", str(start),
-                "-t", str(end - start),
-                "-c:a", "pcm_s16le",
-                str(chunk_path),
-            ],
-            capture_output=True,
-            timeout=60,
-        )
-
-        if chunk_path.exists():
-            chunks.append(chunk_path)
-            log(f"  Chunk {chunk_idx}: {start:.1f}s - {end:.1f}s")
-
-        start = end
-        chunk_idx += 1
+    cuts = find_cut_points(load_audio_samples(audio_path), duration, chunk_duration)
+
+    result = subprocess.run(
+        [
+            "ffmpeg", "-y", "-v", "error",
+            "-i", str(audio_path),
+            "-f", "segment",
+            "-segment_times", ",".join(f"{cut:.3f}" for cut in cuts),
+            "-reset_timestamps", "1",
+            "-c:a", "pcm_s16le",
+            str(work_dir / "audio_chunk_%03d.wav"),
+        ],
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if result.returncode != 0:
+        log(f"Error splitting audio: {result.stderr[-500:]}")
+        return []
+
+    chunks = sorted(work_dir.glob("audio_chunk_*.wav"))
+    for chunk_idx, (start, end) in enumerate(zip([0.0] + cuts, cuts + [duration])):
+        log(f"  Chunk {chunk_idx}: {start:.1f}s - {end:.1f}s")
 
     log(f"Split into {len(chunks)} chunks")
     return chunks
@@ -288,6 +382,118 @@ def run_sadtalker(
         return None
 
 
+def _reuse_face_enhancer() -> None:
+    """Make SadTalker build its GFPGAN restorer once per worker, not once per video."""
+    from src.utils import face_enhancer
+
+    if getattr(face_enhancer, "_restorers", None) is not None:
+        return
+    build = face_enhancer.GFPGANer
+    face_enhancer._restorers = {}
+
+    def cached_gfpganer(*args, **kwargs):
+        if kwargs.get("bg_upsampler") is not None:
+            return build(*args, **kwargs)
+        key = (args, tuple(sorted(kwargs.items())))
+        if key not in face_enhancer._restorers:
+            face_enhancer._restorers[key] = build(*args, **kwargs)
+        return face_enhancer._restorers[key]
+
+    face_enhancer.GFPGANer = cached_gfpganer
+
+
+def get_pipeline(size: int = 256, preprocess: str = "crop") -> dict:
+    """Load SadTalker's models once per worker (as inference.py does per run).
+
+    The checkpoints depend on the output size and on whether preprocess is
+    "full", so those key the cache. Only one set is kept on the GPU.
+    """
+    cache_key = (size, "full" in preprocess)
+    if cache_key in _pipelines:
+        return _pipelines[cache_key]
+
+    import torch
+    from src.facerender.animate import AnimateFromCoeff
+    from src.test_audio2coeff import Audio2Coeff
+    from src.utils.init_path import init_path
+    from src.utils.preprocess import CropAndExtract
+
+    if _pipelines:
+        _pipelines.clear()
+        torch.cuda.empty_cache()
+
+    # SadTalker and GFPGAN look up some weights relative to the repo
+    os.chdir(SADTALKER_DIR)
+    _reuse_face_enhancer()
+
+    log(f"Loading SadTalker models (size={size}, preprocess={preprocess})...")
+    load_start = time.time()
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    paths = init_path(str(CHECKPOINT_DIR), str(SADTALKER_DIR / "src" / "config"), size, False, preprocess)
+    pipeline = {
+        "device": device,
+        "preprocess_model": CropAndExtract(paths, device),
+        "audio_to_coeff": Audio2Coeff(paths, device),
+        "animate": AnimateFromCoeff(paths, device),
+    }
+    log(f"  Models loaded in {time.time() - load_start:.1f}s")
+
+    _pipelines[cache_key] = pipeline
+    return pipeline
+
+
+def prepare_source(pipeline: dict, image_path: Path, work_dir: Path, preprocess: str, size: int) -> dict:
+    """Crop the face and extract its 3DMM coefficients, once per job."""
+    first_frame_dir = work_dir / "first_frame_dir"
+    first_frame_dir.mkdir(exist_ok=True)
+
+    log("3DMM extraction for source image...")
+    first_coeff_path, crop_pic_path, crop_info = pipeline["preprocess_model"].generate(
+        str(image_path), str(first_frame_dir), preprocess, source_image_flag=True, pic_size=size,
+    )
+    if first_coeff_path is None:
+        raise RuntimeError("Could not extract face coefficients from the source image")
+
+    return {
+        "image_path": str(image_path),
+        "first_coeff_path": first_coeff_path,
+        "crop_pic_path": crop_pic_path,
+        "crop_info": crop_info,
+    }
+
+
+def render_chunk(
+    pipeline: dict,
+    source: dict,
+    audio_path: Path,
+    output_dir: Path,
+    still_mode: bool = False,
+    enhancer: str = "gfpgan",
+    preprocess: str = "crop",
+    size: int = 256,
+    expression_scale: float = 1.0,
+    pose_style: int = 0,
+) -> Path:
+    """Render one audio chunk on the warm models (inference.py's steps after preprocessing)."""
+    from src.generate_batch import get_data
+    from src.generate_facerender_batch import get_facerender_data
+
+    batch = get_data(source["first_coeff_path"], str(audio_path), pipeline["device"], None, still=still_mode)
+    coeff_path = pipeline["audio_to_coeff"].generate(batch, str(output_dir), pose_style, None)
+
+    data = get_facerender_data(
+        coeff_path, source["crop_pic_path"], source["first_coeff_path"], str(audio_path),
+        FACERENDER_BATCH_SIZE, None, None, None,
+        expression_scale=expression_scale, still_mode=still_mode, preprocess=preprocess, size=size,
+    )
+    result = pipeline["animate"].generate(
+        data, str(output_dir), source["image_path"], source["crop_info"],
+        enhancer=None if enhancer == "none" else enhancer,
+        background_enhancer=None, preprocess=preprocess, img_size=size,
+    )
+    return Path(result)
+
+
 def concatenate_videos(video_paths: list[Path], output_path: Path) -> bool:
     """Concatenate multiple videos using ffmpeg."""
     if len(video_paths) == 1:
@@ -320,30 +526,66 @@ def concatenate_videos(video_paths: list[Path], output_path: Path) -> bool:
         return False
 
 
-def upload_to_r2(file_path: Path, job_id: str, r2_config: dict) -> tuple[Optional[str], Optional[str]]:
-    """Upload video to Cloudflare R2 and return (presigned_url, object_key)."""
-    try:
+# R2 clients are reused across jobs on a warm worker. Files above 16MB are
+# sent as 16MB parts, 8 at a time.
+_r2_clients = {}
+R2_MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+R2_MAX_CONCURRENCY = 8
+
+
+def get_r2_client(r2_config: dict):
+    """Return a boto3 S3 client for R2, cached per account."""
+    cache_key = (r2_config["endpoint_url"], r2_config["access_key_id"], r2_config["secret_access_key"])
+    client = _r2_clients.get(cache_key)
+    if client is None:
         import boto3
         from botocore.config import Config
 
-        log("Uploading to R2...")
-
         client = boto3.client(
             "s3",
             endpoint_url=r2_config["endpoint_url"],
             aws_access_key_id=r2_config["access_key_id"],
             aws_secret_access_key=r2_config["secret_access_key"],
-            config=Config(signature_version="s3v4"),
+            config=Config(
+                signature_version="s3v4",
+                max_pool_connections=R2_MAX_CONCURRENCY * 2,
+                retries={"max_attempts": 5, "mode": "adaptive"},
+            ),
         )
+        _r2_clients[cache_key] = client
+    return client
+
+
+def r2_transfer_config():
+    """Multipart settings for large R2 uploads."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=R2_MULTIPART_CHUNKSIZE,
+        multipart_chunksize=R2_MULTIPART_CHUNKSIZE,
+        max_concurrency=R2_MAX_CONCURRENCY,
+    )
+
+
+def upload_to_r2(file_path: Path, job_id: str, r2_config: dict) -> tuple[Optional[str], Optional[str]]:
+    """Upload video to Cloudflare R2 and return (presigned_url, object_key)."""
+    try:
+
+        log("Uploading to R2...")
+
+        client = get_r2_client(r2_config)
 
         object_key = f"sadtalker/results/{job_id}_{uuid.uuid4().hex[:8]}.mp4"
 
+        upload_start = time.time()
         client.upload_file(
             str(file_path),
             r2_config["bucket_name"],
             object_key,
             ExtraArgs={"ContentType": "video/mp4"},
+            Config=r2_transfer_config(),
         )
+        upload_seconds = time.time() - upload_start
 
         presigned_url = client.generate_presigned_url(
             "get_object",
@@ -351,7 +593,9 @@ def upload_to_r2(file_path: Path, job_id: str, r2_config: dict) -> tuple[Optiona
             ExpiresIn=7200,
         )
 
-        log(f"  R2 upload complete: {object_key}")
+        size_mb = Path(file_path).stat().st_size / (1024 * 1024)
+        log(f"  R2 upload complete: {object_key} ({size_mb:.1f}MB in {upload_seconds:.1f}s, "
+            f"{size_mb / max(upload_seconds, 1e-6):.1f} MB/s)")
         return presigned_url, object_key
     except Exception as e:
         log(f"Error uploading to R2: {e}")
@@ -406,6 +650,21 @@ def handler(job: dict) -> dict:
         audio_chunks = split_audio_chunks(audio_path, work_dir)
         total_duration = get_audio_duration(audio_path)
 
+        # Load models (kept warm across jobs) and preprocess the image once
+        pipeline = source = None
+        if SADTALKER_IN_PROCESS:
+            try:
+                pipeline = get_pipeline(size, preprocess)
+            except Exception as e:
+                import traceback
+                log(f"In-process SadTalker unavailable, using inference.py per chunk: {e}")
+                log(traceback.format_exc())
+        if pipeline:
+            try:
+                source = prepare_source(pipeline, image_path, work_dir, preprocess, size)
+            except Exception as e:
+                return {"error": f"Failed to preprocess image: {e}"}
+
         # Process each chunk
         video_chunks = []
         for i, chunk_path in enumerate(audio_chunks):
@@ -413,17 +672,28 @@ def handler(job: dict) -> dict:
             chunk_output_dir = work_dir / f"output_{i:03d}"
             chunk_output_dir.mkdir()
 
-            video_path = run_sadtalker(
-                image_path=image_path,
-                audio_path=chunk_path,
-                output_dir=chunk_output_dir,
-                still_mode=still_mode,
-                enhancer=enhancer,
-                preprocess=preprocess,
-                size=size,
-                expression_scale=expression_scale,
-                pose_style=pose_style,
-            )
+            options = {
+                "still_mode": still_mode,
+                "enhancer": enhancer,
+                "preprocess": preprocess,
+                "size": size,
+                "expression_scale": expression_scale,
+                "pose_style": pose_style,
+            }
+            if pipeline:
+                try:
+                    video_path = render_chunk(pipeline, source, chunk_path, chunk_output_dir, **options)
+                except Exception as e:
+                    import traceback
+                    log(traceback.format_exc())
+                    return {"error": f"Failed to process chunk {i + 1}: {e}"}
+            else:
+                video_path = run_sadtalker(
+                    image_path=image_path,
+                    audio_path=chunk_path,
+                    output_dir=chunk_output_dir,
+                    **options,
+                )
 
             if video_path:
                 video_chunks.append(video_path)
@@ -445,6 +715,7 @@ def handler(job: dict) -> dict:
             "success": True,
             "duration_seconds": total_duration,
             "chunks_processed": len(audio_chunks),
+            "renderer": "in_process" if pipeline else "subprocess",
             "processing_time_seconds": round(elapsed, 2),
         }
 
@@ -503,4 +774,11 @@ if __name__ == "__main__":
     except ImportError:
         log("Warning: torch not imported for CUDA check")
 
+    # Load the default models before taking jobs, so the first job starts warm
+    if SADTALKER_IN_PROCESS:
+        try:
+            get_pipeline()
+        except Exception as e:
+            log(f"Warning: could not preload SadTalker models: {e}")
+
     runpod.serverless.start({"handler": handler})
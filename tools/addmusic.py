@@ -35,6 +35,7 @@ from elevenlabs.client import ElevenLabs
 # Add parent to path for local imports
 sys.path.insert(0, str(Path(__file__).parent))
 from config import get_elevenlabs_api_key
+import media_probe
 
 
 # ElevenLabs music generation limit
@@ -141,24 +142,8 @@ Prompt tips (for ElevenLabs generation):
 
 
 def get_media_duration(file_path: str) -> float | None:
-    """Get media duration using ffprobe."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe",
-                "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "csv=p=0",
-                file_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-    except (FileNotFoundError, ValueError):
-        pass
-    return None
+    """Get media duration from the shared probe cache, if ffprobe is available."""
+    return media_probe.get_duration(file_path)
 
 
 def generate_music(
@@ -39,17 +39,31 @@ Cost (RunPod):
 """
 
 import argparse
+import bisect
 import json
 import os
+import queue
+import re
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
 from pathlib import Path
 
 import requests
 
+# Add parent to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+import media_probe
+import r2_transfer
+import runpod_api
+import runpod_jobs
+import upload_cache
+
 # Default installation path
 PROPAINTER_HOME = Path.home() / ".video-toolkit" / "propainter"
 PROPAINTER_REPO = "https://github.com/sczhou/ProPainter.git"
@@ -206,9 +220,147 @@ def get_memory_profile(memory_gb: int | None) -> dict:
 # This accounts for RGB tensors, flow tensors, masks, and PyTorch overhead
 BYTES_PER_FRAME_720P = 6.5 * 1024 * 1024  # ~6.5 MB per frame at 1280x720
 
+# Calibrated memory models (--calibrate) replace the constant above with a
+# per-device fit of measured peak memory:
+#   peak_gb = base + megapixels * (frames * a + subvideo_length * b + neighbor_length * c)
+MEMORY_MODEL_DIR = PROPAINTER_HOME.parent / "memory-models"
+MEMORY_MODEL_HEADROOM = 1.15  # Predictions are scaled up by this before planning
+MEMORY_MODEL_TERMS = ("gb_per_frame_mpx", "gb_per_subvideo_frame_mpx", "gb_per_neighbor_frame_mpx")
+
+# Synthetic calibration clips: (width, height, frames, subvideo_length, neighbor_length)
+CALIBRATION_RUNS = [
+    (432, 240, 40, 20, 5),
+    (432, 240, 80, 20, 5),
+    (640, 360, 40, 20, 5),
+    (640, 360, 40, 40, 10),
+    (640, 360, 80, 40, 5),
+    (854, 480, 40, 20, 5),
+    (854, 480, 80, 40, 10),
+]
+
+
+def get_device_name(compute: dict) -> str:
+    """Identify the compute device a memory model belongs to."""
+    if compute.get("device") == "cuda":
+        try:
+            result = subprocess.run(
+                ["nvidia-smi", "--query-gpu=name", "--format=csv,noheader"],
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode == 0 and result.stdout.strip():
+                return result.stdout.strip().split("\n")[0].strip()
+        except Exception:
+            pass
+    return f"{compute.get('device', 'cpu')}-{compute.get('memory_gb') or 0}gb"
+
+
+def memory_model_path(device_name: str, precision: str = "fp16", runpod: bool = False) -> Path:
+    """Where the memory model for a device and precision ("fp16"/"fp32") is stored."""
+    slug = re.sub(r"[^a-z0-9]+", "-", device_name.lower()).strip("-")
+    return MEMORY_MODEL_DIR / f"{'runpod-' if runpod else ''}{slug}-{precision}.json"
+
+
+def load_memory_model(compute: dict, precision: str = "fp16") -> dict | None:
+    """Load the calibrated memory model for this machine's device, if any.
+
+    fp32 needs more memory than fp16, so only a model calibrated at the run's
+    precision is used.
+    """
+    path = memory_model_path(get_device_name(compute), precision)
+    try:
+        model = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    return model if model.get("precision") == precision else None
+
+
+def load_runpod_memory_models(precision: str = "fp16") -> dict:
+    """Memory models calibrated on RunPod workers at a precision, keyed by GPU name."""
+    models = {}
+    for path in sorted(MEMORY_MODEL_DIR.glob(f"runpod-*-{precision}.json")):
+        try:
+            model = json.loads(path.read_text())
+            if model.get("precision") == precision:
+                models[model["device"]] = model
+        except (OSError, ValueError, KeyError):
+            continue
+    return models
+
+
+def predict_peak_memory_gb(
+    model: dict,
+    width: int,
+    height: int,
+    frame_count: int,
+    subvideo_length: int,
+    neighbor_length: int,
+) -> float:
+    """Peak memory predicted by a calibrated model (including headroom)."""
+    mpx = width * height / 1e6
+    per_mpx = (
+        model["gb_per_frame_mpx"] * frame_count
+        + model["gb_per_subvideo_frame_mpx"] * min(subvideo_length, frame_count)
+        + model["gb_per_neighbor_frame_mpx"] * neighbor_length
+    )
+    return (model["base_gb"] + mpx * per_mpx) * MEMORY_MODEL_HEADROOM
+
+
+def fit_memory_model(samples: list[dict]) -> dict | None:
+    """Least-squares fit of peak memory against the model terms (non-negative)."""
+    def features(s: dict) -> list[float]:
+        mpx = s["width"] * s["height"] / 1e6
+        return [mpx * s["frames"], mpx * min(s["subvideo_length"], s["frames"]), mpx * s["neighbor_length"]]
+
+    active = list(range(len(MEMORY_MODEL_TERMS)))
+    while True:
+        rows = [[1.0] + [features(s)[i] for i in active] for s in samples]
+        ys = [s["peak_gb"] for s in samples]
+        n = len(rows[0])
+        if len(rows) < n:
+            return None
+
+        # Normal equations, solved by Gaussian elimination
+        a = [[sum(r[i] * r[j] for r in rows) for j in range(n)] + [sum(r[i] * y for r, y in zip(rows, ys))]
+             for i in range(n)]
+        for col in range(n):
+            pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+            if abs(a[pivot][col]) < 1e-12:
+                return None
+            a[col], a[pivot] = a[pivot], a[col]
+            for r in range(n):
+                if r != col:
+                    factor = a[r][col] / a[col][col]
+                    a[r] = [x - factor * p for x, p in zip(a[r], a[col])]
+        coef = [a[i][n] / a[i][i] for i in range(n)]
+
+        negative = [active[i - 1] for i in range(1, n) if coef[i] < 0]
+        if not negative:
+            break
+        # Drop terms the data says don't matter and refit the rest
+        active = [i for i in active if i not in negative]
+
+    model = {"base_gb": max(0.0, coef[0]), **{term: 0.0 for term in MEMORY_MODEL_TERMS}}
+    for i, term_index in enumerate(active):
+        model[MEMORY_MODEL_TERMS[term_index]] = coef[i + 1]
+    return model
+
+
+def estimate_frame_memory_gb(
+    width: int,
+    height: int,
+    frame_count: int,
+    model: dict | None = None,
+    subvideo_length: int = 80,
+    neighbor_length: int = 10,
+) -> float:
+    """Estimate memory required to load all frames into ProPainter.
+
+    Uses the calibrated model when given (see --calibrate).
+    """
+    if model:
+        return predict_peak_memory_gb(model, width, height, frame_count, subvideo_length, neighbor_length)
 
-def estimate_frame_memory_gb(width: int, height: int, frame_count: int) -> float:
-    """Estimate memory required to load all frames into ProPainter."""
     # Scale from 720p baseline
     pixels = width * height
     pixels_720p = 1280 * 720
@@ -224,68 +376,67 @@ def estimate_frame_memory_gb(width: int, height: int, frame_count: int) -> float
 
 
 def get_video_info(video_path: str) -> dict | None:
-    """Get detailed video information using ffprobe."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-select_streams", "v:0",
-                "-show_entries", "stream=width,height,r_frame_rate,nb_frames",
-                "-show_entries", "format=duration",
-                "-of", "json",
-                video_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            stream = data.get("streams", [{}])[0]
-            fmt = data.get("format", {})
-
-            # Parse frame rate (can be "30/1" or "29.97")
-            fps_str = stream.get("r_frame_rate", "30/1")
-            if "/" in fps_str:
-                num, den = fps_str.split("/")
-                fps = float(num) / float(den)
-            else:
-                fps = float(fps_str)
+    """Get detailed video information from the shared probe cache."""
+    stream = media_probe.get_stream(video_path, "video")
+    if not stream:
+        return None
 
-            duration = float(fmt.get("duration", 0))
+    fps = media_probe.parse_rate(stream.get("r_frame_rate")) or 30.0
+    duration = media_probe.get_duration(video_path) or 0.0
 
-            # nb_frames may not always be available
-            nb_frames = stream.get("nb_frames")
-            if nb_frames:
-                frame_count = int(nb_frames)
-            else:
-                frame_count = int(duration * fps)
-
-            return {
-                "width": stream.get("width"),
-                "height": stream.get("height"),
-                "fps": fps,
-                "duration": duration,
-                "frame_count": frame_count,
-            }
-    except Exception:
-        pass
-    return None
+    # nb_frames may not always be available
+    nb_frames = stream.get("nb_frames")
+    if nb_frames and str(nb_frames).isdigit():
+        frame_count = int(nb_frames)
+    else:
+        frame_count = int(duration * fps)
+
+    return {
+        "width": stream.get("width"),
+        "height": stream.get("height"),
+        "fps": fps,
+        "duration": duration,
+        "frame_count": frame_count,
+    }
 
 
-def calculate_max_duration(memory_gb: float, width: int, height: int, fps: float, device: str = "cpu") -> float:
+def calculate_max_duration(
+    memory_gb: float,
+    width: int,
+    height: int,
+    fps: float,
+    device: str = "cpu",
+    model: dict | None = None,
+    subvideo_length: int = 80,
+    neighbor_length: int = 10,
+) -> float:
     """Calculate maximum video duration that fits in available memory and hardware limits.
 
     Constraints:
     1. Memory: On unified memory systems (Apple Silicon), only ~50% is available
+       (with a calibrated model: 90% of VRAM, or 60% of unified/system RAM)
     2. MPS INT_MAX: Apple Silicon MPS cannot handle tensors > 2^31 elements
     """
-    # Memory constraint
-    available_for_frames = memory_gb * 0.50
     pixels = width * height
-    pixels_720p = 1280 * 720
-    scale_factor = pixels / pixels_720p
-    bytes_per_frame = BYTES_PER_FRAME_720P * scale_factor
-    max_frames_memory = int((available_for_frames * 1024 ** 3) / bytes_per_frame)
+    if model:
+        usable_gb = memory_gb * (0.9 if device.lower() == "cuda" else 0.6)
+        mpx = pixels / 1e6
+        fixed_gb = model["base_gb"] + mpx * (
+            model["gb_per_subvideo_frame_mpx"] * subvideo_length
+            + model["gb_per_neighbor_frame_mpx"] * neighbor_length
+        )
+        per_frame_gb = mpx * model["gb_per_frame_mpx"]
+        spare_gb = usable_gb / MEMORY_MODEL_HEADROOM - fixed_gb
+        if per_frame_gb <= 0:
+            max_frames_memory = sys.maxsize if spare_gb > 0 else 0
+        else:
+            max_frames_memory = max(0, int(spare_gb / per_frame_gb))
+    else:
+        available_for_frames = memory_gb * 0.50
+        pixels_720p = 1280 * 720
+        scale_factor = pixels / pixels_720p
+        bytes_per_frame = BYTES_PER_FRAME_720P * scale_factor
+        max_frames_memory = int((available_for_frames * 1024 ** 3) / bytes_per_frame)
 
     # MPS INT_MAX constraint (Apple Silicon specific)
     # MPS cannot handle tensor dimensions > INT_MAX (2^31-1)
@@ -304,22 +455,16 @@ def calculate_max_duration(memory_gb: float, width: int, height: int, fps: float
     return max_frames / fps
 
 
-def split_video_with_overlap(
-    input_path: str,
-    output_dir: str,
+def plan_chunks(
+    duration: float,
     chunk_duration: float,
     overlap: float = 5.0,
-    verbose: bool = True,
+    output_dir: str = ".",
 ) -> list[dict]:
-    """Split video into chunks with overlap for seamless processing.
+    """Calculate overlapping chunk boundaries without extracting anything.
 
-    Returns list of chunk info dicts with start, end, output_path, and trim points.
+    Returns list of chunk info dicts with start, end, input_path, and trim points.
     """
-    info = get_video_info(input_path)
-    if not info:
-        return []
-
-    duration = info["duration"]
     chunks = []
 
     # Calculate chunk boundaries
@@ -348,34 +493,12 @@ def split_video_with_overlap(
         else:
             trim_end = chunk_duration - (overlap / 2)
 
-        chunk_path = str(Path(output_dir) / f"chunk_{chunk_idx:03d}.mp4")
-
-        # Extract chunk using ffmpeg
-        # Must re-encode (not -c copy) to ensure fps metadata is preserved
-        # torchvision.io.read_video requires video_fps in metadata
-        cmd = [
-            "ffmpeg", "-y",
-            "-ss", str(current_start),
-            "-i", input_path,
-            "-t", str(chunk_end - current_start),
-            "-c:v", "libx264",
-            "-preset", "fast",
-            "-crf", "18",
-            "-c:a", "aac",
-            "-b:a", "192k",
-            chunk_path,
-        ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            if verbose:
-                print(f"Error extracting chunk {chunk_idx}: {result.stderr}", file=sys.stderr)
-            return []
-
         chunks.append({
             "index": chunk_idx,
-            "input_path": chunk_path,
+            "input_path": str(Path(output_dir) / f"chunk_{chunk_idx:03d}.mp4"),
             "output_path": None,  # Will be set after processing
+            "trimmed_path": None,
+            "status": "pending",
             "start": current_start,
             "end": chunk_end,
             "trim_start": trim_start,
@@ -383,9 +506,6 @@ def split_video_with_overlap(
             "duration": chunk_end - current_start,
         })
 
-        if verbose:
-            print(f"  Chunk {chunk_idx}: {current_start:.1f}s - {chunk_end:.1f}s (use {trim_start:.1f}s - {trim_end:.1f}s)")
-
         chunk_idx += 1
         current_start += effective_chunk
 
@@ -396,6 +516,212 @@ def split_video_with_overlap(
     return chunks
 
 
+def extract_chunk(input_path: str, chunk: dict, verbose: bool = True) -> bool:
+    """Extract a single planned chunk from the source video."""
+    # Must re-encode (not -c copy) to ensure fps metadata is preserved
+    # torchvision.io.read_video requires video_fps in metadata
+    cmd = [
+        "ffmpeg", "-y",
+        "-ss", str(chunk["start"]),
+        "-i", input_path,
+        "-t", str(chunk["duration"]),
+        "-c:v", "libx264",
+        "-preset", "fast",
+        "-crf", "18",
+        "-c:a", "aac",
+        "-b:a", "192k",
+        chunk["input_path"],
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        if verbose:
+            print(f"Error extracting chunk {chunk['index']}: {result.stderr}", file=sys.stderr)
+        return False
+
+    return True
+
+
+def get_keyframe_info(video_path: str) -> dict | None:
+    """Get keyframe timestamps (seek-relative, seconds) plus codec and pixel format.
+
+    Reads packet flags in a single ffprobe pass, so nothing is decoded.
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-select_streams", "v:0",
+                "-show_entries", "packet=pts_time,flags",
+                "-show_entries", "stream=codec_name,pix_fmt",
+                "-show_entries", "format=start_time",
+                "-of", "json",
+                video_path,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None
+
+        data = json.loads(result.stdout)
+        stream = data.get("streams", [{}])[0]
+        start_time = float(data.get("format", {}).get("start_time") or 0)
+
+        keyframes = sorted(
+            float(p["pts_time"]) - start_time
+            for p in data.get("packets", [])
+            if "K" in p.get("flags", "") and p.get("pts_time") not in (None, "N/A")
+        )
+        if not keyframes:
+            return None
+
+        return {
+            "keyframes": keyframes,
+            "codec": stream.get("codec_name"),
+            "pix_fmt": stream.get("pix_fmt"),
+        }
+    except Exception:
+        return None
+
+
+def align_chunks_to_keyframes(chunks: list[dict], keyframes: list[float], max_snap: float) -> list[dict]:
+    """Snap each chunk start back to the previous keyframe so it can be stream-copied.
+
+    Trim points are shifted to stay on the same absolute timeline, so the
+    extra lead-in only widens the overlap. When the previous keyframe is more
+    than max_snap away, the start is left as is and the chunk is marked
+    unaligned (it gets fully re-encoded on extraction).
+    """
+    for chunk in chunks:
+        previous = [k for k in keyframes if k <= chunk["start"] + 1e-3]
+
+        if previous and chunk["start"] - previous[-1] <= max_snap:
+            shift = chunk["start"] - previous[-1]
+            chunk["start"] = previous[-1]
+            chunk["trim_start"] += shift
+            chunk["trim_end"] += shift
+            chunk["duration"] = chunk["end"] - chunk["start"]
+            chunk["aligned"] = True
+        else:
+            chunk["aligned"] = False
+
+    return chunks
+
+
+def decodes_cleanly(video_path: str) -> bool:
+    """Check that a video decodes end to end without errors and carries fps metadata.
+
+    A full (CPU) decode is the only reliable way to catch a broken stream
+    copy; ProPainter's reader additionally needs avg_frame_rate.
+    """
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", video_path, "-map", "0:v:0", "-f", "null", "-"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0 or result.stderr.strip():
+        return False
+    stream = media_probe.get_stream(video_path, "video")
+    return bool(stream) and media_probe.parse_rate(stream.get("avg_frame_rate")) is not None
+
+
+def extract_chunk_stream_copy(input_path: str, chunk: dict, verbose: bool = True) -> bool:
+    """Extract a keyframe-aligned chunk without re-encoding it.
+
+    Only aligned chunks are stream-copied; unaligned chunks, and any copy
+    that does not decode cleanly, fall back to a full re-encode with
+    extract_chunk. Stream-copied chunks are video-only; audio is restored
+    from the original after joining.
+    """
+    chunk_path = chunk["input_path"]
+
+    if chunk.get("aligned"):
+        result = subprocess.run(
+            [
+                "ffmpeg", "-y",
+                "-ss", str(chunk["start"]),
+                "-i", input_path,
+                "-t", str(chunk["duration"]),
+                "-map", "0:v:0",
+                "-c:v", "copy",
+                "-avoid_negative_ts", "make_zero",
+                chunk_path,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode == 0 and decodes_cleanly(chunk_path):
+            return True
+
+    if verbose:
+        print(f"  Chunk {chunk['index']}: stream copy not possible, re-encoding", file=sys.stderr)
+    return extract_chunk(input_path, chunk, verbose=verbose)
+
+
+def split_video_with_overlap(
+    input_path: str,
+    output_dir: str,
+    chunk_duration: float,
+    overlap: float = 5.0,
+    verbose: bool = True,
+    stream_copy: bool = False,
+) -> list[dict]:
+    """Split video into chunks with overlap for seamless processing.
+
+    With stream_copy, chunk starts are snapped to keyframes and extracted
+    without re-encoding (see extract_chunk_stream_copy).
+
+    Returns list of chunk info dicts with start, end, output_path, and trim points.
+    """
+    info = get_video_info(input_path)
+    if not info:
+        return []
+
+    chunks = plan_chunks(info["duration"], chunk_duration, overlap, output_dir)
+    extract = make_chunk_extractor(chunks, input_path, chunk_duration, stream_copy, verbose)
+
+    for chunk in chunks:
+        if not extract(input_path, chunk, verbose=verbose):
+            return []
+
+        if verbose:
+            print(f"  Chunk {chunk['index']}: {chunk['start']:.1f}s - {chunk['end']:.1f}s "
+                  f"(use {chunk['trim_start']:.1f}s - {chunk['trim_end']:.1f}s)")
+
+    return chunks
+
+
+def make_chunk_extractor(
+    chunks: list[dict],
+    input_path: str,
+    chunk_duration: float,
+    stream_copy: bool = True,
+    verbose: bool = True,
+):
+    """Return the extract function for planned chunks, aligning them to keyframes if possible.
+
+    Start snapping is limited to 10% of the chunk duration, which stays inside
+    the 90% safety margin used when sizing chunks from available memory.
+    """
+    if not stream_copy:
+        return extract_chunk
+
+    info = get_keyframe_info(input_path)
+    if not info:
+        if verbose:
+            print("Could not read keyframes, chunks will be re-encoded", file=sys.stderr)
+        return extract_chunk
+
+    align_chunks_to_keyframes(chunks, info["keyframes"], max_snap=chunk_duration * 0.1)
+
+    if verbose:
+        aligned = sum(1 for c in chunks if c["aligned"])
+        print(f"Keyframe-aligned {aligned}/{len(chunks)} chunks for stream copy")
+
+    return extract_chunk_stream_copy
+
+
 def concatenate_chunks(
     chunks: list[dict],
     output_path: str,
@@ -467,56 +793,369 @@ def concatenate_chunks(
     return True
 
 
-def parse_args():
-    parser = argparse.ArgumentParser(
-        description="Remove watermarks using AI inpainting (ProPainter)",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
-Examples:
-  # Remove NotebookLM watermark (bottom-right corner)
-  python tools/dewatermark.py --input video.mp4 --region 1080,660,195,40 --output clean.mp4
+def join_segment_args(fps: float | None = None) -> list[str]:
+    """Encoder settings for every segment of a stream-copy join.
 
-  # Use higher quality (slower)
-  python tools/dewatermark.py --input video.mp4 --region 1080,660,195,40 --output clean.mp4 --fp32
+    The concat demuxer keeps only the first segment's parameter sets, so all
+    segments must come from the same encoder settings, pixel format and
+    frame rate to decode correctly after each switch.
+    """
+    return [
+        "-c:v", "libx264",
+        "-preset", "medium",
+        "-crf", "18",
+        "-pix_fmt", "yuv420p",
+        *(["-r", str(fps)] if fps else []),
+        "-video_track_timescale", "90000",
+    ]
 
-  # Install ProPainter
-  python tools/dewatermark.py --install
-        """,
-    )
 
-    # Main arguments
-    parser.add_argument(
-        "--input", "-i",
-        type=str,
-        help="Input video file path",
-    )
-    parser.add_argument(
-        "--output", "-o",
-        type=str,
-        help="Output video file path",
-    )
-    parser.add_argument(
-        "--region", "-r",
-        type=str,
-        help="Watermark region as x,y,width,height (e.g., 1100,650,150,50)",
-    )
-    parser.add_argument(
-        "--preset", "-p",
-        type=str,
-        choices=list(WATERMARK_PRESETS.keys()),
-        help=f"Use preset watermark region: {', '.join(WATERMARK_PRESETS.keys())}",
-    )
-    parser.add_argument(
-        "--mask", "-m",
-        type=str,
-        help="Custom mask image (white=remove, black=keep)",
-    )
+def trim_chunk(
+    chunk: dict,
+    verbose: bool = True,
+    size: tuple[int, int] | None = None,
+    fps: float | None = None,
+) -> bool:
+    """Trim a processed chunk to its usable portion, ready for a stream-copy join.
 
-    # Quality/performance options
-    parser.add_argument(
-        "--fp32",
-        action="store_true",
-        help="Use fp32 precision (higher quality, more memory)",
+    Sets chunk["trimmed_path"] on success. Audio is dropped here and restored
+    from the original once all chunks are joined (ProPainter strips audio).
+    If size is given, the chunk is scaled to it so all chunks match; fps
+    forces the source frame rate (see join_segment_args).
+    """
+    trimmed_path = str(Path(chunk["input_path"]).with_name(f"trimmed_{chunk['index']:03d}.mp4"))
+
+    video_filter = f"trim=start={chunk['trim_start']}:end={chunk['trim_end']},setpts=PTS-STARTPTS"
+    if size:
+        video_filter += f",scale={size[0]}:{size[1]}:flags=lanczos"
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", chunk["output_path"],
+        "-vf", video_filter,
+        "-an",
+        *join_segment_args(fps),
+        trimmed_path,
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        if verbose:
+            print(f"Error trimming chunk {chunk['index']}: {result.stderr[-500:]}", file=sys.stderr)
+        return False
+
+    chunk["trimmed_path"] = trimmed_path
+    return True
+
+
+def join_trimmed_chunks(
+    chunks: list[dict],
+    output_path: str,
+    original_video: str,
+    verbose: bool = True,
+    gaps: list[dict] | None = None,
+) -> bool:
+    """Join trimmed chunks with the concat demuxer (no re-encode) and restore audio.
+
+    gaps are spans of original_video that were not inpainted (see
+    plan_gated_chunks); they are re-encoded with the same settings as the
+    trimmed chunks and spliced in between them. The joined video must decode
+    cleanly before it is accepted.
+    """
+    for chunk in chunks:
+        if not chunk.get("trimmed_path") or not Path(chunk["trimmed_path"]).exists():
+            if verbose:
+                print(f"Error: Missing trimmed chunk {chunk['index']}", file=sys.stderr)
+            return False
+
+    segments = [(c["start"] + c["trim_start"], c["trimmed_path"]) for c in chunks]
+    info = get_video_info(original_video) if gaps else None
+    for gap in gaps or []:
+        if not extract_gap(original_video, gap, verbose, fps=info["fps"] if info else None):
+            return False
+        segments.append((gap["start"], gap["path"]))
+    segments.sort()
+
+    list_path = Path(chunks[0]["trimmed_path"]).with_name("concat.txt")
+    list_path.write_text("".join(f"file '{Path(path).resolve()}'\n" for _, path in segments))
+
+    joined_path = str(list_path.with_name("joined_noaudio.mp4"))
+    cmd = [
+        "ffmpeg", "-y",
+        "-f", "concat",
+        "-safe", "0",
+        "-i", str(list_path),
+        "-c", "copy",
+        joined_path,
+    ]
+
+    if verbose:
+        print(f"Joining {len(chunks)} chunks" + (f" and {len(gaps)} untouched spans..." if gaps else "..."))
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        if verbose:
+            print(f"Error joining chunks: {result.stderr[-500:]}", file=sys.stderr)
+        return False
+
+    if not decodes_cleanly(joined_path):
+        if verbose:
+            print("Error: Joined video does not decode cleanly", file=sys.stderr)
+        return False
+
+    if mux_audio_from_original(joined_path, original_video, output_path, verbose=verbose):
+        return True
+
+    # Fallback: keep video without audio
+    shutil.move(joined_path, output_path)
+    if verbose:
+        print(f"  Warning: Could not restore audio, output has no audio", file=sys.stderr)
+    return True
+
+
+def process_chunks_pipelined(
+    input_path: str,
+    chunks: list[dict],
+    process_chunk,
+    prefetch: int = 1,
+    verbose: bool = True,
+    extract=extract_chunk,
+    on_update=None,
+    trim_size: tuple[int, int] | None = None,
+    trim_fps: float | None = None,
+) -> bool:
+    """Extract, inpaint and trim planned chunks as overlapping pipeline stages.
+
+    A producer thread extracts chunk N+1 while process_chunk (the GPU stage)
+    runs on chunk N in the calling thread. Each inpainted chunk is handed to a
+    trim worker as soon as it finishes, so the final join is a stream copy.
+
+    process_chunk(chunk) must set chunk["output_path"] and return True on success.
+    extract(input_path, chunk, verbose=...) defaults to a full re-encode (extract_chunk).
+
+    Each chunk's "status" moves through extracted -> inpainted -> done, and
+    on_update(chunk) is called after every change (e.g. to save a run
+    manifest). Stages whose results are already on disk are skipped, so a
+    resumed run only redoes the missing work. trim_size and trim_fps are passed
+    to trim_chunk.
+    """
+    ready = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def mark(chunk: dict, status: str):
+        chunk["status"] = status
+        if on_update:
+            on_update(chunk)
+
+    def is_inpainted(chunk: dict) -> bool:
+        return chunk.get("status") == "inpainted" and bool(chunk.get("output_path")) \
+            and Path(chunk["output_path"]).exists()
+
+    def produce():
+        for chunk in chunks:
+            if stop.is_set():
+                return
+            if is_inpainted(chunk) or (chunk.get("status") == "extracted" and Path(chunk["input_path"]).exists()):
+                ok = True
+            else:
+                ok = extract(input_path, chunk, verbose=verbose)
+                if ok:
+                    mark(chunk, "extracted")
+            ready.put((chunk, ok))
+            if not ok:
+                return
+
+    def trim(chunk: dict) -> bool:
+        ok = trim_chunk(chunk, verbose, size=trim_size, fps=trim_fps)
+        if ok:
+            mark(chunk, "done")
+        return ok
+
+    producer = threading.Thread(target=produce, name="dewatermark-extract", daemon=True)
+    producer.start()
+
+    success = True
+    trims = []
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="dewatermark-trim") as trimmer:
+        for _ in chunks:
+            chunk, ok = ready.get()
+            if not ok:
+                success = False
+                break
+
+            if verbose:
+                print(f"\n--- Chunk {chunk['index']+1} ({chunk['start']:.1f}s - {chunk['end']:.1f}s) ---")
+
+            if is_inpainted(chunk):
+                if verbose:
+                    print("  Already inpainted, skipping")
+            elif process_chunk(chunk):
+                mark(chunk, "inpainted")
+            else:
+                print(f"Error: Failed to process chunk {chunk['index']}", file=sys.stderr)
+                success = False
+                break
+
+            # Extracted input is no longer needed once inpainted
+            Path(chunk["input_path"]).unlink(missing_ok=True)
+            trims.append(trimmer.submit(trim, chunk))
+
+        if not success:
+            # Unblock the producer so it can exit
+            stop.set()
+            while producer.is_alive():
+                try:
+                    ready.get(timeout=0.5)
+                except queue.Empty:
+                    pass
+
+        if not all(t.result() for t in trims):
+            success = False
+
+    producer.join()
+    return success
+
+
+# Run manifest: lets an interrupted chunked run resume (--resume) instead of
+# splitting and inpainting every chunk again.
+RUN_MANIFEST_NAME = "manifest.json"
+_manifest_lock = threading.RLock()  # Also held while worker threads update chunk entries
+
+
+def default_run_dir(output_path: str) -> Path:
+    """Working directory for a run, kept next to the output so it can be resumed."""
+    output = Path(output_path)
+    return output.parent / f".{output.stem}.dewatermark-run"
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str) -> dict:
+    """Cheap identity of a source file (path, size, mtime)."""
+    stat = Path(path).stat()
+    return {"path": str(Path(path).resolve()), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def save_run_manifest(run_dir: Path, manifest: dict) -> None:
+    """Atomically write the run manifest (safe to call from worker threads)."""
+    with _manifest_lock:
+        manifest["updated_at"] = time.time()
+        temp_path = Path(run_dir) / f"{RUN_MANIFEST_NAME}.tmp"
+        temp_path.write_text(json.dumps(manifest, indent=2))
+        os.replace(temp_path, Path(run_dir) / RUN_MANIFEST_NAME)
+
+
+def load_run_manifest(run_dir: Path, source: dict, settings: dict, verbose: bool = True) -> dict | None:
+    """Load a previous run's manifest if it was made for the same source and settings.
+
+    Chunks whose extracted input no longer matches its recorded hash are
+    reset to pending.
+    """
+    manifest_path = Path(run_dir) / RUN_MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if manifest.get("source") != source or manifest.get("settings") != settings:
+        if verbose:
+            print("Previous run used a different input or settings, starting fresh", file=sys.stderr)
+        return None
+
+    for chunk in manifest.get("chunks", []):
+        if chunk.get("status") == "extracted":
+            input_path = chunk.get("input_path")
+            if not input_path or not Path(input_path).exists() or hash_file(input_path) != chunk.get("input_hash"):
+                chunk["status"] = "pending"
+
+    return manifest
+
+
+def prepare_run_dir(run_dir: Path, source: dict, resume: bool, verbose: bool = True) -> dict | None:
+    """Create a run directory, returning the previous run's manifest when resuming.
+
+    Intermediates are only kept if the manifest left in run_dir was made for
+    the same source file; otherwise (or without resume) run_dir is emptied.
+    """
+    run_dir = Path(run_dir)
+    manifest = None
+    if resume:
+        try:
+            manifest = json.loads((run_dir / RUN_MANIFEST_NAME).read_text())
+        except (OSError, json.JSONDecodeError):
+            manifest = None
+        if manifest is not None and manifest.get("source") != source:
+            if verbose:
+                print("Input changed since the previous run, starting fresh", file=sys.stderr)
+            manifest = None
+    if manifest is None:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    run_dir.mkdir(parents=True, exist_ok=True)
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Remove watermarks using AI inpainting (ProPainter)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Remove NotebookLM watermark (bottom-right corner)
+  python tools/dewatermark.py --input video.mp4 --region 1080,660,195,40 --output clean.mp4
+
+  # Use higher quality (slower)
+  python tools/dewatermark.py --input video.mp4 --region 1080,660,195,40 --output clean.mp4 --fp32
+
+  # Install ProPainter
+  python tools/dewatermark.py --install
+        """,
+    )
+
+    # Main arguments
+    parser.add_argument(
+        "--input", "-i",
+        type=str,
+        help="Input video file path",
+    )
+    parser.add_argument(
+        "--output", "-o",
+        type=str,
+        help="Output video file path",
+    )
+    parser.add_argument(
+        "--region", "-r",
+        type=str,
+        help="Watermark region as x,y,width,height (e.g., 1100,650,150,50)",
+    )
+    parser.add_argument(
+        "--preset", "-p",
+        type=str,
+        choices=list(WATERMARK_PRESETS.keys()),
+        help=f"Use preset watermark region: {', '.join(WATERMARK_PRESETS.keys())}",
+    )
+    parser.add_argument(
+        "--mask", "-m",
+        type=str,
+        help="Custom mask image (white=remove, black=keep)",
+    )
+
+    # Quality/performance options
+    parser.add_argument(
+        "--fp32",
+        action="store_true",
+        help="Use fp32 precision (higher quality, more memory)",
     )
     parser.add_argument(
         "--neighbor-length",
@@ -552,6 +1191,47 @@ Examples:
         default=5.0,
         help="Overlap duration in seconds between chunks (default: 5.0)",
     )
+    parser.add_argument(
+        "--reencode-chunks",
+        action="store_true",
+        help="Re-encode every chunk when auto-splitting (default: keyframe-aligned stream copy)",
+    )
+    parser.add_argument(
+        "--roi",
+        action="store_true",
+        help="Inpaint only a padded crop around the mask and composite it back "
+             "(much less memory; long videos rarely need splitting or resize-ratio < 1.0)",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Inpaint each run of identical frames once and repeat the result (slides, screencasts). "
+             "Frames are compared around the mask, and only the inpainted patch is repeated. Needs numpy",
+    )
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEDUP_THRESHOLD,
+        help=f"Mean pixel difference (0-255) below which --dedup treats frames as identical (default: {DEDUP_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--gate",
+        action="store_true",
+        help="Detect when the watermark is visible and inpaint only those spans; "
+             "the rest is copied without re-encoding where possible. Needs numpy",
+    )
+    parser.add_argument(
+        "--gate-threshold",
+        type=float,
+        default=GATE_THRESHOLD,
+        help=f"Match score (0-1) against the watermark's appearance that counts as visible for --gate (default: {GATE_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--gate-padding",
+        type=float,
+        default=GATE_PADDING,
+        help=f"Seconds also inpainted before and after each --gate interval (default: {GATE_PADDING})",
+    )
 
     # Installation/status
     parser.add_argument(
@@ -581,6 +1261,17 @@ Examples:
         action="store_true",
         help="Show what would be done without processing",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted chunked run, skipping finished chunks and reattaching to running RunPod jobs",
+    )
+    parser.add_argument(
+        "--calibrate",
+        action="store_true",
+        help="Measure ProPainter's peak memory on synthetic clips and save a per-device model "
+             "used for chunk sizing (with --runpod: calibrates a RunPod worker's GPU)",
+    )
     parser.add_argument(
         "--keep-temp",
         action="store_true",
@@ -611,6 +1302,12 @@ Examples:
         choices=["AMPERE_16", "AMPERE_24", "ADA_24", "AMPERE_48", "ADA_48_PRO", "AMPERE_80"],
         help="GPU type for RunPod endpoint (default: AMPERE_24 = RTX 3090)",
     )
+    parser.add_argument(
+        "--setup-workers",
+        type=int,
+        default=1,
+        help="Max workers for a new RunPod endpoint (default: 1; raise to run --chunk jobs in parallel)",
+    )
     parser.add_argument(
         "--resize-ratio",
         type=str,
@@ -624,14 +1321,24 @@ Examples:
     )
     parser.add_argument(
         "--upscale",
-        action="store_true",
-        help="Upscale output to original resolution using FFmpeg lanczos (useful with resize-ratio < 1.0)",
+        nargs="?",
+        const="lanczos",
+        choices=["lanczos", "realesrgan"],
+        help="Upscale output to original resolution (useful with resize-ratio < 1.0): FFmpeg lanczos "
+             "(default), or realesrgan for AI upscaling on the upscale RunPod endpoint",
     )
     parser.add_argument(
         "--chunk",
         type=int,
         metavar="SECONDS",
-        help="Process video in chunks of N seconds (for long videos that OOM even at 0.5). Chunks are auto-joined.",
+        help="Process video in chunks of N seconds (for long videos that OOM even at 0.5). "
+             "With --runpod, chunks run as concurrent jobs and are auto-joined.",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=4,
+        help="Max concurrent RunPod jobs in --chunk mode (default: 4)",
     )
 
     return parser.parse_args()
@@ -837,24 +1544,10 @@ def install_propainter(propainter_path: Path, verbose: bool = True) -> bool:
 
 
 def get_video_dimensions(video_path: str) -> tuple[int, int] | None:
-    """Get video width and height using ffprobe."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-select_streams", "v:0",
-                "-show_entries", "stream=width,height",
-                "-of", "csv=p=0",
-                video_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            parts = result.stdout.strip().split(",")
-            return int(parts[0]), int(parts[1])
-    except Exception:
-        pass
+    """Get video width and height from the shared probe cache."""
+    stream = media_probe.get_stream(video_path, "video")
+    if stream and stream.get("width") and stream.get("height"):
+        return int(stream["width"]), int(stream["height"])
     return None
 
 
@@ -871,35 +1564,849 @@ def create_mask_from_region(
             print(f"Error: Region must be x,y,width,height (got {len(parts)} values)", file=sys.stderr)
             return False
 
-        x, y, w, h = parts
+        x, y, w, h = parts
+
+        # Validate bounds
+        if x < 0 or y < 0 or w <= 0 or h <= 0:
+            print(f"Error: Invalid region values (must be positive)", file=sys.stderr)
+            return False
+        if x + w > video_width or y + h > video_height:
+            print(f"Error: Region exceeds video dimensions ({video_width}x{video_height})", file=sys.stderr)
+            return False
+
+        # Create mask using ffmpeg (black background, white rectangle)
+        result = subprocess.run(
+            [
+                "ffmpeg", "-y",
+                "-f", "lavfi",
+                "-i", f"color=black:s={video_width}x{video_height}:d=1",
+                "-vf", f"drawbox=x={x}:y={y}:w={w}:h={h}:c=white:t=fill",
+                "-frames:v", "1",
+                output_path,
+            ],
+            capture_output=True,
+            text=True,
+        )
+
+        return result.returncode == 0
+
+    except ValueError as e:
+        print(f"Error: Invalid region format: {e}", file=sys.stderr)
+        return False
+
+
+# Region-of-interest (ROI) mode: inpaint only a padded crop around the mask
+# and composite the patch back onto the untouched original frames.
+ROI_MIN_PADDING = 64       # Minimum context (px) on each side for flow propagation
+ROI_PADDING_FACTOR = 0.5   # Context as a fraction of the mask's larger side
+ROI_MIN_SIZE = 256         # RAFT flow needs a reasonably sized crop
+ROI_PATCH_MARGIN = 8       # Composite slightly beyond the mask (ProPainter dilates it)
+ROI_MAX_AREA_FRACTION = 0.6  # Above this, cropping saves too little to be worth it
+
+
+def get_mask_bbox(mask_path: str) -> tuple[int, int, int, int] | None:
+    """Get the bounding box (x, y, w, h) of the white area in a mask image."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-i", mask_path, "-vf", "bbox", "-f", "null", "-"],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        matches = re.findall(r"x1:(\d+) x2:(\d+) y1:(\d+) y2:(\d+)", result.stderr)
+        if not matches:
+            return None
+        x1, x2, y1, y2 = (int(v) for v in matches[-1])
+        return x1, y1, x2 - x1 + 1, y2 - y1 + 1
+    except Exception:
+        return None
+
+
+def calculate_roi(
+    bbox: tuple[int, int, int, int],
+    video_width: int,
+    video_height: int,
+) -> dict | None:
+    """Calculate a padded, 8-aligned crop around a mask bounding box.
+
+    Returns dict with the crop (x, y, w, h) and the patch to composite back
+    (patch_x, patch_y, patch_w, patch_h, relative to the crop), or None when
+    the crop would cover most of the frame anyway.
+    """
+    bx, by, bw, bh = bbox
+    padding = max(ROI_MIN_PADDING, int(max(bw, bh) * ROI_PADDING_FACTOR))
+
+    def span(start: int, length: int, limit: int) -> tuple[int, int]:
+        size = max(length + 2 * padding, ROI_MIN_SIZE)
+        size = min(-(-size // 8) * 8, limit - limit % 8)
+        origin = start + length // 2 - size // 2
+        origin = max(0, min(origin, limit - size))
+        return origin, size
+
+    x, w = span(bx, bw, video_width)
+    y, h = span(by, bh, video_height)
+
+    if w * h > video_width * video_height * ROI_MAX_AREA_FRACTION:
+        return None
+
+    patch_x = max(bx - ROI_PATCH_MARGIN, x)
+    patch_y = max(by - ROI_PATCH_MARGIN, y)
+    patch_w = min(bx + bw + ROI_PATCH_MARGIN, x + w) - patch_x
+    patch_h = min(by + bh + ROI_PATCH_MARGIN, y + h) - patch_y
+
+    return {
+        "x": x, "y": y, "w": w, "h": h,
+        "patch_x": patch_x - x, "patch_y": patch_y - y,
+        "patch_w": patch_w, "patch_h": patch_h,
+    }
+
+
+def crop_to_roi(input_path: str, output_path: str, roi: dict, verbose: bool = True) -> bool:
+    """Crop a video or mask image to the ROI (video is re-encoded, audio dropped)."""
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", input_path,
+        "-vf", f"crop={roi['w']}:{roi['h']}:{roi['x']}:{roi['y']}",
+    ]
+    if Path(output_path).suffix.lower() == ".mp4":
+        # Re-encode so fps metadata is preserved for ProPainter's reader
+        cmd.extend(["-an", "-c:v", "libx264", "-preset", "fast", "-crf", "18"])
+    cmd.append(output_path)
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        if verbose:
+            print(f"Error cropping to ROI: {result.stderr[-500:]}", file=sys.stderr)
+        return False
+    return True
+
+
+def composite_roi(
+    original_video: str,
+    inpainted_roi: str,
+    roi: dict,
+    output_path: str,
+    verbose: bool = True,
+) -> bool:
+    """Overlay the inpainted patch onto the original frames, keeping original audio."""
+    patch = (
+        f"[1:v]scale={roi['w']}:{roi['h']}:flags=lanczos,"
+        f"crop={roi['patch_w']}:{roi['patch_h']}:{roi['patch_x']}:{roi['patch_y']}[patch];"
+        f"[0:v][patch]overlay={roi['x'] + roi['patch_x']}:{roi['y'] + roi['patch_y']}:eof_action=pass[outv]"
+    )
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", original_video,
+        "-i", inpainted_roi,
+        "-filter_complex", patch,
+        "-map", "[outv]",
+        "-map", "0:a?",
+        "-c:v", "libx264",
+        "-preset", "medium",
+        "-crf", "18",
+        "-c:a", "copy",
+        output_path,
+    ]
+
+    if verbose:
+        print(f"Compositing {roi['w']}x{roi['h']} ROI back onto original frames...", file=sys.stderr)
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        if verbose:
+            print(f"Error compositing ROI: {result.stderr[-500:]}", file=sys.stderr)
+        return False
+    return True
+
+
+def plan_roi(mask_path: str, video_width: int, video_height: int) -> dict | None:
+    """Plan an ROI crop from a full-frame mask image (None = use full frame)."""
+    bbox = get_mask_bbox(mask_path)
+    if not bbox:
+        return None
+    return calculate_roi(bbox, video_width, video_height)
+
+
+# =============================================================================
+# Static-frame deduplication
+# =============================================================================
+
+DEDUP_THRESHOLD = 1.0              # Mean abs difference (0-255 gray) below which frames are identical
+DEDUP_BLOCK_FACTOR = 8.0           # ...as long as no single block differs by more than threshold * this
+DEDUP_SIGNATURE_SIZE = 64          # The mask's neighbourhood is area-averaged to at most 64x64 blocks
+DEDUP_RING = 32                    # Context (px) around the mask that must also be unchanged
+DEDUP_MAX_UNIQUE_FRACTION = 0.8    # Above this, dropping duplicates saves too little to be worth it
+DEDUP_BATCH_BYTES = 64 * 1024 ** 2  # Raw frames decoded per vectorized batch
+
+
+def build_deduplicated_video(
+    video_path: str,
+    output_path: str,
+    bbox: tuple[int, int, int, int],
+    threshold: float = DEDUP_THRESHOLD,
+    verbose: bool = True,
+) -> dict | None:
+    """
+    Collapse runs of frames whose masked area is unchanged into one frame.
+
+    The video is decoded once. Each frame's signature is the mask's bounding
+    box (bbox) plus a DEDUP_RING margin, area-averaged to grayscale blocks, so
+    changes anywhere near the mark count however small they are. Frames are
+    compared, vectorized, against the previous frame and against their run's
+    first frame (so slow fades still start new runs); a frame starts a new
+    run if the mean block difference exceeds threshold or any block differs
+    by more than threshold * DEDUP_BLOCK_FACTOR. Only the first frame of each
+    run is encoded to output_path (same size and frame rate, no audio).
+
+    Returns {"runs": [[first_frame, length], ...], "frames", "unique", "width",
+    "height", "rate", "threshold", "bbox", "patch"}, where patch (x, y, w, h)
+    is the area expand_deduplicated_video() takes from the inpainted frames.
+    Returns None if numpy is missing, decoding fails, or too few frames repeat
+    for it to be worth it.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        if verbose:
+            print("numpy not installed, skipping frame deduplication (pip install numpy)", file=sys.stderr)
+        return None
+
+    info = get_video_info(video_path)
+    if not info or not info.get("width") or not info.get("height"):
+        return None
+
+    width, height = info["width"], info["height"]
+    rate = str(Fraction(info["fps"]).limit_denominator(1001))
+    frame_bytes = width * height * 3
+    batch_frames = max(1, DEDUP_BATCH_BYTES // frame_bytes)
+
+    bx, by, bw, bh = bbox
+    x0, y0 = max(0, bx - DEDUP_RING), max(0, by - DEDUP_RING)
+    x1, y1 = min(width, bx + bw + DEDUP_RING), min(height, by + bh + DEDUP_RING)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    # Block edges for area averaging (np.add.reduceat sums each block)
+    edges_y = np.linspace(0, y1 - y0, min(y1 - y0, DEDUP_SIGNATURE_SIZE) + 1).astype(int)
+    edges_x = np.linspace(0, x1 - x0, min(x1 - x0, DEDUP_SIGNATURE_SIZE) + 1).astype(int)
+    block_area = np.outer(np.diff(edges_y), np.diff(edges_x)).astype(np.float32) * 3
+
+    def signatures(frames):
+        region = frames[:, y0:y1, x0:x1].astype(np.float32)
+        sums = np.add.reduceat(np.add.reduceat(region, edges_y[:-1], axis=1), edges_x[:-1], axis=2)
+        return sums.sum(axis=3) / block_area
+
+    def differs(a, b):
+        diff = np.abs(a - b)
+        return (diff.mean(axis=(-2, -1)) > threshold) | (diff.max(axis=(-2, -1)) > threshold * DEDUP_BLOCK_FACTOR)
+
+    decoder = subprocess.Popen(
+        [
+            "ffmpeg", "-v", "error", "-i", video_path,
+            "-map", "0:v:0", "-fps_mode", "passthrough",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    encoder = subprocess.Popen(
+        [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", rate, "-i", "-",
+            "-c:v", "libx264", "-preset", "fast", "-crf", "18", "-pix_fmt", "yuv420p",
+            output_path,
+        ],
+        stdin=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+
+    runs = []
+    rep = prev = None
+    total = 0
+    try:
+        while True:
+            data = decoder.stdout.read(frame_bytes * batch_frames)
+            count = len(data) // frame_bytes
+            if not count:
+                break
+            frames = np.frombuffer(data, np.uint8, count * frame_bytes).reshape(count, height, width, 3)
+            sigs = signatures(frames)
+            prevs = np.concatenate([sigs[:1] if prev is None else prev[None], sigs[:-1]])
+            prev_differs = differs(sigs, prevs)
+
+            keep = np.zeros(count, dtype=bool)
+            for i in range(count):
+                if rep is None or prev_differs[i] or differs(sigs[i], rep):
+                    rep = sigs[i]
+                    keep[i] = True
+                    runs.append([total + i, 1])
+                else:
+                    runs[-1][1] += 1
+
+            if keep.any():
+                encoder.stdin.write(frames[keep].tobytes())
+            prev = sigs[-1]
+            total += count
+        encoder.stdin.close()
+    except (BrokenPipeError, OSError) as e:
+        if verbose:
+            print(f"Error deduplicating frames: {e}", file=sys.stderr)
+        decoder.kill()
+        encoder.kill()
+    finally:
+        decoder.stdout.close()
+        decoder.wait()
+        encoder.wait()
+
+    if decoder.returncode != 0 or encoder.returncode != 0 or not runs:
+        if verbose:
+            print("Error: Frame deduplication failed, processing all frames", file=sys.stderr)
+        Path(output_path).unlink(missing_ok=True)
+        return None
+
+    if verbose:
+        print(f"Static frames: {total} frames -> {len(runs)} unique ({100 * (1 - len(runs) / total):.0f}% fewer to inpaint)",
+              file=sys.stderr)
+
+    if len(runs) > total * DEDUP_MAX_UNIQUE_FRACTION:
+        if verbose:
+            print("  Too few repeated frames, processing all frames", file=sys.stderr)
+        Path(output_path).unlink(missing_ok=True)
+        return None
+
+    # ProPainter dilates the mask, so take a little more than the bbox back
+    patch_x, patch_y = max(0, bx - ROI_PATCH_MARGIN), max(0, by - ROI_PATCH_MARGIN)
+    patch_w = min(width, bx + bw + ROI_PATCH_MARGIN) - patch_x
+    patch_h = min(height, by + bh + ROI_PATCH_MARGIN) - patch_y
+
+    return {
+        "runs": runs,
+        "frames": total,
+        "unique": len(runs),
+        "width": width,
+        "height": height,
+        "rate": rate,
+        "threshold": threshold,
+        "bbox": list(bbox),
+        "patch": [patch_x, patch_y, patch_w, patch_h],
+    }
+
+
+def prepare_deduplicated_input(
+    video_path: str,
+    mask_path: str,
+    work_dir: str,
+    threshold: float = DEDUP_THRESHOLD,
+    resume: bool = False,
+    verbose: bool = True,
+) -> dict | None:
+    """Build (or, when resuming, reuse) work_dir/unique.mp4 for video_path.
+
+    mask_path must match video_path's frame size. A previous dedup.json is
+    only reused if it was made from the same file, mask area and threshold.
+    """
+    unique_path = Path(work_dir) / "unique.mp4"
+    runs_path = Path(work_dir) / "dedup.json"
+
+    bbox = get_mask_bbox(mask_path)
+    if not bbox:
+        if verbose:
+            print("Could not find the mask area, processing all frames", file=sys.stderr)
+        return None
+    source = file_fingerprint(video_path)
+
+    if resume and unique_path.exists() and runs_path.exists():
+        try:
+            dedup = json.loads(runs_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            dedup = {}
+        if dedup.get("threshold") == threshold and dedup.get("source") == source \
+                and dedup.get("bbox") == list(bbox):
+            if verbose:
+                print(f"Reusing deduplicated frames from previous run ({dedup['unique']}/{dedup['frames']})",
+                      file=sys.stderr)
+            return dedup
+
+    if verbose:
+        print("Detecting static frames...", file=sys.stderr)
+    dedup = build_deduplicated_video(video_path, str(unique_path), bbox, threshold, verbose)
+    if dedup:
+        dedup["source"] = source
+        dedup["unique_path"] = str(unique_path)
+        runs_path.write_text(json.dumps(dedup))
+    return dedup
+
+
+def expand_deduplicated_video(
+    video_path: str,
+    original_path: str,
+    output_path: str,
+    dedup: dict,
+    verbose: bool = True,
+) -> bool:
+    """Restore the full timeline from the inpainted unique frames in video_path.
+
+    Each original frame (from original_path, the video that was
+    deduplicated) keeps its own pixels; only the patch around the mask is
+    taken from its run's inpainted frame, as composite_roi() does.
+    """
+    import numpy as np
+
+    width, height = dedup["width"], dedup["height"]
+    patch_x, patch_y, patch_w, patch_h = dedup["patch"]
+    frame_bytes = width * height * 3
+
+    if verbose:
+        print(f"Expanding {dedup['unique']} inpainted frames back to {dedup['frames']}...", file=sys.stderr)
+
+    def raw_frames(path: str, scale: bool) -> subprocess.Popen:
+        return subprocess.Popen(
+            [
+                "ffmpeg", "-v", "error", "-i", path,
+                "-map", "0:v:0", "-fps_mode", "passthrough",
+                # The inpainted video may come back downscaled (resize_ratio < 1.0)
+                *(["-vf", f"scale={width}:{height}:flags=lanczos"] if scale else []),
+                "-f", "rawvideo", "-pix_fmt", "rgb24", "-",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    inpainted = raw_frames(video_path, scale=True)
+    original = raw_frames(original_path, scale=False)
+    encoder = subprocess.Popen(
+        [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", dedup["rate"], "-i", "-",
+            "-c:v", "libx264", "-preset", "medium", "-crf", "18", "-pix_fmt", "yuv420p",
+            output_path,
+        ],
+        stdin=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+
+    patch = None
+    written = 0
+    try:
+        for _, length in dedup["runs"]:
+            data = inpainted.stdout.read(frame_bytes)
+            if len(data) == frame_bytes:
+                frame = np.frombuffer(data, np.uint8).reshape(height, width, 3)
+                patch = frame[patch_y:patch_y + patch_h, patch_x:patch_x + patch_w].copy()
+            elif patch is None:
+                break
+            # If the inpainted video is short a frame, hold the last patch
+            for _ in range(length):
+                data = original.stdout.read(frame_bytes)
+                if len(data) != frame_bytes:
+                    break
+                frame = np.frombuffer(data, np.uint8).reshape(height, width, 3).copy()
+                frame[patch_y:patch_y + patch_h, patch_x:patch_x + patch_w] = patch
+                encoder.stdin.write(frame.tobytes())
+                written += 1
+        encoder.stdin.close()
+    except (BrokenPipeError, OSError) as e:
+        if verbose:
+            print(f"Error expanding frames: {e}", file=sys.stderr)
+        encoder.kill()
+    finally:
+        for decoder in (inpainted, original):
+            decoder.stdout.close()
+            decoder.kill()
+            decoder.wait()
+        encoder.wait()
+
+    if written != dedup["frames"] or encoder.returncode != 0:
+        if verbose:
+            print("Error: Failed to expand deduplicated video", file=sys.stderr)
+        return False
+    return True
+
+
+# =============================================================================
+# Temporal watermark gating
+# =============================================================================
+
+GATE_THRESHOLD = 0.4      # Edge correlation with the reference patch that counts as "mark visible"
+GATE_PADDING = 1.0        # Seconds also inpainted before/after each detected interval
+GATE_SAMPLE_FPS = 5       # Presence is scored on this many frames per second
+GATE_RING = 16            # Context (px) around the mask, to tell the mark from busy backgrounds
+GATE_MAX_COVERAGE = 0.9   # Above this fraction of the runtime, gating saves too little
+GATE_MIN_AGREEMENT = 0.5  # Edge correlation between references built from two halves of the matching samples
+GATE_REFERENCE_SAMPLES = 200
+GATE_BATCH_FRAMES = 256
+
+
+def detect_watermark_intervals(
+    video_path: str,
+    mask_path: str,
+    threshold: float = GATE_THRESHOLD,
+    padding: float = GATE_PADDING,
+    verbose: bool = True,
+) -> dict | None:
+    """
+    Find the time intervals in which the watermark is visible.
+
+    Frames are sampled at GATE_SAMPLE_FPS and cropped to the mask's bounding
+    box plus a small ring. Each sample's edge map inside the mask is
+    correlated with a reference patch: the median edge map of the samples
+    whose edges stand out most against the ring, i.e. where the mark is most
+    clearly visible, rebuilt from the samples that match it. The reference is
+    only trusted if references built from either half of those samples
+    correlate by at least GATE_MIN_AGREEMENT. Samples scoring at least
+    threshold are grouped into intervals, padded, and widened to keyframes so
+    their chunks can be stream-copied.
+
+    Returns {"intervals": [[start, end], ...]} (intervals may be
+    empty), or None if numpy is missing, detection fails, no consistent mark
+    is found, or the mark is visible for nearly the whole video.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        if verbose:
+            print("numpy not installed, skipping watermark gating (pip install numpy)", file=sys.stderr)
+        return None
+
+    info = get_video_info(video_path)
+    bbox = get_mask_bbox(mask_path)
+    if not info or not bbox:
+        return None
+
+    bx, by, bw, bh = bbox
+    x0, y0 = max(0, bx - GATE_RING), max(0, by - GATE_RING)
+    x1, y1 = min(info["width"], bx + bw + GATE_RING), min(info["height"], by + bh + GATE_RING)
+    w, h = x1 - x0, y1 - y0
+    crop = f"crop={w}:{h}:{x0}:{y0},format=gray"
+
+    mask_raw = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", mask_path, "-vf", crop, "-frames:v", "1", "-f", "rawvideo", "-"],
+        capture_output=True,
+    )
+    if mask_raw.returncode != 0 or len(mask_raw.stdout) != w * h:
+        return None
+    # Edge maps are one pixel smaller than the crop (forward differences)
+    inside = (np.frombuffer(mask_raw.stdout, np.uint8).reshape(h, w) > 127)[:-1, :-1]
+    ring = ~inside
+    if not inside.any() or not ring.any():
+        return None
+
+    if verbose:
+        print("Scanning for watermark presence...", file=sys.stderr)
+
+    decoder = subprocess.Popen(
+        [
+            "ffmpeg", "-v", "error", "-i", video_path,
+            "-map", "0:v:0", "-vf", f"fps={GATE_SAMPLE_FPS},{crop}",
+            "-f", "rawvideo", "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    edges, contrast = [], []
+    while True:
+        data = decoder.stdout.read(w * h * GATE_BATCH_FRAMES)
+        count = len(data) // (w * h)
+        if not count:
+            break
+        frames = np.frombuffer(data, np.uint8, count * w * h).reshape(count, h, w).astype(np.float32)
+        e = np.abs(np.diff(frames, axis=2))[:, :-1, :] + np.abs(np.diff(frames, axis=1))[:, :, :-1]
+        edges.append(e[:, inside].astype(np.float16))
+        contrast.append(e[:, inside].mean(axis=1) / (e[:, ring].mean(axis=1) + 1.0))
+    decoder.stdout.close()
+    decoder.wait()
+    if decoder.returncode != 0 or not edges:
+        return None
+
+    edges = np.concatenate(edges)
+    contrast = np.concatenate(contrast)
+
+    def reference_from(samples):
+        reference = np.median(edges[samples].astype(np.float32), axis=0)
+        reference -= reference.mean()
+        return reference / (np.linalg.norm(reference) + 1e-6)
+
+    def score(reference):
+        scores = np.empty(len(edges), dtype=np.float32)
+        for i in range(0, len(edges), GATE_BATCH_FRAMES):
+            x = edges[i:i + GATE_BATCH_FRAMES].astype(np.float32)
+            x -= x.mean(axis=1, keepdims=True)
+            scores[i:i + GATE_BATCH_FRAMES] = (x @ reference) / (np.linalg.norm(x, axis=1) + 1e-6)
+        return scores
+
+    # Reference: where the mark stands out most, its edges dominate the median
+    top = np.argsort(contrast)[-max(1, min(GATE_REFERENCE_SAMPLES, len(contrast) // 10)):]
+    scores = score(reference_from(top))
+    # Rebuild it from the samples that matched, in case the mark is visible in
+    # fewer than 10% of them. Without a visible mark the reference is just busy
+    # background, and the few samples that match it only match themselves:
+    # references built from two halves of them must agree.
+    matched = np.flatnonzero(scores >= threshold)
+    top = matched[np.argsort(contrast[matched])[-GATE_REFERENCE_SAMPLES:]]
+    agreement = float(reference_from(top[0::2]) @ reference_from(top[1::2])) if len(top) >= 2 else 0.0
+    if agreement < GATE_MIN_AGREEMENT:
+        if verbose:
+            print("  No consistent watermark found in the mask area, processing the whole video", file=sys.stderr)
+        return None
+    scores = score(reference_from(top))
+
+    duration = info["duration"]
+    step = 1.0 / GATE_SAMPLE_FPS
+    intervals = []
+    for i in np.flatnonzero(scores >= threshold):
+        start, end = max(0.0, i * step - padding), min(duration, (i + 1) * step + padding)
+        if intervals and start <= intervals[-1][1]:
+            intervals[-1][1] = end
+        else:
+            intervals.append([start, end])
+
+    # Widen to keyframes so each interval's chunks can be stream-copied
+    keyframe_info = get_keyframe_info(video_path)
+    if keyframe_info:
+        keyframes = keyframe_info["keyframes"]
+        snapped = []
+        for start, end in intervals:
+            before = bisect.bisect_right(keyframes, start + 1e-3) - 1
+            after = bisect.bisect_left(keyframes, end - 1e-3)
+            start = max(0.0, keyframes[before]) if before >= 0 else 0.0
+            end = keyframes[after] if after < len(keyframes) else duration
+            if snapped and start <= snapped[-1][1]:
+                snapped[-1][1] = max(snapped[-1][1], end)
+            else:
+                snapped.append([start, end])
+        intervals = snapped
+
+    covered = sum(end - start for start, end in intervals)
+    if verbose:
+        print(f"Watermark visible in {len(intervals)} interval(s), {covered:.1f}s of {duration:.1f}s", file=sys.stderr)
+        for start, end in intervals:
+            print(f"  {start:.1f}s - {end:.1f}s", file=sys.stderr)
+
+    if duration and covered > duration * GATE_MAX_COVERAGE:
+        if verbose:
+            print("  Visible nearly throughout, processing the whole video", file=sys.stderr)
+        return None
+
+    return {"intervals": intervals}
+
+
+def plan_gated_chunks(
+    gating: dict,
+    duration: float,
+    chunk_duration: float | None,
+    overlap: float = 5.0,
+    output_dir: str = ".",
+) -> tuple[list[dict], list[dict]]:
+    """Plan chunks covering only the detected intervals, plus the gaps between them.
+
+    Intervals longer than chunk_duration are split with overlap like any
+    other video. Gaps are cut from the source and re-encoded in the final
+    join (see extract_gap).
+    """
+    chunks, gaps = [], []
+    cursor = 0.0
+
+    def add_gap(start: float, end: float):
+        gaps.append({
+            "start": start,
+            "end": end,
+            "path": str(Path(output_dir) / f"gap_{len(gaps):03d}.mp4"),
+        })
+
+    for start, end in gating["intervals"]:
+        if start - cursor > 1e-3:
+            add_gap(cursor, start)
+        span = end - start
+        if chunk_duration and span > chunk_duration:
+            planned = plan_chunks(span, chunk_duration, overlap, output_dir)
+        else:
+            planned = plan_chunks(span, span, 0.0, output_dir)
+        for chunk in planned:
+            chunk.update(
+                index=len(chunks),
+                input_path=str(Path(output_dir) / f"chunk_{len(chunks):03d}.mp4"),
+                start=chunk["start"] + start,
+                end=chunk["end"] + start,
+            )
+            chunks.append(chunk)
+        cursor = end
+
+    if duration - cursor > 1e-3:
+        add_gap(cursor, duration)
+
+    return chunks, gaps
+
+
+def extract_gap(input_path: str, gap: dict, verbose: bool = True, fps: float | None = None) -> bool:
+    """Cut a span that needs no inpainting (video only).
+
+    Re-encoded with join_segment_args so it can be joined to trimmed chunks
+    without mixing H.264 parameter sets.
+    """
+    cmd = [
+        "ffmpeg", "-y",
+        "-ss", str(gap["start"]),
+        "-i", input_path,
+        "-t", str(gap["end"] - gap["start"]),
+        "-map", "0:v:0",
+        *join_segment_args(fps),
+        gap["path"],
+    ]
+
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        if verbose:
+            print(f"Error cutting {gap['start']:.1f}s - {gap['end']:.1f}s: {result.stderr[-500:]}", file=sys.stderr)
+        return False
+    return True
+
+
+def propainter_command(
+    propainter_path: Path,
+    video_path: str,
+    mask_path: str,
+    output_dir: str,
+    fp16: bool = True,
+    neighbor_length: int = 10,
+    ref_stride: int = 10,
+    subvideo_length: int = 80,
+) -> list[str] | None:
+    """Build the ProPainter inference command (None if not installed)."""
+    venv_python = propainter_path / ".venv" / "bin" / "python"
+    inference_script = propainter_path / "inference_propainter.py"
+
+    if not venv_python.exists() or not inference_script.exists():
+        return None
+
+    cmd = [
+        str(venv_python),
+        str(inference_script),
+        "-i", video_path,
+        "-m", mask_path,
+        "-o", output_dir,
+        "--neighbor_length", str(neighbor_length),
+        "--ref_stride", str(ref_stride),
+        "--subvideo_length", str(subvideo_length),
+    ]
+
+    if fp16:
+        cmd.append("--fp16")
+
+    return cmd
+
+
+def _device_memory_used_gb(device: str, pid: int) -> float | None:
+    """Current memory use: GPU memory for CUDA, else the process's resident set."""
+    try:
+        if device == "cuda":
+            result = subprocess.run(
+                ["nvidia-smi", "--query-gpu=memory.used", "--format=csv,noheader,nounits"],
+                capture_output=True,
+                text=True,
+                timeout=10,
+            )
+            return int(result.stdout.strip().split("\n")[0]) / 1024
+        result = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)], capture_output=True, text=True, timeout=10)
+        return int(result.stdout.strip()) / (1024 ** 2)
+    except (ValueError, IndexError, OSError, subprocess.SubprocessError):
+        return None
+
+
+def measure_propainter_peak_gb(cmd: list[str], cwd: Path, device: str, poll_interval: float = 0.2) -> float | None:
+    """Run a ProPainter command and return its peak memory in GB (None if it failed)."""
+    baseline = _device_memory_used_gb(device, os.getpid()) if device == "cuda" else 0.0
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak = 0.0
+    while proc.poll() is None:
+        used = _device_memory_used_gb(device, proc.pid)
+        if used is not None:
+            peak = max(peak, used - (baseline or 0.0))
+        time.sleep(poll_interval)
+    return peak if proc.returncode == 0 and peak > 0 else None
+
+
+def calibrate_memory_model(
+    propainter_path: Path,
+    fp16: bool = True,
+    verbose: bool = True,
+) -> dict:
+    """
+    Fit a memory model for this machine by running ProPainter on synthetic clips.
+
+    Each run in CALIBRATION_RUNS is measured for peak memory (VRAM on NVIDIA,
+    process memory otherwise). The fitted model is saved under
+    MEMORY_MODEL_DIR and used by the planners from then on.
+    """
+    compute = detect_compute_device()
+    device_name = get_device_name(compute)
+    work_dir = Path(tempfile.mkdtemp(prefix="dewatermark_calibrate_"))
+    samples = []
+
+    if verbose:
+        print(f"Calibrating memory model for {device_name} ({len(CALIBRATION_RUNS)} runs)...", file=sys.stderr)
+
+    try:
+        for width, height, frames, subvideo_length, neighbor_length in CALIBRATION_RUNS:
+            clip = str(work_dir / f"clip_{width}x{height}_{frames}.mp4")
+            mask = str(work_dir / f"mask_{width}x{height}.png")
+            if not Path(clip).exists():
+                made = subprocess.run(
+                    [
+                        "ffmpeg", "-y", "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=25",
+                        "-frames:v", str(frames), "-c:v", "libx264", "-pix_fmt", "yuv420p", clip,
+                    ],
+                    capture_output=True,
+                    text=True,
+                )
+                region = f"{width // 3},{height // 3},{width // 3},{height // 6}"
+                if made.returncode != 0 or not create_mask_from_region(region, width, height, mask):
+                    return {"error": "Failed to create calibration clip (is ffmpeg installed?)"}
 
-        # Validate bounds
-        if x < 0 or y < 0 or w <= 0 or h <= 0:
-            print(f"Error: Invalid region values (must be positive)", file=sys.stderr)
-            return False
-        if x + w > video_width or y + h > video_height:
-            print(f"Error: Region exceeds video dimensions ({video_width}x{video_height})", file=sys.stderr)
-            return False
+            cmd = propainter_command(
+                propainter_path, clip, mask, str(work_dir / "results"), fp16,
+                neighbor_length=neighbor_length, ref_stride=10, subvideo_length=subvideo_length,
+            )
+            if not cmd:
+                return {"error": "ProPainter not installed. Run with --install first."}
 
-        # Create mask using ffmpeg (black background, white rectangle)
-        result = subprocess.run(
-            [
-                "ffmpeg", "-y",
-                "-f", "lavfi",
-                "-i", f"color=black:s={video_width}x{video_height}:d=1",
-                "-vf", f"drawbox=x={x}:y={y}:w={w}:h={h}:c=white:t=fill",
-                "-frames:v", "1",
-                output_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
+            peak = measure_propainter_peak_gb(cmd, propainter_path, compute["device"])
+            if verbose:
+                measured = f"{peak:.2f}GB" if peak else "failed"
+                print(f"  {width}x{height}, {frames} frames, subvideo={subvideo_length}, "
+                      f"neighbor={neighbor_length}: {measured}", file=sys.stderr)
+            if peak:
+                samples.append({
+                    "width": width, "height": height, "frames": frames,
+                    "subvideo_length": subvideo_length, "neighbor_length": neighbor_length,
+                    "peak_gb": round(peak, 3),
+                })
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    fitted = fit_memory_model(samples)
+    if not fitted:
+        return {"error": f"Only {len(samples)}/{len(CALIBRATION_RUNS)} calibration runs succeeded, cannot fit a model"}
+
+    model = {
+        "version": 1,
+        "device": device_name,
+        "memory_gb": compute["memory_gb"],
+        "precision": "fp16" if fp16 else "fp32",
+        "calibrated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **fitted,
+        "samples": samples,
+    }
+    path = memory_model_path(device_name, model["precision"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(model, indent=2))
 
-        return result.returncode == 0
+    if verbose:
+        print(f"Saved memory model: {path}", file=sys.stderr)
+        print(f"  base {model['base_gb']:.2f}GB + per megapixel: "
+              f"{model['gb_per_frame_mpx'] * 1024:.1f}MB/frame, "
+              f"{model['gb_per_subvideo_frame_mpx'] * 1024:.1f}MB/subvideo frame, "
+              f"{model['gb_per_neighbor_frame_mpx'] * 1024:.1f}MB/neighbor frame", file=sys.stderr)
 
-    except ValueError as e:
-        print(f"Error: Invalid region format: {e}", file=sys.stderr)
-        return False
+    return {"success": True, "model_path": str(path), "model": model}
 
 
 def run_propainter(
@@ -914,28 +2421,13 @@ def run_propainter(
     verbose: bool = True,
 ) -> str | None:
     """Run ProPainter inference."""
-
-    venv_python = propainter_path / ".venv" / "bin" / "python"
-    inference_script = propainter_path / "inference_propainter.py"
-
-    if not venv_python.exists() or not inference_script.exists():
+    cmd = propainter_command(
+        propainter_path, video_path, mask_path, output_dir, fp16, neighbor_length, ref_stride, subvideo_length
+    )
+    if not cmd:
         print("Error: ProPainter not properly installed", file=sys.stderr)
         return None
 
-    cmd = [
-        str(venv_python),
-        str(inference_script),
-        "-i", video_path,
-        "-m", mask_path,
-        "-o", output_dir,
-        "--neighbor_length", str(neighbor_length),
-        "--ref_stride", str(ref_stride),
-        "--subvideo_length", str(subvideo_length),
-    ]
-
-    if fp16:
-        cmd.append("--fp16")
-
     if verbose:
         print(f"Running ProPainter...")
         print(f"  Video: {video_path}")
@@ -974,6 +2466,20 @@ def run_propainter(
 # RunPod Cloud Processing
 # =============================================================================
 
+# Lower bound on RunPod inpainting time per second of 720p video, used to
+# space out status polls while a job runs (RTX 4090: ~5-10s per second)
+RUNPOD_SECONDS_PER_VIDEO_SECOND = 5.0
+
+
+def estimate_runpod_seconds(video_path: str) -> float | None:
+    """Rough lower bound on a dewatermark job's run time, scaled by frame area."""
+    info = get_video_info(video_path)
+    if not info or not info["duration"] or not info["width"] or not info["height"]:
+        return None
+    area_scale = (info["width"] * info["height"]) / (1280 * 720)
+    return info["duration"] * RUNPOD_SECONDS_PER_VIDEO_SECOND * area_scale
+
+
 def get_runpod_config() -> dict:
     """Get RunPod configuration from environment."""
     # Import here to avoid circular dependency and allow graceful failure
@@ -994,90 +2500,6 @@ def get_runpod_config() -> dict:
         }
 
 
-def _get_r2_client():
-    """Get boto3 S3 client configured for Cloudflare R2."""
-    sys.path.insert(0, str(Path(__file__).parent))
-    try:
-        from config import get_r2_config
-        r2_config = get_r2_config()
-    except ImportError:
-        r2_config = None
-
-    if not r2_config:
-        return None, None
-
-    try:
-        import boto3
-        from botocore.config import Config
-
-        client = boto3.client(
-            "s3",
-            endpoint_url=r2_config["endpoint_url"],
-            aws_access_key_id=r2_config["access_key_id"],
-            aws_secret_access_key=r2_config["secret_access_key"],
-            config=Config(signature_version="s3v4"),
-        )
-        return client, r2_config
-    except ImportError:
-        print("  boto3 not installed, skipping R2", file=sys.stderr)
-        return None, None
-
-
-def _upload_to_r2(file_path: str, file_name: str) -> tuple[str | None, str | None]:
-    """
-    Upload to Cloudflare R2 and return presigned download URL.
-
-    Returns (url, object_key) tuple. object_key is needed for cleanup.
-    """
-    client, config = _get_r2_client()
-    if not client:
-        return None, None
-
-    import uuid
-    object_key = f"dewatermark/{uuid.uuid4().hex[:8]}_{file_name}"
-
-    try:
-        client.upload_file(file_path, config["bucket_name"], object_key)
-
-        # Generate presigned URL (valid for 2 hours)
-        url = client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": config["bucket_name"], "Key": object_key},
-            ExpiresIn=7200,
-        )
-        return url, object_key
-    except Exception as e:
-        print(f"  R2 upload error: {e}", file=sys.stderr)
-        return None, None
-
-
-def _delete_from_r2(object_key: str) -> bool:
-    """Delete object from R2 after job completion."""
-    client, config = _get_r2_client()
-    if not client or not object_key:
-        return False
-
-    try:
-        client.delete_object(Bucket=config["bucket_name"], Key=object_key)
-        return True
-    except Exception:
-        return False
-
-
-def _download_from_r2(object_key: str, output_path: str) -> bool:
-    """Download object from R2 to local path."""
-    client, config = _get_r2_client()
-    if not client:
-        return False
-
-    try:
-        client.download_file(config["bucket_name"], object_key, output_path)
-        return True
-    except Exception as e:
-        print(f"  R2 download error: {e}", file=sys.stderr)
-        return False
-
-
 def upload_to_runpod_storage(file_path: str, api_key: str) -> tuple[str | None, str | None]:
     """
     Upload a file to temporary storage for job input.
@@ -1091,7 +2513,7 @@ def upload_to_runpod_storage(file_path: str, api_key: str) -> tuple[str | None,
     print(f"Uploading {file_name} ({file_size // (1024*1024)}MB)...", file=sys.stderr)
 
     # Try R2 first if configured
-    url, r2_key = _upload_to_r2(file_path, file_name)
+    url, r2_key = upload_cache.upload_input(file_path, "dewatermark")
     if url:
         print(f"  Upload complete (R2): {url[:60]}...", file=sys.stderr)
         return url, r2_key
@@ -1220,6 +2642,12 @@ def submit_runpod_job(
     if mask_url:
         payload["input"]["mask_url"] = mask_url
 
+    # Calibrated models (--calibrate --runpod); the worker uses the one for its
+    # GPU. Dewatermark jobs run at the worker's default fp16.
+    memory_models = load_runpod_memory_models("fp16")
+    if memory_models:
+        payload["input"]["memory_models"] = memory_models
+
     # Pass R2 credentials for result upload (if configured)
     if r2_config:
         payload["input"]["r2"] = {
@@ -1230,12 +2658,7 @@ def submit_runpod_job(
         }
 
     try:
-        response = requests.post(
-            url,
-            json=payload,
-            headers={"Authorization": f"Bearer {api_key}"},
-            timeout=30,
-        )
+        response = runpod_api.post(url, api_key, json=payload)
 
         if response.status_code == 200:
             return response.json()
@@ -1254,29 +2677,32 @@ def poll_runpod_job(
     api_key: str,
     job_id: str,
     timeout: int = 1800,
-    poll_interval: int = 5,
+    poll_interval: float = 15,
+    expected_seconds: float | None = None,
     verbose: bool = True,
 ) -> dict | None:
-    """Poll RunPod job until completion or timeout."""
+    """Poll RunPod job until completion or timeout.
+
+    Polls fast after submission and after each status change, backing off to
+    every poll_interval seconds (see runpod_api.PollSchedule).
+    """
     url = f"https://api.runpod.ai/v2/{endpoint_id}/status/{job_id}"
     start_time = time.time()
     last_status = None
+    schedule = runpod_api.PollSchedule(expected_seconds, max_interval=poll_interval)
 
     while time.time() - start_time < timeout:
         try:
-            response = requests.get(
-                url,
-                headers={"Authorization": f"Bearer {api_key}"},
-                timeout=30,
-            )
+            response = runpod_api.get(url, api_key)
 
             if response.status_code != 200:
                 print(f"Status check failed: HTTP {response.status_code}", file=sys.stderr)
-                time.sleep(poll_interval)
+                time.sleep(schedule.next_interval())
                 continue
 
             data = response.json()
             status = data.get("status")
+            schedule.observe(status)
 
             # Log status changes
             if verbose and status != last_status:
@@ -1290,14 +2716,14 @@ def poll_runpod_job(
                 print(f"Job failed: {data.get('error', 'Unknown error')}", file=sys.stderr)
                 return data
             elif status in ["IN_QUEUE", "IN_PROGRESS"]:
-                time.sleep(poll_interval)
+                time.sleep(schedule.next_interval())
             else:
                 # Unknown status
-                time.sleep(poll_interval)
+                time.sleep(schedule.next_interval())
 
         except Exception as e:
             print(f"Status check error: {e}", file=sys.stderr)
-            time.sleep(poll_interval)
+            time.sleep(schedule.next_interval())
 
     print(f"Job timed out after {timeout}s", file=sys.stderr)
     return None
@@ -1390,8 +2816,33 @@ def upscale_video(
     target_width: int,
     target_height: int,
     verbose: bool = True,
+    engine: str = "lanczos",
 ) -> bool:
-    """Upscale video to target resolution using FFmpeg lanczos filter."""
+    """Upscale video to target resolution using FFmpeg lanczos filter.
+
+    engine="realesrgan" upscales with Real-ESRGAN on the upscale endpoint
+    (tools/upscale.py) instead, falling back to lanczos if that fails.
+    """
+    if engine == "realesrgan":
+        import upscale as upscale_tool
+
+        stream = media_probe.get_stream(input_path, "video")
+        width = int(stream["width"]) if stream else target_width
+        scale = 2 if target_width <= width * 2 else 4
+        if verbose:
+            print(f"  Upscaling to {target_width}x{target_height} with Real-ESRGAN ({scale}x)...", file=sys.stderr)
+        result = upscale_tool.process_with_runpod(
+            input_path,
+            output_path,
+            scale=scale,
+            verbose=verbose,
+            output_size=(target_width, target_height),
+        )
+        if not result.get("error"):
+            return True
+        if verbose:
+            print(f"  Real-ESRGAN upscale failed ({result['error']}), using lanczos", file=sys.stderr)
+
     try:
         if verbose:
             print(f"  Upscaling to {target_width}x{target_height}...", file=sys.stderr)
@@ -1422,52 +2873,363 @@ def upscale_video(
         return False
 
 
-def mux_audio_from_original(
-    video_no_audio: str,
-    original_video: str,
-    output_path: str,
-    verbose: bool = True,
-) -> bool:
-    """Mux audio from original video into processed video (ProPainter strips audio)."""
-    try:
-        # Check if original has audio
-        probe_cmd = [
-            "ffprobe", "-v", "error", "-select_streams", "a",
-            "-show_entries", "stream=codec_name", "-of", "json", original_video
-        ]
-        result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode != 0:
-            return False
+def mux_audio_from_original(
+    video_no_audio: str,
+    original_video: str,
+    output_path: str,
+    verbose: bool = True,
+) -> bool:
+    """Mux audio from original video into processed video (ProPainter strips audio)."""
+    try:
+        # Check if original has audio
+        has_audio = media_probe.has_audio(original_video)
+        if has_audio is None:
+            return False
+
+        if not has_audio:
+            # No audio in original, just copy video
+            if verbose:
+                print(f"  No audio in original, copying video only", file=sys.stderr)
+            shutil.copy2(video_no_audio, output_path)
+            return True
+
+        if verbose:
+            print(f"  Restoring audio from original...", file=sys.stderr)
+
+        # Mux audio from original into processed video
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", video_no_audio,
+            "-i", original_video,
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-map", "0:v:0",
+            "-map", "1:a:0",
+            output_path,
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        return result.returncode == 0
+    except Exception as e:
+        if verbose:
+            print(f"  Warning: Failed to restore audio: {e}", file=sys.stderr)
+        return False
+
+
+def wait_for_runpod_output(
+    endpoint_id: str,
+    api_key: str,
+    job_id: str,
+    timeout: int = 1800,
+    verbose: bool = True,
+    expected_seconds: float | None = None,
+) -> dict:
+    """Wait for a submitted job to finish. Returns {"output": ...} or an error."""
+    result = poll_runpod_job(
+        endpoint_id=endpoint_id,
+        api_key=api_key,
+        job_id=job_id,
+        timeout=timeout,
+        expected_seconds=expected_seconds,
+        verbose=verbose,
+    )
+
+    if not result:
+        return {"error": "Job timed out or failed to get status"}
+
+    status = result.get("status")
+    if status != "COMPLETED":
+        error = result.get("error") or result.get("output", {}).get("error") or "Unknown error"
+        return {"error": f"Job failed: {error}"}
+
+    # Get output from result
+    output = result.get("output", {})
+    if isinstance(output, dict) and output.get("error"):
+        return {"error": output["error"]}
+    return {"output": output}
+
+
+def download_runpod_output(output: dict, output_path: str, verbose: bool = True) -> dict:
+    """
+    Download a finished job's result to output_path.
+
+    Returns dict with the job's output (and the result's R2 key, for cleanup)
+    or an error.
+    """
+    # Download result - try R2 first if key provided, then URL
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    downloaded = downloaded_from_r2 = False
+
+    output_r2_key = output.get("r2_key") if isinstance(output, dict) else None
+    output_url = output.get("output_url") if isinstance(output, dict) else None
+
+    if output_r2_key:
+        if verbose:
+            print(f"Downloading result from R2...", file=sys.stderr)
+        downloaded = downloaded_from_r2 = r2_transfer.download(output_r2_key, output_path)
+        if downloaded:
+            if verbose:
+                print(f"  Downloaded: {output_path} ({r2_transfer.format_stats(downloaded)})", file=sys.stderr)
+
+    if not downloaded and output_url:
+        downloaded = download_from_url(output_url, output_path, verbose=verbose)
+
+    if not downloaded:
+        return {"error": f"No output_url or r2_key in result: {output}"}
+
+    return {"output": output, "r2_key": output_r2_key if downloaded_from_r2 else None}
+
+
+def collect_runpod_output(
+    endpoint_id: str,
+    api_key: str,
+    job_id: str,
+    output_path: str,
+    timeout: int = 1800,
+    verbose: bool = True,
+    expected_seconds: float | None = None,
+) -> dict:
+    """
+    Wait for a submitted job and download its result to output_path.
+
+    Returns dict with the job's output (and the result's R2 key, for cleanup)
+    or an error.
+    """
+    finished = wait_for_runpod_output(endpoint_id, api_key, job_id, timeout, verbose, expected_seconds)
+    if finished.get("error"):
+        return finished
+    return download_runpod_output(finished["output"], output_path, verbose)
+
+
+def resume_runpod_job(
+    job_id: str,
+    output_path: str,
+    r2_keys: list[str] | None = None,
+    timeout: int = 1800,
+    verbose: bool = True,
+) -> dict:
+    """Reattach to a job submitted by an earlier run and download its result."""
+    config = get_runpod_config()
+    if not config.get("api_key") or not config.get("endpoint_id"):
+        return {"error": "RUNPOD_API_KEY / RUNPOD_ENDPOINT_ID not set. Add to .env file."}
+
+    if verbose:
+        print(f"Reattaching to job {job_id}...", file=sys.stderr)
+
+    collected = collect_runpod_output(
+        config["endpoint_id"], config["api_key"], job_id, output_path, timeout, verbose
+    )
+    if collected.get("error"):
+        return collected
+
+    upload_cache.cleanup([*(r2_keys or []), collected.get("r2_key")])
+
+    return {"success": True, "output": output_path, "job_id": job_id, "runpod_output": collected["output"]}
+
+
+def calibrate_runpod(fp16: bool = True, timeout: int = 1800, verbose: bool = True) -> dict:
+    """Calibrate the memory model of a RunPod worker's GPU and save it locally.
+
+    Later jobs send all saved RunPod models; the worker picks the one matching
+    its GPU (see the handler's "calibrate" operation).
+    """
+    config = get_runpod_config()
+    if not config.get("api_key") or not config.get("endpoint_id"):
+        return {"error": "RUNPOD_API_KEY / RUNPOD_ENDPOINT_ID not set. Add to .env file."}
+
+    try:
+        response = runpod_api.post(
+            f"{runpod_api.RUNPOD_API_URL}/{config['endpoint_id']}/run",
+            config["api_key"],
+            json={"input": {"operation": "calibrate", "fp16": fp16}},
+        )
+        job_id = response.json().get("id") if response.status_code == 200 else None
+    except Exception as e:
+        return {"error": f"Job submission error: {e}"}
+    if not job_id:
+        return {"error": f"Failed to submit calibration job: HTTP {response.status_code}"}
+
+    if verbose:
+        print(f"Calibration job submitted: {job_id}", file=sys.stderr)
+
+    result = poll_runpod_job(config["endpoint_id"], config["api_key"], job_id, timeout=timeout, verbose=verbose)
+    output = (result or {}).get("output") or {}
+    if not result or result.get("status") != "COMPLETED" or not output.get("memory_model"):
+        return {"error": output.get("error") or (result or {}).get("error") or "Calibration job failed"}
+
+    model = output["memory_model"]
+    path = memory_model_path(model["device"], model.get("precision", "fp16" if fp16 else "fp32"), runpod=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(model, indent=2))
+
+    if verbose:
+        print(f"Saved RunPod memory model for {model['device']}: {path}", file=sys.stderr)
+
+    return {"success": True, "model_path": str(path), "model": model, "job_id": job_id}
+
+
+def runpod_job(
+    input_path: str,
+    output_path: str,
+    region: str | None = None,
+    mask_path: str | None = None,
+    timeout: int = 1800,
+    verbose: bool = True,
+    resize_ratio: str | float = "auto",
+    preserve_audio: bool = True,
+    upscale: bool | str = False,
+    original_width: int | None = None,
+    original_height: int | None = None,
+    on_submit=None,
+) -> runpod_jobs.RunPodJob:
+    """Build the upload / run / download stages of one RunPod dewatermark job.
+
+    See process_with_runpod() for the arguments.
+    """
+
+    def upload(state: dict) -> dict:
+        # Get RunPod config
+        config = get_runpod_config()
+        api_key = config.get("api_key")
+        endpoint_id = config.get("endpoint_id")
 
-        import json as json_module
-        probe_data = json_module.loads(result.stdout)
-        if not probe_data.get("streams"):
-            # No audio in original, just copy video
-            if verbose:
-                print(f"  No audio in original, copying video only", file=sys.stderr)
-            shutil.copy2(video_no_audio, output_path)
-            return True
+        if not api_key:
+            return {"error": "RUNPOD_API_KEY not set. Add to .env file."}
+        if not endpoint_id:
+            return {"error": "RUNPOD_ENDPOINT_ID not set. Add to .env file."}
+
+        # Get R2 config (optional, for reliable file transfer)
+        r2_config = r2_transfer.load_config()
 
         if verbose:
-            print(f"  Restoring audio from original...", file=sys.stderr)
+            print(f"Using RunPod endpoint: {endpoint_id}", file=sys.stderr)
+            if r2_config:
+                print(f"Using Cloudflare R2 for file transfer", file=sys.stderr)
+            else:
+                print(f"R2 not configured, using free file hosting (less reliable)", file=sys.stderr)
+
+        state = {
+            **state,
+            "start_time": time.time(),
+            "api_key": api_key,
+            "endpoint_id": endpoint_id,
+            "r2_config": r2_config,
+        }
 
-        # Mux audio from original into processed video
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", video_no_audio,
-            "-i", original_video,
-            "-c:v", "copy",
-            "-c:a", "aac",
-            "-map", "0:v:0",
-            "-map", "1:a:0",
-            output_path,
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        return result.returncode == 0
-    except Exception as e:
+        # Upload video
+        video_url, video_r2_key = upload_to_runpod_storage(input_path, api_key)
+        if not video_url:
+            return {"error": "Failed to upload video"}
+        if video_r2_key:
+            state["r2_keys"].append(video_r2_key)
+
+        # Upload mask if provided (instead of region)
+        mask_url = None
+        if mask_path:
+            mask_url, mask_r2_key = upload_to_runpod_storage(mask_path, api_key)
+            if not mask_url:
+                return {"error": "Failed to upload mask"}
+            if mask_r2_key:
+                state["r2_keys"].append(mask_r2_key)
+
+        return {**state, "video_url": video_url, "mask_url": mask_url}
+
+    def run(state: dict) -> dict:
         if verbose:
-            print(f"  Warning: Failed to restore audio: {e}", file=sys.stderr)
-        return False
+            print(f"Submitting job...", file=sys.stderr)
+
+        job_response = submit_runpod_job(
+            endpoint_id=state["endpoint_id"],
+            api_key=state["api_key"],
+            video_url=state["video_url"],
+            region=region,
+            mask_url=state["mask_url"],
+            r2_config=state["r2_config"],
+            resize_ratio=resize_ratio,
+        )
+
+        if not job_response:
+            return {"error": "Failed to submit job"}
+
+        job_id = job_response.get("id")
+        if not job_id:
+            return {"error": f"No job ID in response: {job_response}"}
+
+        if verbose:
+            print(f"Job submitted: {job_id}", file=sys.stderr)
+            print(f"Waiting for completion (timeout: {timeout}s)...", file=sys.stderr)
+
+        if on_submit:
+            on_submit(job_id, list(state["r2_keys"]))
+
+        finished = wait_for_runpod_output(
+            state["endpoint_id"], state["api_key"], job_id, timeout, verbose,
+            expected_seconds=estimate_runpod_seconds(input_path),
+        )
+        if finished.get("error"):
+            return finished
+        return {**state, "job_id": job_id, "output": finished["output"]}
+
+    def download(state: dict) -> dict:
+        r2_keys_to_cleanup = state["r2_keys"]
+
+        collected = download_runpod_output(state["output"], output_path, verbose)
+        if collected.get("error"):
+            return collected
+
+        output = collected["output"]
+        if collected.get("r2_key"):
+            r2_keys_to_cleanup.append(collected["r2_key"])
+
+        # Restore audio from original (ProPainter strips audio)
+        if preserve_audio:
+            temp_video = output_path + ".noaudio.mp4"
+            shutil.move(output_path, temp_video)
+            if mux_audio_from_original(temp_video, input_path, output_path, verbose=verbose):
+                Path(temp_video).unlink(missing_ok=True)
+            else:
+                # Fallback: keep video without audio
+                shutil.move(temp_video, output_path)
+                if verbose:
+                    print(f"  Warning: Could not restore audio, output has no audio", file=sys.stderr)
+
+        # Upscale to original resolution if requested
+        actual_ratio = resize_ratio if isinstance(resize_ratio, float) else None
+        if upscale and original_width and original_height and actual_ratio and actual_ratio < 1.0:
+            temp_video = output_path + ".small.mp4"
+            shutil.move(output_path, temp_video)
+            engine = upscale if isinstance(upscale, str) else "lanczos"
+            if upscale_video(temp_video, output_path, original_width, original_height, verbose, engine):
+                Path(temp_video).unlink(missing_ok=True)
+            else:
+                # Fallback: keep smaller video
+                shutil.move(temp_video, output_path)
+                if verbose:
+                    print(f"  Warning: Upscale failed, output is at reduced resolution", file=sys.stderr)
+
+        # Cleanup R2 objects
+        if r2_keys_to_cleanup:
+            if verbose:
+                print(f"Cleaning up {len(r2_keys_to_cleanup)} R2 objects...", file=sys.stderr)
+            upload_cache.cleanup(r2_keys_to_cleanup)
+
+        elapsed = time.time() - state["start_time"]
+
+        return {
+            "success": True,
+            "output": output_path,
+            "job_id": state["job_id"],
+            "processing_time_seconds": round(elapsed, 2),
+            "runpod_output": output,
+        }
+
+    return runpod_jobs.RunPodJob(
+        name=Path(input_path).name,
+        upload=upload,
+        run=run,
+        download=download,
+        cleanup=lambda state: upload_cache.cleanup(state["r2_keys"]),
+        state={"r2_keys": []},
+    )
 
 
 def process_with_runpod(
@@ -1479,181 +3241,365 @@ def process_with_runpod(
     verbose: bool = True,
     resize_ratio: str | float = "auto",
     preserve_audio: bool = True,
-    upscale: bool = False,
+    upscale: bool | str = False,
     original_width: int | None = None,
     original_height: int | None = None,
+    on_submit=None,
 ) -> dict:
     """
     Process video using RunPod serverless endpoint.
 
     Args:
-        upscale: If True and resize_ratio < 1.0, upscale output to original resolution
+        upscale: If set and resize_ratio < 1.0, upscale output to original resolution,
+                 with "lanczos" (or True) or "realesrgan"
         original_width/height: Original video dimensions (for upscaling)
+        on_submit: Called as on_submit(job_id, r2_keys) once the job is queued,
+                   so callers can persist it and reattach later (resume_runpod_job)
 
     Returns dict with success/error and metadata.
     """
-    start_time = time.time()
-    r2_keys_to_cleanup = []  # Track R2 objects for cleanup
+    return runpod_jobs.run_job(runpod_job(
+        input_path, output_path, region, mask_path, timeout, verbose, resize_ratio,
+        preserve_audio, upscale, original_width, original_height, on_submit,
+    ))
 
-    # Get RunPod config
-    config = get_runpod_config()
-    api_key = config.get("api_key")
-    endpoint_id = config.get("endpoint_id")
 
-    if not api_key:
-        return {"error": "RUNPOD_API_KEY not set. Add to .env file."}
-    if not endpoint_id:
-        return {"error": "RUNPOD_ENDPOINT_ID not set. Add to .env file."}
+def process_chunked_with_runpod(
+    input_path: str,
+    output_path: str,
+    chunk_duration: float | None,
+    overlap: float = 5.0,
+    region: str | None = None,
+    mask_path: str | None = None,
+    timeout: int = 1800,
+    verbose: bool = True,
+    resize_ratio: str | float = "auto",
+    max_parallel: int = 4,
+    run_dir: str | None = None,
+    resume: bool = False,
+    gate: dict | None = None,
+    stream_copy: bool = True,
+) -> dict:
+    """
+    Split a long video and process the chunks as concurrent RunPod jobs.
+
+    Chunks are extracted, uploaded, submitted, polled and downloaded in
+    parallel (up to max_parallel at a time), then trimmed and joined with the
+    original audio. Each job only sees a short clip, so the endpoint can
+    usually keep full resolution. The endpoint needs workersMax >= max_parallel
+    to run them side by side (see --setup-workers).
+
+    With run_dir, progress (including job IDs) is recorded in a run manifest
+    that is kept if the run fails. With resume, finished chunks are skipped
+    and chunks whose job was already submitted are reattached, not re-uploaded.
+
+    With gate ({"threshold", "padding"}), only the spans where the mark is
+    visible are sent (see detect_watermark_intervals); the rest is spliced
+    back in from the input. chunk_duration may then be None (one job per span).
+
+    stream_copy extracts keyframe-aligned chunks without re-encoding them
+    (see make_chunk_extractor); pass False to re-encode every chunk.
+    """
+    start_time = time.time()
+    work_dir = Path(run_dir) if run_dir else Path(tempfile.mkdtemp(prefix="dewatermark_fanout_"))
+    if run_dir and not resume:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    succeeded = False
 
-    # Get R2 config (optional, for reliable file transfer)
-    sys.path.insert(0, str(Path(__file__).parent))
     try:
-        from config import get_r2_config
-        r2_config = get_r2_config()
-    except ImportError:
-        r2_config = None
+        info = get_video_info(input_path)
+        if not info:
+            return {"error": "Could not read video info"}
+
+        gating = gaps = None
+        if gate:
+            detect_mask = mask_path
+            if not detect_mask:
+                detect_mask = str(work_dir / "mask.png")
+                if not create_mask_from_region(region, info["width"], info["height"], detect_mask):
+                    return {"error": f"Failed to create mask from region: {region}"}
+            gating = detect_watermark_intervals(
+                input_path, detect_mask, gate["threshold"], gate["padding"], verbose=verbose
+            )
+            if gating and not gating["intervals"]:
+                if verbose:
+                    print("No watermark detected, copying input unchanged", file=sys.stderr)
+                Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(input_path, output_path)
+                succeeded = True
+                return {"success": True, "output": output_path, "chunks": 0, "job_ids": [], "gated": []}
+
+        if not gating and not chunk_duration:
+            # Nothing to split on: a single job over the whole video
+            result = process_with_runpod(
+                input_path=input_path,
+                output_path=output_path,
+                region=region,
+                mask_path=mask_path,
+                timeout=timeout,
+                verbose=verbose,
+                resize_ratio=resize_ratio,
+            )
+            succeeded = not result.get("error")
+            return result
 
-    if verbose:
-        print(f"Using RunPod endpoint: {endpoint_id}", file=sys.stderr)
-        if r2_config:
-            print(f"Using Cloudflare R2 for file transfer", file=sys.stderr)
+        source = file_fingerprint(input_path)
+        settings = {
+            "mode": "runpod",
+            "chunk_duration": chunk_duration,
+            "overlap": overlap,
+            "region": region,
+            "mask": hash_file(mask_path) if mask_path else None,
+            "resize_ratio": resize_ratio,
+            "gate": gate if gating else None,
+            "stream_copy": stream_copy,
+        }
+        if gating:
+            planned, gaps = plan_gated_chunks(gating, info["duration"], chunk_duration, overlap, str(work_dir))
         else:
-            print(f"R2 not configured, using free file hosting (less reliable)", file=sys.stderr)
-
-    # Upload video
-    video_url, video_r2_key = upload_to_runpod_storage(input_path, api_key)
-    if not video_url:
-        return {"error": "Failed to upload video"}
-    if video_r2_key:
-        r2_keys_to_cleanup.append(video_r2_key)
-
-    # Upload mask if provided (instead of region)
-    mask_url = None
-    if mask_path:
-        mask_url, mask_r2_key = upload_to_runpod_storage(mask_path, api_key)
-        if not mask_url:
-            return {"error": "Failed to upload mask"}
-        if mask_r2_key:
-            r2_keys_to_cleanup.append(mask_r2_key)
-
-    # Submit job
-    if verbose:
-        print(f"Submitting job...", file=sys.stderr)
+            planned = plan_chunks(info["duration"], chunk_duration, overlap, str(work_dir))
+        manifest = load_run_manifest(work_dir, source, settings, verbose) if resume else None
+        if manifest:
+            chunks = manifest["chunks"]
+            if verbose:
+                done = sum(1 for c in chunks if c.get("status") == "done")
+                running = sum(1 for c in chunks if c.get("status") == "submitted")
+                print(f"Resuming: {done}/{len(chunks)} chunks done, {running} jobs to reattach", file=sys.stderr)
+        else:
+            chunks = planned
+            manifest = {"version": 1, "source": source, "settings": settings, "chunks": chunks}
+            if verbose and chunk_duration:
+                print(f"Splitting into {len(chunks)} ~{chunk_duration:.0f}s chunks with {overlap}s overlap", file=sys.stderr)
 
-    job_response = submit_runpod_job(
-        endpoint_id=endpoint_id,
-        api_key=api_key,
-        video_url=video_url,
-        region=region,
-        mask_url=mask_url,
-        r2_config=r2_config,
-        resize_ratio=resize_ratio,
-    )
+        extract = make_chunk_extractor(
+            chunks, input_path, chunk_duration or info["duration"], stream_copy=stream_copy, verbose=verbose
+        )
+        save_run_manifest(work_dir, manifest)
 
-    if not job_response:
-        return {"error": "Failed to submit job"}
+        def update(chunk: dict, **fields):
+            with _manifest_lock:
+                chunk.update(fields)
+                save_run_manifest(work_dir, manifest)
 
-    job_id = job_response.get("id")
-    if not job_id:
-        return {"error": f"No job ID in response: {job_response}"}
+        def process(chunk: dict) -> dict:
+            chunk_output = str(work_dir / f"processed_{chunk['index']:03d}.mp4")
 
-    if verbose:
-        print(f"Job submitted: {job_id}", file=sys.stderr)
-        print(f"Waiting for completion (timeout: {timeout}s)...", file=sys.stderr)
+            if chunk.get("status") == "done" and Path(chunk.get("output_path") or "").is_file():
+                return {"success": True, "job_id": chunk.get("job_id")}
 
-    # Poll for completion
-    result = poll_runpod_job(
-        endpoint_id=endpoint_id,
-        api_key=api_key,
-        job_id=job_id,
-        timeout=timeout,
-        verbose=verbose,
-    )
+            if chunk.get("status") == "submitted" and chunk.get("job_id"):
+                result = resume_runpod_job(chunk["job_id"], chunk_output, chunk.get("r2_keys"), timeout, verbose)
+                if not result.get("error"):
+                    update(chunk, status="done", output_path=chunk_output)
+                    return result
+                if verbose:
+                    print(f"  Chunk {chunk['index']}: could not reattach ({result['error']}), resubmitting",
+                          file=sys.stderr)
+
+            if not (chunk.get("status") in ("extracted", "submitted") and Path(chunk["input_path"]).exists()):
+                if not extract(input_path, chunk, verbose=verbose):
+                    return {"error": "Failed to extract chunk"}
+                update(chunk, status="extracted", input_hash=hash_file(chunk["input_path"]))
+
+            result = process_with_runpod(
+                input_path=chunk["input_path"],
+                output_path=chunk_output,
+                region=region,
+                mask_path=mask_path,
+                timeout=timeout,
+                verbose=verbose,
+                resize_ratio=resize_ratio,
+                preserve_audio=False,
+                on_submit=lambda job_id, r2_keys: update(chunk, status="submitted", job_id=job_id, r2_keys=r2_keys),
+            )
+            if not result.get("error"):
+                update(chunk, status="done", output_path=chunk_output)
+                if verbose:
+                    print(f"  Chunk {chunk['index']+1}/{len(chunks)} done "
+                          f"({result.get('processing_time_seconds', 0):.0f}s)", file=sys.stderr)
+            return result
 
-    if not result:
-        return {"error": "Job timed out or failed to get status"}
+        if verbose:
+            print(f"Processing {len(chunks)} chunks ({min(max_parallel, len(chunks))} at a time)...", file=sys.stderr)
 
-    status = result.get("status")
-    if status != "COMPLETED":
-        error = result.get("error") or result.get("output", {}).get("error") or "Unknown error"
-        return {"error": f"Job failed: {error}"}
+        with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="dewatermark-job") as pool:
+            results = list(pool.map(process, chunks))
 
-    # Get output from result
-    output = result.get("output", {})
-    if isinstance(output, dict) and output.get("error"):
-        return {"error": output["error"]}
+        failed = [(c["index"], r["error"]) for c, r in zip(chunks, results) if r.get("error")]
+        if failed:
+            return {"error": f"{len(failed)}/{len(chunks)} chunks failed: " +
+                             "; ".join(f"chunk {i}: {e}" for i, e in failed)}
 
-    # Download result - try R2 first if key provided, then URL
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    downloaded = False
+        # Trim to usable portions (scaled back to source size if the endpoint downscaled)
+        size = (info["width"], info["height"])
+        if not all(trim_chunk(c, verbose, size=size, fps=info["fps"] if gaps else None) for c in chunks):
+            return {"error": "Failed to trim processed chunks"}
 
-    output_r2_key = output.get("r2_key") if isinstance(output, dict) else None
-    output_url = output.get("output_url") if isinstance(output, dict) else None
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        if not join_trimmed_chunks(chunks, output_path, input_path, verbose=verbose, gaps=gaps):
+            return {"error": "Failed to join processed chunks"}
 
-    if output_r2_key:
-        if verbose:
-            print(f"Downloading result from R2...", file=sys.stderr)
-        downloaded = _download_from_r2(output_r2_key, output_path)
-        if downloaded:
-            r2_keys_to_cleanup.append(output_r2_key)
-            if verbose:
-                size_mb = Path(output_path).stat().st_size // (1024 * 1024)
-                print(f"  Downloaded: {output_path} ({size_mb}MB)", file=sys.stderr)
+        succeeded = True
+        result = {
+            "success": True,
+            "output": output_path,
+            "chunks": len(chunks),
+            "job_ids": [c.get("job_id") for c in chunks],
+            "processing_time_seconds": round(time.time() - start_time, 2),
+        }
+        if gating:
+            result["gated"] = gating["intervals"]
+        return result
 
-    if not downloaded and output_url:
-        downloaded = download_from_url(output_url, output_path, verbose=verbose)
+    finally:
+        if succeeded or not run_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        elif verbose:
+            print(f"Run state kept in {work_dir} - re-run with --resume to continue", file=sys.stderr)
 
-    if not downloaded:
-        return {"error": f"No output_url or r2_key in result: {output}"}
 
-    # Restore audio from original (ProPainter strips audio)
-    if preserve_audio:
-        temp_video = output_path + ".noaudio.mp4"
-        shutil.move(output_path, temp_video)
-        if mux_audio_from_original(temp_video, input_path, output_path, verbose=verbose):
-            Path(temp_video).unlink(missing_ok=True)
-        else:
-            # Fallback: keep video without audio
-            shutil.move(temp_video, output_path)
-            if verbose:
-                print(f"  Warning: Could not restore audio, output has no audio", file=sys.stderr)
-
-    # Upscale to original resolution if requested
-    actual_ratio = resize_ratio if isinstance(resize_ratio, float) else None
-    if upscale and original_width and original_height and actual_ratio and actual_ratio < 1.0:
-        temp_video = output_path + ".small.mp4"
-        shutil.move(output_path, temp_video)
-        if upscale_video(temp_video, output_path, original_width, original_height, verbose=verbose):
-            Path(temp_video).unlink(missing_ok=True)
-        else:
-            # Fallback: keep smaller video
-            shutil.move(temp_video, output_path)
+def process_roi_with_runpod(
+    input_path: str,
+    output_path: str,
+    video_width: int,
+    video_height: int,
+    region: str | None = None,
+    mask_path: str | None = None,
+    timeout: int = 1800,
+    verbose: bool = True,
+    resize_ratio: str | float = "auto",
+    chunk_duration: float | None = None,
+    overlap: float = 5.0,
+    max_parallel: int = 4,
+    run_dir: str | None = None,
+    resume: bool = False,
+    gate: dict | None = None,
+    stream_copy: bool = True,
+) -> dict:
+    """
+    Process only a padded crop around the watermark on RunPod.
+
+    The crop is cut locally, so upload, inference and download all scale with
+    the ROI size instead of the full frame. The inpainted patch is composited
+    back onto the original frames (with original audio) locally.
+
+    Falls back to full-frame processing if the mask covers most of the frame.
+    With chunk_duration (or gate) and run_dir, the crop and chunk state live
+    in run_dir so a failed run can be resumed.
+    """
+    resumable = bool((chunk_duration or gate) and run_dir)
+    previous_run = None
+    if resumable:
+        temp_dir = str(run_dir)
+        source = file_fingerprint(input_path)
+        previous_run = prepare_run_dir(Path(temp_dir), source, resume, verbose)
+        resume = previous_run is not None
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="dewatermark_roi_")
+    succeeded = False
+
+    try:
+        full_mask = mask_path
+        if not full_mask:
+            full_mask = str(Path(temp_dir) / "mask.png")
+            if not create_mask_from_region(region, video_width, video_height, full_mask):
+                return {"error": f"Failed to create mask from region: {region}"}
+
+        roi = plan_roi(full_mask, video_width, video_height)
+        if not roi:
             if verbose:
-                print(f"  Warning: Upscale failed, output is at reduced resolution", file=sys.stderr)
+                print("ROI would cover most of the frame, processing full frame instead", file=sys.stderr)
+            if chunk_duration or gate:
+                if resumable:
+                    save_run_manifest(temp_dir, {"version": 1, "source": source, "settings": {"roi": None}})
+                return process_chunked_with_runpod(
+                    input_path=input_path,
+                    output_path=output_path,
+                    chunk_duration=chunk_duration,
+                    overlap=overlap,
+                    region=region,
+                    mask_path=mask_path,
+                    timeout=timeout,
+                    verbose=verbose,
+                    resize_ratio=resize_ratio,
+                    max_parallel=max_parallel,
+                    run_dir=str(Path(temp_dir) / "chunks") if resumable else None,
+                    resume=resume,
+                    gate=gate,
+                    stream_copy=stream_copy,
+                )
+            return process_with_runpod(
+                input_path=input_path,
+                output_path=output_path,
+                region=region,
+                mask_path=mask_path,
+                timeout=timeout,
+                verbose=verbose,
+                resize_ratio=resize_ratio,
+            )
 
-    # Cleanup R2 objects
-    if r2_keys_to_cleanup:
         if verbose:
-            print(f"Cleaning up {len(r2_keys_to_cleanup)} R2 objects...", file=sys.stderr)
-        for key in r2_keys_to_cleanup:
-            _delete_from_r2(key)
+            print(f"ROI: {roi['w']}x{roi['h']} at ({roi['x']},{roi['y']}) of {video_width}x{video_height}", file=sys.stderr)
+
+        roi_video = str(Path(temp_dir) / "roi.mp4")
+        roi_mask = str(Path(temp_dir) / "roi_mask.png")
+        reuse_crop = resume and previous_run.get("settings", {}).get("roi") == roi and Path(roi_video).exists()
+        if not (reuse_crop or crop_to_roi(input_path, roi_video, roi, verbose)) \
+                or not crop_to_roi(full_mask, roi_mask, roi, verbose):
+            return {"error": "Failed to crop video to ROI"}
+        if resumable:
+            # Ties the crop (and the chunk state derived from it) to this input
+            save_run_manifest(temp_dir, {"version": 1, "source": source, "settings": {"roi": roi}})
+
+        roi_output = str(Path(temp_dir) / "roi_inpainted.mp4")
+        if chunk_duration or gate:
+            result = process_chunked_with_runpod(
+                input_path=roi_video,
+                output_path=roi_output,
+                chunk_duration=chunk_duration,
+                overlap=overlap,
+                mask_path=roi_mask,
+                timeout=timeout,
+                verbose=verbose,
+                resize_ratio=resize_ratio,
+                max_parallel=max_parallel,
+                run_dir=str(Path(temp_dir) / "chunks") if resumable else None,
+                resume=resume,
+                gate=gate,
+                stream_copy=stream_copy,
+            )
+        else:
+            result = process_with_runpod(
+                input_path=roi_video,
+                output_path=roi_output,
+                mask_path=roi_mask,
+                timeout=timeout,
+                verbose=verbose,
+                resize_ratio=resize_ratio,
+                preserve_audio=False,
+            )
+        if result.get("error"):
+            return result
 
-    elapsed = time.time() - start_time
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        if not composite_roi(input_path, roi_output, roi, output_path, verbose=verbose):
+            return {"error": "Failed to composite ROI onto original video"}
 
-    return {
-        "success": True,
-        "output": output_path,
-        "job_id": job_id,
-        "processing_time_seconds": round(elapsed, 2),
-        "runpod_output": output,
-    }
+        result["output"] = output_path
+        result["roi"] = roi
+        succeeded = True
+        return result
+
+    finally:
+        if succeeded or not resumable:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 # =============================================================================
 # RunPod Setup (GraphQL API)
 # =============================================================================
 
-RUNPOD_GRAPHQL_URL = "https://api.runpod.io/graphql"
 PROPAINTER_DOCKER_IMAGE = "ghcr.io/conalmullan/video-toolkit-propainter:latest"
 PROPAINTER_TEMPLATE_NAME = "video-toolkit-propainter"
 PROPAINTER_ENDPOINT_NAME = "video-toolkit-dewatermark"
@@ -1661,30 +3607,7 @@ PROPAINTER_ENDPOINT_NAME = "video-toolkit-dewatermark"
 
 def runpod_graphql_query(api_key: str, query: str, variables: dict | None = None) -> dict:
     """Execute a GraphQL query against RunPod API."""
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-    }
-
-    payload = {"query": query}
-    if variables:
-        payload["variables"] = variables
-
-    response = requests.post(
-        RUNPOD_GRAPHQL_URL,
-        json=payload,
-        headers=headers,
-        timeout=30,
-    )
-
-    if response.status_code != 200:
-        raise Exception(f"GraphQL request failed: HTTP {response.status_code}: {response.text}")
-
-    data = response.json()
-    if "errors" in data:
-        raise Exception(f"GraphQL errors: {data['errors']}")
-
-    return data.get("data", {})
+    return runpod_api.graphql(api_key, query, variables)
 
 
 def list_runpod_templates(api_key: str) -> list[dict]:
@@ -1795,6 +3718,7 @@ def create_runpod_endpoint(
     template_id: str,
     gpu_id: str = "AMPERE_24",
     verbose: bool = True,
+    workers_max: int = 1,
 ) -> dict:
     """Create a serverless endpoint for ProPainter."""
     if verbose:
@@ -1820,7 +3744,7 @@ def create_runpod_endpoint(
             "templateId": template_id,
             "gpuIds": gpu_id,
             "workersMin": 0,
-            "workersMax": 1,
+            "workersMax": workers_max,
             "idleTimeout": 5,
             "scalerType": "QUEUE_DELAY",
             "scalerValue": 4,
@@ -1883,7 +3807,7 @@ def save_endpoint_to_env(endpoint_id: str, verbose: bool = True) -> bool:
     return True
 
 
-def setup_runpod(gpu_id: str = "AMPERE_24", verbose: bool = True) -> dict:
+def setup_runpod(gpu_id: str = "AMPERE_24", verbose: bool = True, workers_max: int = 1) -> dict:
     """
     Set up RunPod endpoint for dewatermark tool.
 
@@ -1948,6 +3872,7 @@ def setup_runpod(gpu_id: str = "AMPERE_24", verbose: bool = True) -> dict:
                 result["template_id"],
                 gpu_id=gpu_id,
                 verbose=verbose,
+                workers_max=workers_max,
             )
             result["endpoint_id"] = endpoint["id"]
             result["created_endpoint"] = True
@@ -2020,10 +3945,23 @@ def main():
 
     # Handle --setup (RunPod endpoint setup)
     if args.setup:
-        result = setup_runpod(gpu_id=args.setup_gpu, verbose=verbose)
+        result = setup_runpod(gpu_id=args.setup_gpu, verbose=verbose, workers_max=args.setup_workers)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        if result.get("error"):
+            sys.exit(1)
+        sys.exit(0)
+
+    # Handle --calibrate (fit a memory model for this device or a RunPod GPU)
+    if args.calibrate:
+        if args.runpod:
+            result = calibrate_runpod(fp16=not args.fp32, timeout=args.runpod_timeout, verbose=verbose)
+        else:
+            result = calibrate_memory_model(propainter_path, fp16=not args.fp32, verbose=verbose)
         if args.json:
             print(json.dumps(result, indent=2))
         if result.get("error"):
+            print(f"Error: {result['error']}", file=sys.stderr)
             sys.exit(1)
         sys.exit(0)
 
@@ -2064,7 +4002,11 @@ def main():
 
         # Determine resize ratio
         resize_ratio = args.resize_ratio
-        if resize_ratio == "auto":
+        if (args.roi or args.chunk or args.gate) and resize_ratio == "auto":
+            # The handler sizes the (small) ROI crop against its own VRAM
+            if verbose:
+                print("Resize-ratio left to the endpoint per job (usually full resolution)", file=sys.stderr)
+        elif resize_ratio == "auto":
             suggested_ratio, reason = suggest_resize_ratio(video_duration, video_width, video_height)
             resize_ratio = suggested_ratio
             if verbose:
@@ -2089,6 +4031,11 @@ def main():
                 "video_duration": f"{video_duration:.1f}s",
                 "resize_ratio": resize_ratio,
                 "upscale": args.upscale,
+                "roi": args.roi,
+                "dedup": args.dedup,
+                "gate": args.gate,
+                "chunk": args.chunk,
+                "parallel_jobs": args.parallel if args.chunk or args.gate else 1,
                 "endpoint_configured": bool(config.get("endpoint_id")),
                 "api_key_configured": bool(config.get("api_key")),
                 "timeout": args.runpod_timeout,
@@ -2104,18 +4051,91 @@ def main():
         if verbose:
             print("Processing with RunPod cloud GPU...")
 
-        result = process_with_runpod(
-            input_path=args.input,
-            output_path=args.output,
-            region=region,
-            mask_path=args.mask,
-            timeout=args.runpod_timeout,
-            verbose=verbose,
-            resize_ratio=resize_ratio,
-            upscale=args.upscale,
-            original_width=video_width,
-            original_height=video_height,
-        )
+        gate = {"threshold": args.gate_threshold, "padding": args.gate_padding} if args.gate else None
+
+        # Upload and inpaint only one frame per run of identical frames
+        runpod_input, runpod_output = args.input, args.output
+        dedup = None
+        if args.dedup:
+            dedup_dir = default_run_dir(args.output).with_name(f".{Path(args.output).stem}.dewatermark-dedup")
+            if not args.resume:
+                shutil.rmtree(dedup_dir, ignore_errors=True)
+            dedup_dir.mkdir(parents=True, exist_ok=True)
+            dedup_mask = args.mask
+            if not dedup_mask:
+                dedup_mask = str(dedup_dir / "mask.png")
+                if not create_mask_from_region(region, video_width, video_height, dedup_mask):
+                    print(f"Error: Failed to create mask from region: {region}", file=sys.stderr)
+                    sys.exit(1)
+            dedup = prepare_deduplicated_input(
+                args.input, dedup_mask, str(dedup_dir), args.dedup_threshold, args.resume, verbose
+            )
+            if dedup:
+                runpod_input = dedup["unique_path"]
+                runpod_output = str(dedup_dir / "inpainted.mp4")
+            else:
+                shutil.rmtree(dedup_dir, ignore_errors=True)
+
+        if args.roi:
+            result = process_roi_with_runpod(
+                input_path=runpod_input,
+                output_path=runpod_output,
+                video_width=video_width,
+                video_height=video_height,
+                region=region,
+                mask_path=args.mask,
+                timeout=args.runpod_timeout,
+                verbose=verbose,
+                resize_ratio=resize_ratio,
+                chunk_duration=args.chunk,
+                overlap=args.overlap,
+                max_parallel=args.parallel,
+                run_dir=str(default_run_dir(args.output)),
+                resume=args.resume,
+                gate=gate,
+                stream_copy=not args.reencode_chunks,
+            )
+        elif args.chunk or args.gate:
+            result = process_chunked_with_runpod(
+                input_path=runpod_input,
+                output_path=runpod_output,
+                chunk_duration=args.chunk,
+                overlap=args.overlap,
+                region=region,
+                mask_path=args.mask,
+                timeout=args.runpod_timeout,
+                verbose=verbose,
+                resize_ratio=resize_ratio,
+                max_parallel=args.parallel,
+                run_dir=str(default_run_dir(args.output)),
+                resume=args.resume,
+                gate=gate,
+                stream_copy=not args.reencode_chunks,
+            )
+        else:
+            result = process_with_runpod(
+                input_path=runpod_input,
+                output_path=runpod_output,
+                region=region,
+                mask_path=args.mask,
+                timeout=args.runpod_timeout,
+                verbose=verbose,
+                resize_ratio=resize_ratio,
+                upscale=args.upscale,
+                original_width=video_width,
+                original_height=video_height,
+            )
+
+        if dedup and not result.get("error"):
+            expanded = str(dedup_dir / "expanded.mp4")
+            if expand_deduplicated_video(runpod_output, args.input, expanded, dedup, verbose=verbose) \
+                    and mux_audio_from_original(expanded, args.input, args.output, verbose=verbose):
+                result["output"] = args.output
+                result["dedup"] = {"frames": dedup["frames"], "unique": dedup["unique"]}
+            else:
+                result = {"error": "Failed to expand deduplicated frames back to the full video"}
+        if dedup and (not result.get("error") or not (args.chunk or args.gate)):
+            shutil.rmtree(dedup_dir, ignore_errors=True)
 
         if result.get("error"):
             print(f"Error: {result['error']}", file=sys.stderr)
@@ -2190,8 +4210,16 @@ def main():
 
     video_width, video_height = dimensions
 
-    # Create temp directory
-    temp_dir = tempfile.mkdtemp(prefix="dewatermark_")
+    # Create working directory (kept next to the output so failed runs can be resumed)
+    previous_run = None
+    if args.dry_run:
+        temp_dir = tempfile.mkdtemp(prefix="dewatermark_")
+    else:
+        run_dir = default_run_dir(args.output)
+        previous_run = prepare_run_dir(run_dir, file_fingerprint(args.input), args.resume, verbose)
+        temp_dir = str(run_dir)
+    resume = previous_run is not None
+    succeeded = False
 
     try:
         # Prepare mask
@@ -2208,6 +4236,16 @@ def main():
             if not create_mask_from_region(args.region, video_width, video_height, mask_path):
                 sys.exit(1)
 
+        # Plan ROI crop (inpaint only a padded box around the mask)
+        roi = None
+        if args.roi:
+            roi = plan_roi(mask_path, video_width, video_height)
+            if verbose:
+                if roi:
+                    print(f"ROI: {roi['w']}x{roi['h']} at ({roi['x']},{roi['y']})")
+                else:
+                    print("ROI would cover most of the frame, processing full frame instead")
+
         # Determine settings for dry-run display
         if args.auto:
             compute = detect_compute_device()
@@ -2228,6 +4266,8 @@ def main():
 
         # Get video info for dry-run display
         video_info = get_video_info(args.input)
+        if video_info and roi:
+            video_info = {**video_info, "width": roi["w"], "height": roi["h"]}
 
         # Dry run
         if args.dry_run:
@@ -2235,12 +4275,19 @@ def main():
             if args.auto and video_info:
                 compute = detect_compute_device()
                 available_memory = compute["memory_gb"] or 16
+                memory_model = load_memory_model(compute, "fp32" if args.fp32 else "fp16")
                 estimated_memory = estimate_frame_memory_gb(
-                    video_info["width"], video_info["height"], video_info["frame_count"]
+                    video_info["width"], video_info["height"], video_info["frame_count"],
+                    model=memory_model,
+                    subvideo_length=dry_run_settings["subvideo_length"],
+                    neighbor_length=dry_run_settings["neighbor_length"],
                 )
                 max_duration = calculate_max_duration(
                     available_memory, video_info["width"], video_info["height"], video_info["fps"],
-                    device=compute.get("device", "cpu")
+                    device=compute.get("device", "cpu"),
+                    model=memory_model,
+                    subvideo_length=dry_run_settings["subvideo_length"],
+                    neighbor_length=dry_run_settings["neighbor_length"],
                 )
                 needs_split = video_info["duration"] > max_duration
                 chunk_count = max(1, int(video_info["duration"] / (max_duration * 0.9 - args.overlap)) + 1) if needs_split else 1
@@ -2262,10 +4309,14 @@ def main():
                 "precision": "fp32" if args.fp32 else "fp16",
                 "propainter_path": str(propainter_path),
                 "device": "MPS" if status["mps_available"] else "CUDA" if status["cuda_available"] else "CPU",
+                "roi": f"{roi['w']}x{roi['h']} at ({roi['x']},{roi['y']})" if roi else None,
+                "dedup": args.dedup,
+                "gate": args.gate,
                 **dry_run_settings,
             }
 
             if args.auto and video_info:
+                result["memory_model"] = memory_model["device"] if memory_model else "default estimate"
                 result["estimated_memory_gb"] = f"{estimated_memory:.1f}"
                 result["max_chunk_duration"] = f"{max_duration:.1f}s"
                 result["needs_splitting"] = needs_split
@@ -2299,16 +4350,61 @@ def main():
             compute = detect_compute_device()
             available_memory = compute["memory_gb"] or 16
 
+        # Identify the run so --resume only reuses compatible work
+        run_settings = {
+            "mask": hash_file(mask_path),
+            "roi": roi,
+            "dedup": args.dedup_threshold if args.dedup else None,
+            "overlap": args.overlap,
+            "reencode_chunks": args.reencode_chunks,
+            "fp32": args.fp32,
+            "neighbor_length": neighbor_length,
+            "ref_stride": ref_stride,
+            "subvideo_length": subvideo_length,
+        }
+
+        # In ROI mode, everything below runs on the cropped video
+        work_input = args.input
+        if roi:
+            work_input = str(Path(temp_dir) / "roi.mp4")
+            roi_mask = str(Path(temp_dir) / "roi_mask.png")
+            reuse_crop = (
+                resume and previous_run.get("settings", {}).get("roi") == roi and Path(work_input).exists()
+            )
+            if verbose:
+                print("Reusing ROI crop from previous run..." if reuse_crop else "Cropping video to ROI...")
+            if not (reuse_crop or crop_to_roi(args.input, work_input, roi, verbose)) \
+                    or not crop_to_roi(mask_path, roi_mask, roi, verbose):
+                print("Error: Failed to crop video to ROI", file=sys.stderr)
+                sys.exit(1)
+            mask_path = roi_mask
+
+        # Inpaint each run of identical frames once (re-expanded afterwards)
+        dedup = None
+        dedup_source = work_input
+        if args.dedup:
+            dedup = prepare_deduplicated_input(work_input, mask_path, temp_dir, args.dedup_threshold, resume, verbose)
+            if dedup:
+                work_input = dedup["unique_path"]
+
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        inpainted_path = Path(temp_dir) / "inpainted.mp4" if roi or dedup else output_path
+
         # Get video info and check if splitting is needed
-        video_info = get_video_info(args.input)
+        video_info = get_video_info(work_input)
         if not video_info:
             print("Error: Could not read video info", file=sys.stderr)
             sys.exit(1)
 
+        memory_model = load_memory_model(compute, "fp32" if args.fp32 else "fp16")
         estimated_memory = estimate_frame_memory_gb(
             video_info["width"],
             video_info["height"],
             video_info["frame_count"],
+            model=memory_model,
+            subvideo_length=subvideo_length,
+            neighbor_length=neighbor_length,
         )
         max_duration = calculate_max_duration(
             available_memory,
@@ -2316,20 +4412,46 @@ def main():
             video_info["height"],
             video_info["fps"],
             device=compute.get("device", "cpu"),
+            model=memory_model,
+            subvideo_length=subvideo_length,
+            neighbor_length=neighbor_length,
         )
 
         needs_splitting = video_info["duration"] > max_duration and not args.no_split
 
         if verbose:
             print(f"Video: {video_info['duration']:.1f}s, {video_info['frame_count']} frames at {video_info['fps']:.1f}fps")
+            if memory_model:
+                print(f"Using calibrated memory model for {memory_model['device']}")
             print(f"Estimated memory for frames: {estimated_memory:.1f}GB")
             print(f"Available memory: {available_memory}GB")
             print(f"Max duration per chunk: {max_duration:.1f}s")
 
-        if needs_splitting:
-            # Auto-split mode
-            chunk_duration = max_duration * 0.9  # 90% of max for safety margin
-            if verbose:
+        # Temporal gating: only the spans where the mark is visible get inpainted
+        gating = None
+        if args.gate:
+            gating = detect_watermark_intervals(
+                work_input, mask_path, args.gate_threshold, args.gate_padding, verbose=verbose
+            )
+            if gating and not gating["intervals"]:
+                print("No watermark detected, copying input unchanged "
+                      "(lower --gate-threshold if it was missed)", file=sys.stderr)
+                shutil.copy2(args.input, output_path)
+                result = {"success": True, "input": args.input, "output": str(output_path), "gated": []}
+                if args.json:
+                    print(json.dumps(result, indent=2))
+                else:
+                    print(f"Nothing to remove: {output_path}")
+                succeeded = True
+                return
+
+        if needs_splitting or gating:
+            chunk_duration = max_duration * 0.9 if needs_splitting else None  # 90% of max for safety margin
+            if chunk_duration is not None and chunk_duration <= args.overlap * 2:
+                print(f"Error: Only ~{chunk_duration:.1f}s fits in memory with these settings, too short to split "
+                      f"with {args.overlap}s overlap. Try --roi, lower --subvideo-length, or --runpod.", file=sys.stderr)
+                sys.exit(1)
+            if verbose and needs_splitting:
                 print()
                 print(f"Video exceeds memory limit - auto-splitting into ~{chunk_duration:.0f}s chunks with {args.overlap}s overlap")
 
@@ -2337,30 +4459,50 @@ def main():
             chunks_dir = str(Path(temp_dir) / "chunks")
             Path(chunks_dir).mkdir(parents=True, exist_ok=True)
 
-            # Split video
-            if verbose:
-                print("Splitting video...")
-            chunks = split_video_with_overlap(
-                args.input,
-                chunks_dir,
-                chunk_duration,
-                overlap=args.overlap,
-                verbose=verbose,
+            # Plan chunk boundaries (extraction happens inside the pipeline),
+            # or pick up the chunks of an interrupted run
+            source = file_fingerprint(args.input)
+            run_settings["chunk_duration"] = chunk_duration
+            run_settings["gate"] = [args.gate_threshold, args.gate_padding] if gating else None
+            gaps = None
+            if gating:
+                chunks, gaps = plan_gated_chunks(
+                    gating, video_info["duration"], chunk_duration, args.overlap, chunks_dir
+                )
+            else:
+                chunks = plan_chunks(video_info["duration"], chunk_duration, args.overlap, chunks_dir)
+            manifest = load_run_manifest(temp_dir, source, run_settings, verbose) if resume else None
+            if manifest:
+                chunks = manifest["chunks"]
+            else:
+                manifest = {"version": 1, "source": source, "settings": run_settings, "chunks": chunks}
+            extract = make_chunk_extractor(
+                chunks, work_input, chunk_duration or video_info["duration"],
+                stream_copy=not args.reencode_chunks, verbose=verbose,
             )
+            save_run_manifest(temp_dir, manifest)
 
-            if not chunks:
-                print("Error: Failed to split video", file=sys.stderr)
-                sys.exit(1)
-
-            if verbose:
-                print(f"\nProcessing {len(chunks)} chunks...")
+            def record(chunk: dict):
+                input_hash = hash_file(chunk["input_path"]) if chunk["status"] == "extracted" else None
+                with _manifest_lock:
+                    if input_hash:
+                        chunk["input_hash"] = input_hash
+                    save_run_manifest(temp_dir, manifest)
 
-            # Process each chunk
-            for i, chunk in enumerate(chunks):
-                if verbose:
-                    print(f"\n--- Chunk {i+1}/{len(chunks)} ({chunk['start']:.1f}s - {chunk['end']:.1f}s) ---")
+            pending = [
+                c for c in chunks
+                if not (c.get("status") == "done" and Path(c.get("trimmed_path", "")).is_file())
+            ]
 
-                chunk_output_dir = str(Path(temp_dir) / f"results_{i:03d}")
+            if verbose:
+                for chunk in chunks:
+                    print(f"  Chunk {chunk['index']}: {chunk['start']:.1f}s - {chunk['end']:.1f}s "
+                          f"(use {chunk['trim_start']:.1f}s - {chunk['trim_end']:.1f}s)"
+                          f"{'' if chunk in pending else ' [done]'}")
+                print(f"\nProcessing {len(pending)}/{len(chunks)} chunks (extract/inpaint/trim pipelined)...")
+
+            def inpaint_chunk(chunk: dict) -> bool:
+                chunk_output_dir = str(Path(temp_dir) / f"results_{chunk['index']:03d}")
                 result_path = run_propainter(
                     propainter_path,
                     chunk["input_path"],
@@ -2372,22 +4514,23 @@ def main():
                     subvideo_length=subvideo_length,
                     verbose=verbose,
                 )
-
-                if not result_path:
-                    print(f"Error: Failed to process chunk {i}", file=sys.stderr)
-                    sys.exit(1)
-
                 chunk["output_path"] = result_path
+                return result_path is not None
+
+            if not process_chunks_pipelined(
+                work_input, pending, inpaint_chunk, verbose=verbose, extract=extract, on_update=record,
+                trim_size=(video_info["width"], video_info["height"]) if gaps else None,
+                trim_fps=video_info["fps"] if gaps else None,
+            ):
+                print("Error: Failed to process chunks", file=sys.stderr)
+                sys.exit(1)
 
-            # Concatenate chunks
+            # Join trimmed chunks
             if verbose:
-                print("\n--- Concatenating chunks ---")
-
-            output_path = Path(args.output)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
+                print("\n--- Joining chunks ---")
 
-            if not concatenate_chunks(chunks, str(output_path), verbose=verbose):
-                print("Error: Failed to concatenate chunks", file=sys.stderr)
+            if not join_trimmed_chunks(chunks, str(inpainted_path), work_input, verbose=verbose, gaps=gaps):
+                print("Error: Failed to join chunks", file=sys.stderr)
                 sys.exit(1)
 
         else:
@@ -2399,7 +4542,7 @@ def main():
             output_dir = str(Path(temp_dir) / "results")
             result_path = run_propainter(
                 propainter_path,
-                args.input,
+                work_input,
                 mask_path,
                 output_dir,
                 fp16=not args.fp32,
@@ -2414,9 +4557,22 @@ def main():
                 sys.exit(1)
 
             # Move result to output path
-            output_path = Path(args.output)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.move(result_path, str(output_path))
+            shutil.move(result_path, str(inpainted_path))
+
+        if dedup:
+            expanded_path = Path(temp_dir) / "expanded.mp4"
+            if not expand_deduplicated_video(str(inpainted_path), dedup_source, str(expanded_path), dedup,
+                                             verbose=verbose):
+                sys.exit(1)
+            inpainted_path = expanded_path
+
+        if roi:
+            if not composite_roi(args.input, str(inpainted_path), roi, str(output_path), verbose=verbose):
+                print("Error: Failed to composite ROI onto original video", file=sys.stderr)
+                sys.exit(1)
+        elif dedup and not mux_audio_from_original(str(inpainted_path), args.input, str(output_path), verbose=verbose):
+            print("Error: Failed to write output video", file=sys.stderr)
+            sys.exit(1)
 
         # Output result
         result = {
@@ -2426,21 +4582,33 @@ def main():
             "region": args.region,
             "precision": "fp32" if args.fp32 else "fp16",
         }
-        if needs_splitting:
+        if needs_splitting or gating:
             result["chunks"] = len(chunks)
+        if gating:
+            result["gated"] = gating["intervals"]
+        if roi:
+            result["roi"] = roi
+        if dedup:
+            result["dedup"] = {"frames": dedup["frames"], "unique": dedup["unique"]}
 
         if args.json:
             print(json.dumps(result, indent=2))
         else:
-            if needs_splitting:
+            if needs_splitting or gating:
                 print(f"\nWatermark removed (processed in {len(chunks)} chunks): {output_path}")
             else:
                 print(f"Watermark removed: {output_path}")
 
+        succeeded = True
+
     finally:
-        # Cleanup
-        if not args.keep_temp:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+        # Cleanup (failed chunked runs are kept so they can be resumed)
+        if args.dry_run or succeeded or not (Path(temp_dir) / RUN_MANIFEST_NAME).exists():
+            if not args.keep_temp:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+        else:
+            print(f"Intermediate files kept in {temp_dir}", file=sys.stderr)
+            print("Re-run the same command with --resume to continue", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -26,37 +26,58 @@ Examples:
   # Viewpoint change
   python tools/image_edit.py --input photo.jpg --viewpoint "front facing"
 
-  # Batch processing
-  python tools/image_edit.py --input-dir ./photos --background "studio backdrop" --output-dir ./edited
+  # Batch processing (8 edits in flight)
+  python tools/image_edit.py --input-dir ./photos --background "studio backdrop" --output-dir ./edited --concurrency 8
 
   # With seed for reproducibility
   python tools/image_edit.py --input photo.jpg --background "office" --seed 42
+
+  # Seed sweep / prompt variants in one job (saved as _v1, _v2, ...)
+  python tools/image_edit.py --input photo.jpg --background office --seeds 1 2 3 4
+  python tools/image_edit.py --input photo.jpg --variants "Add a smile" "Add sunglasses" --seeds 1 2
 """
 
 import argparse
 import base64
 import io
 import json
+import math
 import os
 import sys
+import tempfile
 import time
 from pathlib import Path
 from typing import Optional
 
 try:
     import requests
-    from PIL import Image
+    from PIL import Image, ImageOps
     from dotenv import load_dotenv
 except ImportError as e:
     print(f"Missing dependency: {e}")
     print("Install with: pip install requests Pillow python-dotenv")
     sys.exit(1)
 
+# Add parent to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+import r2_transfer
+import runpod_api
+import runpod_jobs
+import upload_cache
+
 load_dotenv()
 
 RUNPOD_API_KEY = os.getenv("RUNPOD_API_KEY")
 QWEN_EDIT_ENDPOINT = os.getenv("RUNPOD_QWEN_EDIT_ENDPOINT_ID")
 
+# The handler runs at most this many variants in one job
+MAX_VARIANTS = 16
+
+# Inputs larger than this are shrunk before upload. The endpoint resizes to at
+# most 1024x1024 pixels anyway (auto_resize); the headroom keeps it in the top
+# bucket and gives its final downscale more detail to work from.
+PRE_SHRINK_PIXELS = 2 * 1024 * 1024
+
 # Background presets
 BACKGROUND_PRESETS = {
     "office": "modern professional office with glass windows and city view",
@@ -122,6 +143,29 @@ def decode_and_save(base64_data: str, output_path: str):
         f.write(base64.b64decode(base64_data))
 
 
+def save_result(result: dict, output_path: str) -> bool:
+    """Save the edited image from the job's R2 key, URL or inline base64."""
+    if result.get("r2_key") and r2_transfer.download(result["r2_key"], output_path):
+        return True
+
+    if result.get("output_url"):
+        try:
+            response = requests.get(result["output_url"], stream=True, timeout=300)
+            response.raise_for_status()
+            with open(output_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+            return True
+        except requests.exceptions.RequestException as e:
+            log(f"Download error: {e}", "warn")
+
+    if result.get("edited_image_base64"):
+        decode_and_save(result["edited_image_base64"], output_path)
+        return True
+
+    return False
+
+
 def build_prompt(
     custom_prompt: Optional[str] = None,
     background: Optional[str] = None,
@@ -162,28 +206,139 @@ def build_prompt(
     return prompt
 
 
-def call_endpoint(payload: dict, timeout: int = 600) -> tuple[dict, float]:
-    """Call RunPod endpoint and return (result, elapsed_seconds)."""
+def shrink_for_upload(path: str, work_dir: str) -> tuple[str, tuple[int, int]]:
+    """Return (path to send, original size), shrinking images above PRE_SHRINK_PIXELS.
+
+    The shrunk copy is written to work_dir in the source format, upright
+    (its EXIF orientation applied, since the copy has no EXIF).
+    """
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img)
+        width, height = img.size
+        if width * height <= PRE_SHRINK_PIXELS:
+            return path, (width, height)
+
+        scale = math.sqrt(PRE_SHRINK_PIXELS / (width * height))
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        shrunk = img.resize(size, Image.LANCZOS)
+
+    suffix = Path(path).suffix.lower()
+    if suffix in (".jpg", ".jpeg") and shrunk.mode != "RGB":
+        shrunk = shrunk.convert("RGB")
+    out_path = str(Path(work_dir) / f"{Path(path).stem}{suffix}")
+    shrunk.save(out_path, quality=95)
+    log(f"Pre-shrunk {Path(path).name}: {width}x{height} -> {size[0]}x{size[1]}", "dim")
+    return out_path, (width, height)
+
+
+def build_payload(
+    input_paths: list[str],
+    prompt: str,
+    seed: Optional[int] = None,
+    steps: int = 8,
+    guidance: float = 1.0,
+    negative_prompt: Optional[str] = None,
+    variants: Optional[list[dict]] = None,
+    resize: bool = True,
+    keep_size: bool = False,
+) -> tuple[dict, list[str]]:
+    """Build the job payload: primary image + up to 2 reference images.
+
+    With R2 configured, the images are uploaded and sent as URLs, and the
+    handler returns the result as a URL too. Otherwise they're inlined as
+    base64. Returns (payload, r2_keys), the keys to clean up after the job.
+
+    With resize, large images are shrunk before sending and the endpoint
+    resizes them to its resolution bucket; keep_size asks it to scale the
+    result back to the primary image's original size.
+    """
+    payload = {
+        "input": {
+            "prompt": prompt,
+            "num_inference_steps": steps,
+            "guidance_scale": guidance,
+            "auto_resize": resize,
+        }
+    }
+
+    if seed is not None:
+        payload["input"]["seed"] = seed
+
+    if negative_prompt:
+        payload["input"]["negative_prompt"] = negative_prompt
+
+    if variants:
+        payload["input"]["variants"] = variants
+
+    # Primary image + up to 2 more for 3 total
+    with tempfile.TemporaryDirectory(prefix="image_edit_") as work_dir:
+        images = []
+        for path in input_paths[:3]:
+            if resize:
+                path, size = shrink_for_upload(path, work_dir)
+            else:
+                with Image.open(path) as img:
+                    size = img.size
+            images.append(path)
+            if keep_size and len(images) == 1:
+                payload["input"]["restore_size"] = list(size)
+
+        urls, r2_keys = [], []
+        client, r2_config = r2_transfer.configured_client()
+        if client:
+            for path in images:
+                url, r2_key = upload_cache.upload_input(path, "qwen-edit/input")
+                if not url:
+                    break
+                urls.append(url)
+                r2_keys.append(r2_key)
+
+        if client and len(urls) == len(images):
+            payload["input"]["image_url"] = urls[0]
+            if len(urls) > 1:
+                payload["input"]["image_urls"] = urls[1:]
+            payload["input"]["r2"] = {
+                "endpoint_url": r2_config["endpoint_url"],
+                "access_key_id": r2_config["access_key_id"],
+                "secret_access_key": r2_config["secret_access_key"],
+                "bucket_name": r2_config["bucket_name"],
+            }
+        else:
+            if r2_keys:
+                # Partial upload; send everything inline instead
+                upload_cache.cleanup(r2_keys)
+                r2_keys = []
+            payload["input"]["image_base64"] = encode_image(images[0])
+            if len(images) > 1:
+                payload["input"]["images_base64"] = [encode_image(p) for p in images[1:]]
+
+    return payload, r2_keys
+
+
+def check_endpoint_config() -> bool:
+    """Log and return False if the RunPod key or endpoint isn't configured."""
     if not RUNPOD_API_KEY:
         log("RUNPOD_API_KEY not set in .env", "error")
-        sys.exit(1)
+        return False
 
     if not QWEN_EDIT_ENDPOINT:
         log("RUNPOD_QWEN_EDIT_ENDPOINT_ID not set in .env", "error")
         log("Deploy the endpoint first, then add to .env", "info")
-        sys.exit(1)
+        return False
+
+    return True
 
-    headers = {
-        "Authorization": f"Bearer {RUNPOD_API_KEY}",
-        "Content-Type": "application/json"
-    }
+
+def call_endpoint(payload: dict, timeout: int = 600, verbose: bool = True) -> tuple[dict, float]:
+    """Call RunPod endpoint and return (result, elapsed_seconds)."""
+    if not check_endpoint_config():
+        sys.exit(1)
 
     start = time.time()
 
     try:
-        # Submit async job
-        run_url = f"https://api.runpod.ai/v2/{QWEN_EDIT_ENDPOINT}/run"
-        response = requests.post(run_url, json=payload, headers=headers, timeout=30)
+        # Warm edits finish within the /runsync wait; cold starts fall back to polling
+        response = runpod_api.submit_job(QWEN_EDIT_ENDPOINT, RUNPOD_API_KEY, payload, sync=True)
         response.raise_for_status()
         result = response.json()
 
@@ -197,20 +352,25 @@ def call_endpoint(payload: dict, timeout: int = 600) -> tuple[dict, float]:
             return {"error": result.get("error", "Unknown error")}, time.time() - start
 
         # Poll for completion
-        log(f"Processing... (cold start may take 5-10 min on first run)", "warn")
-        status_url = f"https://api.runpod.ai/v2/{QWEN_EDIT_ENDPOINT}/status/{job_id}"
+        if verbose:
+            log(f"Processing... (cold start may take 5-10 min on first run)", "warn")
+        status_url = f"{runpod_api.RUNPOD_API_URL}/{QWEN_EDIT_ENDPOINT}/status/{job_id}"
 
-        poll_interval = 5
+        schedule = runpod_api.PollSchedule()
+        schedule.observe(status)
         last_status = None
         while time.time() - start < timeout:
-            time.sleep(poll_interval)
+            time.sleep(schedule.next_interval())
             elapsed = time.time() - start
 
-            status_resp = requests.get(status_url, headers=headers, timeout=30)
+            status_resp = runpod_api.get(status_url, RUNPOD_API_KEY)
+            if status_resp.status_code != 200:
+                continue
             status_data = status_resp.json()
             status = status_data.get("status")
+            schedule.observe(status)
 
-            if status != last_status:
+            if verbose and status != last_status:
                 if status == "IN_PROGRESS":
                     log(f"[{elapsed:.0f}s] Generating...", "dim")
                 elif status == "IN_QUEUE":
@@ -243,6 +403,8 @@ def edit_image(
     steps: int = 8,
     guidance: float = 1.0,
     negative_prompt: Optional[str] = None,
+    resize: bool = True,
+    keep_size: bool = False,
     open_result: bool = True,
     verbose: bool = False,
 ) -> Optional[str]:
@@ -266,35 +428,24 @@ def edit_image(
 
     log(f"Prompt: {prompt}", "info")
 
-    # Build payload with primary image + optional reference images
-    payload = {
-        "input": {
-            "image_base64": encode_image(input_paths[0]),
-            "prompt": prompt,
-            "num_inference_steps": steps,
-            "guidance_scale": guidance,
-        }
-    }
+    payload, r2_keys = build_payload(
+        input_paths, prompt, seed, steps, guidance, negative_prompt, resize=resize, keep_size=keep_size
+    )
 
     if guidance != 1.0:
         log(f"Guidance: {guidance}", "dim")
 
-    # Add additional reference images (up to 2 more for 3 total)
     if len(input_paths) > 1:
         log(f"Multi-image mode: {len(input_paths)} images", "info")
-        payload["input"]["images_base64"] = [encode_image(p) for p in input_paths[1:3]]
-
-    if seed is not None:
-        payload["input"]["seed"] = seed
 
     if negative_prompt:
-        payload["input"]["negative_prompt"] = negative_prompt
         log(f"Negative: {negative_prompt}", "dim")
 
     # Call endpoint
     result, elapsed = call_endpoint(payload)
 
     if "error" in result:
+        upload_cache.cleanup(r2_keys)
         log(f"Edit failed: {result['error']}", "error")
         return None
 
@@ -304,7 +455,11 @@ def edit_image(
         output_path = f"{input_stem}_edited.png"
 
     # Save result
-    decode_and_save(result["edited_image_base64"], output_path)
+    if not save_result(result, output_path):
+        upload_cache.cleanup(r2_keys)
+        log(f"No image in result: {list(result.keys())}", "error")
+        return None
+    upload_cache.cleanup([*r2_keys, result.get("r2_key")])
 
     # Report results
     inference_ms = result.get("inference_time_ms", 0)
@@ -328,18 +483,247 @@ def edit_image(
     return output_path
 
 
+def edit_variants(
+    input_paths: list[str],
+    variants: list[dict],
+    output_path: Optional[str] = None,
+    steps: int = 8,
+    guidance: float = 1.0,
+    negative_prompt: Optional[str] = None,
+    resize: bool = True,
+    keep_size: bool = False,
+    open_result: bool = True,
+    verbose: bool = False,
+) -> list[str]:
+    """
+    Run several prompt/seed variants of one edit in a single job.
+
+    Each variant is a dict with "prompt" and optionally "seed". Results are
+    saved as <output stem>_v1.png, _v2.png, ... in variant order.
+
+    Returns the saved paths (empty on failure).
+    """
+    if len(variants) > MAX_VARIANTS:
+        log(f"At most {MAX_VARIANTS} variants per job (got {len(variants)})", "error")
+        return []
+
+    for path in input_paths:
+        if not Path(path).exists():
+            log(f"File not found: {path}", "error")
+            return []
+
+    log(f"Input: {input_paths[0]}", "info")
+    log(f"Variants: {len(variants)} in one job", "info")
+    for i, variant in enumerate(variants, 1):
+        log(f"v{i}: seed {variant.get('seed', 'random')}, {variant['prompt']}", "dim")
+
+    payload, r2_keys = build_payload(
+        input_paths, variants[0]["prompt"], None, steps, guidance, negative_prompt,
+        variants=variants, resize=resize, keep_size=keep_size,
+    )
+
+    # Call endpoint; allow for the extra generation time
+    result, elapsed = call_endpoint(payload, timeout=600 + 60 * len(variants))
+
+    if "error" in result:
+        upload_cache.cleanup(r2_keys)
+        log(f"Edit failed: {result['error']}", "error")
+        return []
+
+    base = Path(output_path or f"{Path(input_paths[0]).stem}_edited.png")
+    saved = []
+    for i, output in enumerate(result.get("outputs", []), 1):
+        variant_path = str(base.with_name(f"{base.stem}_v{i}{base.suffix or '.png'}"))
+        if save_result(output, variant_path):
+            saved.append(variant_path)
+            log(f"Saved: {variant_path} (seed {output.get('seed')})", "success")
+        else:
+            log(f"v{i}: no image in result", "error")
+
+    upload_cache.cleanup([*r2_keys, *(output.get("r2_key") for output in result.get("outputs", []))])
+
+    inference_ms = result.get("inference_time_ms", 0)
+    log(
+        f"Time: {elapsed:.1f}s total, {inference_ms/1000:.1f}s inference "
+        f"({result.get('variant_batch_size', 1)} variants per pipeline call)",
+        "dim",
+    )
+
+    if verbose:
+        # Estimate cost (L4 pricing)
+        cost = (elapsed / 3600) * 0.34
+        log(f"Est. cost: ${cost:.4f} (${cost / max(len(saved), 1):.4f} per image)", "dim")
+
+    # Open results on macOS
+    if open_result and saved and sys.platform == "darwin":
+        import subprocess
+        subprocess.run(["open", *saved], check=False)
+
+    return saved
+
+
+def edit_job(
+    input_paths: list[str],
+    prompt: str,
+    output_path: str,
+    seed: Optional[int] = None,
+    steps: int = 8,
+    guidance: float = 1.0,
+    negative_prompt: Optional[str] = None,
+    resize: bool = True,
+    keep_size: bool = False,
+) -> runpod_jobs.RunPodJob:
+    """Build the upload / generate / save stages of one edit for runpod_jobs."""
+
+    def upload(state: dict) -> dict:
+        payload, r2_keys = build_payload(
+            input_paths, prompt, seed, steps, guidance, negative_prompt, resize=resize, keep_size=keep_size
+        )
+        state["r2_keys"].extend(r2_keys)
+        return {**state, "payload": payload}
+
+    def generate(state: dict) -> dict:
+        result, elapsed = call_endpoint(state["payload"], verbose=False)
+        if "error" in result:
+            return {"error": str(result["error"])}
+        return {**state, "result": result, "endpoint_seconds": round(elapsed, 2)}
+
+    def save(state: dict) -> dict:
+        result = state["result"]
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        if not save_result(result, output_path):
+            return {"error": f"No image in result: {list(result.keys())}"}
+        upload_cache.cleanup([*state["r2_keys"], result.get("r2_key")])
+        return {
+            "success": True,
+            "output": output_path,
+            "endpoint_seconds": state["endpoint_seconds"],
+            "inference_seconds": round(result.get("inference_time_ms", 0) / 1000, 2),
+            "seed": result.get("seed"),
+        }
+
+    return runpod_jobs.RunPodJob(
+        name=Path(input_paths[0]).name,
+        upload=upload,
+        run=generate,
+        download=save,
+        cleanup=lambda state: upload_cache.cleanup(state["r2_keys"]),
+        state={"r2_keys": []},
+    )
+
+
+class BatchProgress:
+    """Live table of in-flight edits, redrawn in place on a terminal.
+
+    Finished edits are logged above the table as they complete. When stdout
+    isn't a terminal only those lines are printed.
+    """
+
+    STAGE_LABELS = {"upload": "uploading", "run": "generating", "download": "saving"}
+    MAX_ROWS = 12
+
+    def __init__(self, total: int):
+        self.total = total
+        self.stages: dict[str, str] = {}
+        self.started: dict[str, float] = {}
+        self.done = 0
+        self.failed = 0
+        self.lines_drawn = 0
+        self.live = sys.stdout.isatty()
+
+    def _clear(self):
+        if self.lines_drawn:
+            # Move up over the previous table and erase it
+            print(f"\033[{self.lines_drawn}F\033[J", end="")
+            self.lines_drawn = 0
+
+    def _draw(self):
+        if not self.live:
+            return
+        now = time.time()
+        rows = [
+            f"   {name[:40]:40} {self.STAGE_LABELS[stage]:11} {now - self.started[name]:6.1f}s"
+            for name, stage in list(self.stages.items())[: self.MAX_ROWS]
+        ]
+        if len(self.stages) > self.MAX_ROWS:
+            rows.append(f"   ... and {len(self.stages) - self.MAX_ROWS} more")
+        queued = self.total - self.done - self.failed - len(self.stages)
+        rows.append(
+            f"\033[90m   {self.done + self.failed}/{self.total} finished, {self.failed} failed, "
+            f"{len(self.stages)} in flight, {queued} queued\033[0m"
+        )
+        print("\n".join(rows))
+        self.lines_drawn = len(rows)
+
+    def stage(self, name: str, stage: str):
+        self.started.setdefault(name, time.time())
+        self.stages[name] = stage
+        self._clear()
+        self._draw()
+
+    def finish(self, result: dict):
+        name = result["name"]
+        self.stages.pop(name, None)
+        self._clear()
+        position = f"[{self.done + self.failed + 1}/{self.total}]"
+        if result.get("error"):
+            self.failed += 1
+            log(f"{position} {name}: {result['error']}", "error")
+        else:
+            self.done += 1
+            log(f"{position} {name} -> {result['output']} ({result['elapsed_seconds']:.1f}s)", "success")
+        self._draw()
+
+
+def print_batch_summary(results: list[dict]):
+    """Print per-image latency and RunPod API latency for a finished batch."""
+    print()
+    log("Per-image latency (queue + generation + transfer):", "info")
+    print(f"   {'image':40} {'total':>8} {'endpoint':>9} {'inference':>10}")
+    for result in sorted(results, key=lambda r: r["name"]):
+        if result.get("error"):
+            print(f"   {result['name'][:40]:40} {'failed':>8}")
+            continue
+        print(
+            f"   {result['name'][:40]:40} {result['elapsed_seconds']:7.1f}s "
+            f"{result['endpoint_seconds']:8.1f}s {result['inference_seconds']:9.1f}s"
+        )
+
+    latencies = sorted(r["elapsed_seconds"] for r in results if not r.get("error"))
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+        log(
+            f"Images: mean {sum(latencies) / len(latencies):.1f}s, "
+            f"p50 {latencies[len(latencies) // 2]:.1f}s, p95 {p95:.1f}s, max {latencies[-1]:.1f}s",
+            "dim",
+        )
+
+    api = runpod_api.latency_summary()
+    if api["count"]:
+        log(
+            f"RunPod API: {api['count']} requests, mean {api['mean']:.2f}s, "
+            f"p50 {api['p50']:.2f}s, p95 {api['p95']:.2f}s",
+            "dim",
+        )
+
+
 def batch_edit(
     input_dir: str,
     output_dir: str,
     prompt: str,
     seed: Optional[int] = None,
     steps: int = 8,
+    guidance: float = 1.0,
+    negative_prompt: Optional[str] = None,
+    resize: bool = True,
+    keep_size: bool = False,
+    concurrency: int = runpod_jobs.DEFAULT_GPU_CONCURRENCY,
     verbose: bool = False,
 ) -> tuple[int, int]:
     """
-    Batch edit all images in a directory.
+    Batch edit all images in a directory, `concurrency` jobs at a time.
 
-    Returns (success_count, fail_count).
+    Images are saved as their jobs finish. Returns (success_count, fail_count).
     """
     input_path = Path(input_dir)
     output_path = Path(output_dir)
@@ -348,41 +732,60 @@ def batch_edit(
         log(f"Input directory not found: {input_dir}", "error")
         return 0, 0
 
-    output_path.mkdir(parents=True, exist_ok=True)
-
     # Find all images
     extensions = {".jpg", ".jpeg", ".png", ".webp"}
-    images = [f for f in input_path.iterdir() if f.suffix.lower() in extensions]
+    images = sorted(f for f in input_path.iterdir() if f.suffix.lower() in extensions)
 
     if not images:
         log(f"No images found in {input_dir}", "warn")
         return 0, 0
 
-    log(f"Found {len(images)} images to process", "info")
+    if not check_endpoint_config():
+        return 0, len(images)
 
-    success = 0
-    fail = 0
+    output_path.mkdir(parents=True, exist_ok=True)
 
-    for i, img_path in enumerate(images, 1):
-        log(f"\n[{i}/{len(images)}] Processing {img_path.name}...", "info")
-        out_file = output_path / f"{img_path.stem}_edited.png"
+    log(f"Found {len(images)} images to process ({concurrency} at a time)", "info")
 
-        result = edit_image(
+    jobs = [
+        edit_job(
             input_paths=[str(img_path)],
             prompt=prompt,
-            output_path=str(out_file),
+            output_path=str(output_path / f"{img_path.stem}_edited.png"),
             seed=seed,
             steps=steps,
-            open_result=False,
-            verbose=verbose,
+            guidance=guidance,
+            negative_prompt=negative_prompt,
+            resize=resize,
+            keep_size=keep_size,
         )
+        for img_path in images
+    ]
 
-        if result:
-            success += 1
-        else:
-            fail += 1
+    progress = BatchProgress(len(jobs))
+    start = time.time()
+    results = runpod_jobs.run_jobs_blocking(
+        jobs,
+        upload_concurrency=concurrency,
+        gpu_concurrency=concurrency,
+        download_concurrency=concurrency,
+        on_result=progress.finish,
+        on_stage=progress.stage,
+    )
+
+    print_batch_summary(results)
 
-    log(f"\nBatch complete: {success} success, {fail} failed", "success" if fail == 0 else "warn")
+    if verbose:
+        # Estimate cost (L4 pricing), billed per job while it holds a worker
+        endpoint_seconds = sum(r.get("endpoint_seconds", 0) for r in results)
+        log(f"Est. cost: ${(endpoint_seconds / 3600) * 0.34:.4f}", "dim")
+
+    success = sum(1 for result in results if not result.get("error"))
+    fail = len(results) - success
+    log(
+        f"\nBatch complete in {time.time() - start:.1f}s: {success} success, {fail} failed",
+        "success" if fail == 0 else "warn",
+    )
     return success, fail
 
 
@@ -412,7 +815,8 @@ Examples:
   %(prog)s --input photo.jpg --style cyberpunk
   %(prog)s --input photo.jpg --prompt "Add sunglasses and a smile"
   %(prog)s --input photo.jpg --background office --style cinematic
-  %(prog)s --input-dir ./photos --background studio --output-dir ./edited
+  %(prog)s --input photo.jpg --background office --seeds 1 2 3 4
+  %(prog)s --input-dir ./photos --background studio --output-dir ./edited --concurrency 8
   %(prog)s --list-presets
         """
     )
@@ -428,12 +832,15 @@ Examples:
     edit_group.add_argument("--background", "-b", help="Background preset or description")
     edit_group.add_argument("--style", "-s", help="Style preset or description")
     edit_group.add_argument("--viewpoint", "-v", help="Viewpoint preset or description")
+    edit_group.add_argument("--variants", nargs="+", metavar="PROMPT", help="Several custom prompts to try in one job, instead of --prompt (each combined with --background/--style/--viewpoint)")
+    edit_group.add_argument("--seeds", nargs="+", type=int, help="Several seeds to try in one job (with --variants: every prompt x every seed)")
 
     # Output options
     output_group = parser.add_argument_group("Output")
     output_group.add_argument("--output", "-o", help="Output file path")
     output_group.add_argument("--output-dir", help="Output directory for batch processing")
     output_group.add_argument("--no-open", action="store_true", help="Don't open result automatically")
+    output_group.add_argument("--keep-size", action="store_true", help="Scale the result back to the input's original size")
 
     # Advanced options
     adv_group = parser.add_argument_group("Advanced")
@@ -441,6 +848,8 @@ Examples:
     adv_group.add_argument("--steps", type=int, default=8, help="Inference steps (default: 8)")
     adv_group.add_argument("--guidance", "-g", type=float, default=1.0, help="Guidance scale - higher = follows prompt more strictly (default: 1.0)")
     adv_group.add_argument("--negative", "-n", help="Negative prompt - things to avoid")
+    adv_group.add_argument("--no-resize", action="store_true", help="Send images at full size; skip pre-shrinking and the endpoint's resolution bucketing (slower)")
+    adv_group.add_argument("--concurrency", type=int, default=runpod_jobs.DEFAULT_GPU_CONCURRENCY, help=f"Batch: edits in flight at once (default: {runpod_jobs.DEFAULT_GPU_CONCURRENCY})")
     adv_group.add_argument("--verbose", action="store_true", help="Show detailed output")
 
     # Utility
@@ -459,22 +868,30 @@ Examples:
         print("\n\033[91m!! Specify --input or --input-dir\033[0m")
         sys.exit(1)
 
-    if not any([args.prompt, args.background, args.style, args.viewpoint]):
+    if not any([args.prompt, args.variants, args.background, args.style, args.viewpoint]):
         parser.print_help()
         print("\n\033[91m!! Specify at least one edit: --prompt, --background, --style, or --viewpoint\033[0m")
         sys.exit(1)
 
-    # Build the prompt
+    if (args.variants or args.seeds) and args.input_dir:
+        print("\n\033[91m!! --variants/--seeds work with --input, not --input-dir\033[0m")
+        sys.exit(1)
+
+    # Build the prompt (one per variant)
     try:
-        prompt = build_prompt(
-            custom_prompt=args.prompt,
-            background=args.background,
-            style=args.style,
-            viewpoint=args.viewpoint,
-        )
+        prompts = [
+            build_prompt(
+                custom_prompt=custom_prompt,
+                background=args.background,
+                style=args.style,
+                viewpoint=args.viewpoint,
+            )
+            for custom_prompt in (args.variants or [args.prompt])
+        ]
     except ValueError as e:
         log(str(e), "error")
         sys.exit(1)
+    prompt = prompts[0]
 
     print()
     log("Qwen Image Edit", "info")
@@ -489,6 +906,29 @@ Examples:
             prompt=prompt,
             seed=args.seed,
             steps=args.steps,
+            guidance=args.guidance,
+            negative_prompt=args.negative,
+            resize=not args.no_resize,
+            keep_size=args.keep_size,
+            concurrency=args.concurrency,
+            verbose=args.verbose,
+        )
+    elif args.variants or args.seeds:
+        variants = [
+            {"prompt": variant_prompt, **({"seed": seed} if seed is not None else {})}
+            for variant_prompt in prompts
+            for seed in (args.seeds or [args.seed])
+        ]
+        edit_variants(
+            input_paths=args.input,
+            variants=variants,
+            output_path=args.output,
+            steps=args.steps,
+            guidance=args.guidance,
+            negative_prompt=args.negative,
+            resize=not args.no_resize,
+            keep_size=args.keep_size,
+            open_result=not args.no_open,
             verbose=args.verbose,
         )
     else:
@@ -500,6 +940,8 @@ Examples:
             steps=args.steps,
             guidance=args.guidance,
             negative_prompt=args.negative,
+            resize=not args.no_resize,
+            keep_size=args.keep_size,
             open_result=not args.no_open,
             verbose=args.verbose,
         )
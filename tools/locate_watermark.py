@@ -35,6 +35,10 @@ import sys
 import tempfile
 from pathlib import Path
 
+# Add parent to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+import media_probe
+
 
 # Watermark presets (x, y, width, height) - will be scaled to video dimensions
 PRESETS = {
@@ -182,32 +186,15 @@ Examples:
 
 
 def get_video_info(video_path: str) -> dict | None:
-    """Get video dimensions and duration using ffprobe."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-select_streams", "v:0",
-                "-show_entries", "stream=width,height",
-                "-show_entries", "format=duration",
-                "-of", "json",
-                video_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            stream = data.get("streams", [{}])[0]
-            fmt = data.get("format", {})
-            return {
-                "width": stream.get("width"),
-                "height": stream.get("height"),
-                "duration": float(fmt.get("duration", 0)),
-            }
-    except Exception:
-        pass
-    return None
+    """Get video dimensions and duration from the shared probe cache."""
+    stream = media_probe.get_stream(video_path, "video")
+    if stream is None:
+        return None
+    return {
+        "width": stream.get("width"),
+        "height": stream.get("height"),
+        "duration": media_probe.get_duration(video_path) or 0.0,
+    }
 
 
 def parse_region(region_str: str) -> tuple[int, int, int, int] | None:
@@ -0,0 +1,185 @@
+"""Shared ffprobe cache for video toolkit tools.
+
+Every tool asks ffprobe about the same handful of fields (duration, size,
+frame rate, audio presence). ``probe()`` runs ffprobe once per file with all
+stream and format fields, and memoizes the result in memory and in
+``~/.video-toolkit/probe-cache.json``. Entries are keyed by resolved path,
+size and mtime, so a file that is rewritten is probed again.
+"""
+
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+
+CACHE_PATH = Path(
+    os.getenv("VIDEO_TOOLKIT_PROBE_CACHE", Path.home() / ".video-toolkit" / "probe-cache.json")
+)
+CACHE_MAX_ENTRIES = 500
+
+_lock = threading.Lock()
+_memory: dict[str, dict] = {}
+_disk: dict[str, dict] | None = None
+
+
+def _cache_key(path: str) -> str | None:
+    """Key a file by resolved path, size and mtime; None if it doesn't exist."""
+    try:
+        resolved = Path(path).resolve()
+        stat = resolved.stat()
+    except OSError:
+        return None
+    return f"{resolved}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def _load_disk() -> dict[str, dict]:
+    global _disk
+    if _disk is None:
+        try:
+            with open(CACHE_PATH) as f:
+                _disk = json.load(f)
+            if not isinstance(_disk, dict):
+                _disk = {}
+        except (OSError, ValueError):
+            _disk = {}
+    return _disk
+
+
+def _save_disk(key: str, data: dict) -> None:
+    """Merge one entry into the on-disk cache and write it atomically."""
+    disk = _load_disk()
+    try:
+        with open(CACHE_PATH) as f:
+            on_disk = json.load(f)
+        if isinstance(on_disk, dict):
+            # Keep entries written by other processes since we loaded
+            disk.update({k: v for k, v in on_disk.items() if k not in disk})
+    except (OSError, ValueError):
+        pass
+
+    disk[key] = data
+    if len(disk) > CACHE_MAX_ENTRIES:
+        for stale in list(disk)[: len(disk) - CACHE_MAX_ENTRIES]:
+            del disk[stale]
+
+    tmp = None
+    try:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_PATH.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(disk, f)
+        os.replace(tmp, CACHE_PATH)
+    except OSError:
+        # The cache is an optimization; a read-only home must not break tools
+        if tmp:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+def probe(path: str) -> dict | None:
+    """Return ffprobe's ``{"streams": [...], "format": {...}}`` for a file.
+
+    Returns None if the file is missing, ffprobe isn't installed or the file
+    can't be parsed. Failures are not cached.
+    """
+    key = _cache_key(path)
+    if key is None:
+        return None
+
+    with _lock:
+        if key in _memory:
+            return _memory[key]
+        cached = _load_disk().get(key)
+        if cached is not None:
+            _memory[key] = cached
+            return cached
+
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-show_streams", "-show_format",
+                "-of", "json",
+                str(path),
+            ],
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        parsed = json.loads(result.stdout)
+    except ValueError:
+        return None
+
+    data = {
+        "streams": parsed.get("streams", []),
+        "format": parsed.get("format", {}),
+    }
+    with _lock:
+        _memory[key] = data
+        _save_disk(key, data)
+    return data
+
+
+def get_stream(path: str, codec_type: str = "video") -> dict | None:
+    """Return the first stream of a type ("video", "audio", ...), or None."""
+    data = probe(path)
+    if not data:
+        return None
+    for stream in data["streams"]:
+        # Cover art is reported as a video stream; skip it
+        if stream.get("codec_type") == codec_type and not (
+            stream.get("disposition", {}).get("attached_pic")
+        ):
+            return stream
+    return None
+
+
+def has_audio(path: str) -> bool | None:
+    """Whether the file has an audio stream; None if it couldn't be probed."""
+    if probe(path) is None:
+        return None
+    return get_stream(path, "audio") is not None
+
+
+def parse_rate(rate: str | None) -> float | None:
+    """Parse an ffprobe rate such as "30000/1001" or "29.97"; None if unset."""
+    if not rate:
+        return None
+    try:
+        if "/" in rate:
+            num, den = rate.split("/")
+            if float(den) == 0:
+                return None
+            value = float(num) / float(den)
+        else:
+            value = float(rate)
+    except ValueError:
+        return None
+    return value or None
+
+
+def get_duration(path: str) -> float | None:
+    """Container duration in seconds."""
+    data = probe(path)
+    try:
+        return float(data["format"]["duration"])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+def get_stream_duration(path: str, codec_type: str = "audio") -> float | None:
+    """Duration of the first stream of a type, in seconds."""
+    stream = get_stream(path, codec_type)
+    try:
+        return float(stream["duration"])
+    except (TypeError, KeyError, ValueError):
+        return None
@@ -22,6 +22,7 @@ from elevenlabs.client import ElevenLabs
 # Add parent to path for local imports
 sys.path.insert(0, str(Path(__file__).parent))
 from config import get_elevenlabs_api_key
+import media_probe
 
 
 def parse_args():
@@ -78,29 +79,8 @@ Prompt tips:
 
 
 def get_audio_duration(file_path: str) -> float | None:
-    """Get audio duration using ffprobe if available."""
-    import subprocess
-
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe",
-                "-v",
-                "error",
-                "-show_entries",
-                "format=duration",
-                "-of",
-                "csv=p=0",
-                file_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-    except (FileNotFoundError, ValueError):
-        pass
-    return None
+    """Get audio duration from the shared probe cache, if ffprobe is available."""
+    return media_probe.get_duration(file_path)
 
 
 def main():
@@ -55,6 +55,10 @@ import sys
 import tempfile
 from pathlib import Path
 
+# Add parent to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+import media_probe
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -147,90 +151,29 @@ def parse_args():
 
 
 def get_media_duration(file_path: str) -> float | None:
-    """Get media duration using ffprobe."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "csv=p=0",
-                file_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-    except (FileNotFoundError, ValueError):
-        pass
-    return None
+    """Get media duration from the shared probe cache."""
+    return media_probe.get_duration(file_path)
 
 
 def get_audio_duration(file_path: str) -> float | None:
-    """Get audio stream duration using ffprobe."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-select_streams", "a",
-                "-show_entries", "stream=duration",
-                "-of", "csv=p=0",
-                file_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-    except (FileNotFoundError, ValueError):
-        pass
-    return None
+    """Get audio stream duration from the shared probe cache."""
+    return media_probe.get_stream_duration(file_path, "audio")
 
 
 def get_video_resolution(file_path: str) -> tuple[int, int] | None:
-    """Get video resolution using ffprobe."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-select_streams", "v:0",
-                "-show_entries", "stream=width,height",
-                "-of", "csv=p=0",
-                file_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            w, h = result.stdout.strip().split(",")
-            return int(w), int(h)
-    except (FileNotFoundError, ValueError):
-        pass
+    """Get video resolution from the shared probe cache."""
+    stream = media_probe.get_stream(file_path, "video")
+    if stream and stream.get("width") and stream.get("height"):
+        return int(stream["width"]), int(stream["height"])
     return None
 
 
 def get_frame_rate(file_path: str) -> int:
-    """Get video frame rate using ffprobe."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-select_streams", "v:0",
-                "-show_entries", "stream=r_frame_rate",
-                "-of", "csv=p=0",
-                file_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            rate = result.stdout.strip()
-            if "/" in rate:
-                num, den = rate.split("/")
-                return round(int(num) / int(den))
-            return int(float(rate))
-    except (FileNotFoundError, ValueError):
-        pass
+    """Get video frame rate from the shared probe cache."""
+    stream = media_probe.get_stream(file_path, "video")
+    rate = media_probe.parse_rate(stream.get("r_frame_rate")) if stream else None
+    if rate:
+        return round(rate)
     return 24  # Default
 
 
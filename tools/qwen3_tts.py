@@ -47,11 +47,23 @@ from pathlib import Path
 
 import requests
 
+# Add parent to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+import media_probe
+import r2_transfer
+import runpod_api
+import runpod_jobs
+import upload_cache
+
 # Docker image for RunPod endpoint
 QWEN3_TTS_DOCKER_IMAGE = "ghcr.io/conalmullan/video-toolkit-qwen3-tts:latest"
 QWEN3_TTS_TEMPLATE_NAME = "video-toolkit-qwen3-tts"
 QWEN3_TTS_ENDPOINT_NAME = "video-toolkit-qwen3-tts"
 
+# Rough run-time estimate used to pace status polling
+SPEECH_CHARS_PER_SECOND = 15  # typical narration pace
+GENERATION_TIME_MULTIPLIER = 1.5  # seconds of GPU time per second of speech
+
 # Built-in speakers
 BUILTIN_SPEAKERS = {
     "Ryan": "English",
@@ -119,86 +131,6 @@ def get_runpod_config() -> dict:
     }
 
 
-def _get_r2_client():
-    """Get boto3 S3 client configured for Cloudflare R2."""
-    sys.path.insert(0, str(Path(__file__).parent))
-    try:
-        from config import get_r2_config
-        r2_config = get_r2_config()
-    except ImportError:
-        r2_config = None
-
-    if not r2_config:
-        return None, None
-
-    try:
-        import boto3
-        from botocore.config import Config
-
-        client = boto3.client(
-            "s3",
-            endpoint_url=r2_config["endpoint_url"],
-            aws_access_key_id=r2_config["access_key_id"],
-            aws_secret_access_key=r2_config["secret_access_key"],
-            config=Config(signature_version="s3v4"),
-        )
-        return client, r2_config
-    except ImportError:
-        print("  boto3 not installed, skipping R2", file=sys.stderr)
-        return None, None
-
-
-def _upload_to_r2(file_path: str, prefix: str) -> tuple[str | None, str | None]:
-    """Upload to Cloudflare R2 and return presigned download URL."""
-    client, config = _get_r2_client()
-    if not client:
-        return None, None
-
-    import uuid
-    file_name = Path(file_path).name
-    object_key = f"{prefix}/{uuid.uuid4().hex[:8]}_{file_name}"
-
-    try:
-        client.upload_file(file_path, config["bucket_name"], object_key)
-
-        url = client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": config["bucket_name"], "Key": object_key},
-            ExpiresIn=7200,
-        )
-        return url, object_key
-    except Exception as e:
-        print(f"  R2 upload error: {e}", file=sys.stderr)
-        return None, None
-
-
-def _delete_from_r2(object_key: str) -> bool:
-    """Delete object from R2 after job completion."""
-    client, config = _get_r2_client()
-    if not client or not object_key:
-        return False
-
-    try:
-        client.delete_object(Bucket=config["bucket_name"], Key=object_key)
-        return True
-    except Exception:
-        return False
-
-
-def _download_from_r2(object_key: str, output_path: str) -> bool:
-    """Download object from R2 to local path."""
-    client, config = _get_r2_client()
-    if not client:
-        return False
-
-    try:
-        client.download_file(config["bucket_name"], object_key, output_path)
-        return True
-    except Exception as e:
-        print(f"  R2 download error: {e}", file=sys.stderr)
-        return False
-
-
 def upload_to_storage(file_path: str, prefix: str) -> tuple[str | None, str | None]:
     """Upload a file to temporary storage for job input."""
     file_size = Path(file_path).stat().st_size
@@ -206,7 +138,7 @@ def upload_to_storage(file_path: str, prefix: str) -> tuple[str | None, str | No
 
     print(f"Uploading {file_name} ({file_size // 1024}KB)...", file=sys.stderr)
 
-    url, r2_key = _upload_to_r2(file_path, prefix)
+    url, r2_key = upload_cache.upload_input(file_path, prefix)
     if url:
         print(f"  Upload complete (R2)", file=sys.stderr)
         return url, r2_key
@@ -265,24 +197,8 @@ def _upload_to_0x0(file_path: str, file_name: str) -> str | None:
 
 
 def get_audio_duration(file_path: str) -> float | None:
-    """Get audio duration in seconds using ffprobe."""
-    import subprocess
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "csv=p=0",
-                file_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-    except (FileNotFoundError, ValueError):
-        pass  # ffprobe not installed or invalid output
-    return None
+    """Get audio duration in seconds from the shared probe cache, if ffprobe is available."""
+    return media_probe.get_duration(file_path)
 
 
 def submit_runpod_job(
@@ -299,10 +215,13 @@ def submit_runpod_job(
     r2_config: dict | None = None,
     temperature: float | None = None,
     top_p: float | None = None,
+    sync: bool = False,
 ) -> dict | None:
-    """Submit a Qwen3-TTS job to RunPod serverless endpoint."""
-    url = f"https://api.runpod.ai/v2/{endpoint_id}/run"
+    """Submit a Qwen3-TTS job to RunPod serverless endpoint.
 
+    With sync=True the job goes to /runsync, and the response already holds the
+    output if it finished within runpod_api.RUNSYNC_WAIT_SECONDS.
+    """
     payload = {
         "input": {
             "text": text,
@@ -334,12 +253,7 @@ def submit_runpod_job(
         }
 
     try:
-        response = requests.post(
-            url,
-            json=payload,
-            headers={"Authorization": f"Bearer {api_key}"},
-            timeout=30,
-        )
+        response = runpod_api.submit_job(endpoint_id, api_key, payload, sync=sync)
 
         if response.status_code == 200:
             return response.json()
@@ -353,34 +267,42 @@ def submit_runpod_job(
         return None
 
 
+def estimate_generation_time(text: str) -> float:
+    """Estimate the worker's run time (once IN_PROGRESS) from the script length."""
+    return len(text) / SPEECH_CHARS_PER_SECOND * GENERATION_TIME_MULTIPLIER
+
+
 def poll_runpod_job(
     endpoint_id: str,
     api_key: str,
     job_id: str,
     timeout: int = 300,
-    poll_interval: int = 3,
+    poll_interval: float = 5,
+    expected_seconds: float | None = None,
     verbose: bool = True,
 ) -> dict | None:
-    """Poll RunPod job until completion or timeout."""
+    """Poll RunPod job until completion or timeout.
+
+    Polls fast after submission and after each status change, backing off to
+    every poll_interval seconds (see runpod_api.PollSchedule).
+    """
     url = f"https://api.runpod.ai/v2/{endpoint_id}/status/{job_id}"
     start_time = time.time()
     last_status = None
+    schedule = runpod_api.PollSchedule(expected_seconds, max_interval=poll_interval)
 
     while time.time() - start_time < timeout:
         try:
-            response = requests.get(
-                url,
-                headers={"Authorization": f"Bearer {api_key}"},
-                timeout=30,
-            )
+            response = runpod_api.get(url, api_key)
 
             if response.status_code != 200:
                 print(f"Status check failed: HTTP {response.status_code}", file=sys.stderr)
-                time.sleep(poll_interval)
+                time.sleep(schedule.next_interval())
                 continue
 
             data = response.json()
             status = data.get("status")
+            schedule.observe(status)
 
             if verbose and status != last_status:
                 elapsed = int(time.time() - start_time)
@@ -393,13 +315,13 @@ def poll_runpod_job(
                 print(f"Job failed: {data.get('error', 'Unknown error')}", file=sys.stderr)
                 return data
             elif status in ["IN_QUEUE", "IN_PROGRESS"]:
-                time.sleep(poll_interval)
+                time.sleep(schedule.next_interval())
             else:
-                time.sleep(poll_interval)
+                time.sleep(schedule.next_interval())
 
         except Exception as e:
             print(f"Status check error: {e}", file=sys.stderr)
-            time.sleep(poll_interval)
+            time.sleep(schedule.next_interval())
 
     print(f"Job timed out after {timeout}s", file=sys.stderr)
     return None
@@ -429,7 +351,7 @@ def download_from_url(url: str, output_path: str, verbose: bool = True) -> bool:
         return False
 
 
-def generate_audio(
+def runpod_job(
     text: str,
     output_path: str,
     speaker: str = "Ryan",
@@ -442,187 +364,205 @@ def generate_audio(
     verbose: bool = True,
     temperature: float | None = None,
     top_p: float | None = None,
-) -> dict:
-    """Generate audio using Qwen3-TTS via RunPod.
-
-    This is the main entry point, importable by voiceover.py.
-    Returns dict with: success, output, duration_seconds, duration_frames_30fps
-    """
-    start_time = time.time()
-    r2_keys_to_cleanup = []
-
-    config = get_runpod_config()
-    api_key = config.get("api_key")
-    endpoint_id = config.get("endpoint_id")
-
-    if not api_key:
-        return {"success": False, "error": "RUNPOD_API_KEY not set. Add to .env file."}
-    if not endpoint_id:
-        return {"success": False, "error": "RUNPOD_QWEN3_TTS_ENDPOINT_ID not set. Run with --setup first."}
-
-    # Get R2 config
-    sys.path.insert(0, str(Path(__file__).parent))
-    try:
-        from config import get_r2_config
-        r2_config = get_r2_config()
-    except ImportError:
-        r2_config = None
-
+) -> runpod_jobs.RunPodJob:
+    """Build the upload / run / download stages of one Qwen3-TTS RunPod job."""
     # Determine mode
     mode = "clone" if ref_audio else "custom_voice"
 
-    # Upload reference audio for clone mode
-    ref_audio_url = None
-    if mode == "clone":
-        if not Path(ref_audio).exists():
-            return {"success": False, "error": f"Reference audio not found: {ref_audio}"}
-        if not ref_text:
-            return {"success": False, "error": "ref_text is required for voice cloning"}
-
-        ref_audio_url, ref_r2_key = upload_to_storage(ref_audio, "qwen3-tts/input")
-        if not ref_audio_url:
-            return {"success": False, "error": "Failed to upload reference audio"}
-        if ref_r2_key:
-            r2_keys_to_cleanup.append(ref_r2_key)
+    def upload(state: dict) -> dict:
+        config = get_runpod_config()
+        api_key = config.get("api_key")
+        endpoint_id = config.get("endpoint_id")
+
+        if not api_key:
+            return {"success": False, "error": "RUNPOD_API_KEY not set. Add to .env file."}
+        if not endpoint_id:
+            return {"success": False, "error": "RUNPOD_QWEN3_TTS_ENDPOINT_ID not set. Run with --setup first."}
+
+        # Get R2 config
+        r2_config = r2_transfer.load_config()
+
+        state = {
+            **state,
+            "api_key": api_key,
+            "endpoint_id": endpoint_id,
+            "r2_config": r2_config,
+            "ref_audio_url": None,
+        }
 
-    if verbose:
-        print(f"Using RunPod endpoint: {endpoint_id}", file=sys.stderr)
+        # Upload reference audio for clone mode
         if mode == "clone":
-            print(f"Mode: voice clone", file=sys.stderr)
-        else:
-            print(f"Speaker: {speaker}, Language: {language}", file=sys.stderr)
-
-    # Submit job
-    job_response = submit_runpod_job(
-        endpoint_id=endpoint_id,
-        api_key=api_key,
-        text=text,
-        mode=mode,
-        speaker=speaker,
-        language=language,
-        instruct=instruct,
-        ref_audio_url=ref_audio_url,
-        ref_text=ref_text,
-        output_format=output_format,
-        r2_config=r2_config,
-        temperature=temperature,
-        top_p=top_p,
-    )
+            if not Path(ref_audio).exists():
+                return {"success": False, "error": f"Reference audio not found: {ref_audio}"}
+            if not ref_text:
+                return {"success": False, "error": "ref_text is required for voice cloning"}
+
+            ref_audio_url, ref_r2_key = upload_to_storage(ref_audio, "qwen3-tts/input")
+            if not ref_audio_url:
+                return {"success": False, "error": "Failed to upload reference audio"}
+            if ref_r2_key:
+                state["r2_keys"].append(ref_r2_key)
+            state["ref_audio_url"] = ref_audio_url
 
-    if not job_response:
-        return {"success": False, "error": "Failed to submit job"}
+        if verbose:
+            print(f"Using RunPod endpoint: {endpoint_id}", file=sys.stderr)
+            if mode == "clone":
+                print(f"Mode: voice clone", file=sys.stderr)
+            else:
+                print(f"Speaker: {speaker}, Language: {language}", file=sys.stderr)
+        return state
+
+    def run(state: dict) -> dict:
+        job_response = submit_runpod_job(
+            endpoint_id=state["endpoint_id"],
+            api_key=state["api_key"],
+            text=text,
+            mode=mode,
+            speaker=speaker,
+            language=language,
+            instruct=instruct,
+            ref_audio_url=state["ref_audio_url"],
+            ref_text=ref_text,
+            output_format=output_format,
+            r2_config=state["r2_config"],
+            temperature=temperature,
+            top_p=top_p,
+            sync=True,
+        )
 
-    job_id = job_response.get("id")
-    if not job_id:
-        return {"success": False, "error": f"No job ID in response: {job_response}"}
+        if not job_response:
+            return {"success": False, "error": "Failed to submit job"}
 
-    if verbose:
-        print(f"Job submitted: {job_id}", file=sys.stderr)
-
-    # Poll for completion
-    result = poll_runpod_job(
-        endpoint_id=endpoint_id,
-        api_key=api_key,
-        job_id=job_id,
-        timeout=timeout,
-        verbose=verbose,
-    )
+        job_id = job_response.get("id")
+        if not job_id:
+            return {"success": False, "error": f"No job ID in response: {job_response}"}
 
-    if not result:
-        return {"success": False, "error": "Job timed out or failed to get status"}
+        if verbose:
+            print(f"Job submitted: {job_id}", file=sys.stderr)
 
-    status = result.get("status")
-    if status != "COMPLETED":
-        error = result.get("error") or result.get("output", {}).get("error") or "Unknown error"
-        return {"success": False, "error": f"Job failed: {error}"}
+        # /runsync returns short jobs finished; otherwise poll for completion
+        if runpod_api.is_finished(job_response):
+            result = job_response
+        else:
+            result = poll_runpod_job(
+                endpoint_id=state["endpoint_id"],
+                api_key=state["api_key"],
+                job_id=job_id,
+                timeout=timeout,
+                verbose=verbose,
+                expected_seconds=estimate_generation_time(text),
+            )
 
-    output = result.get("output", {})
-    if isinstance(output, dict) and output.get("error"):
-        return {"success": False, "error": output["error"]}
+        if not result:
+            return {"success": False, "error": "Job timed out or failed to get status"}
 
-    # Download result
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    downloaded = False
+        status = result.get("status")
+        if status != "COMPLETED":
+            error = result.get("error") or result.get("output", {}).get("error") or "Unknown error"
+            return {"success": False, "error": f"Job failed: {error}"}
 
-    output_r2_key = output.get("r2_key") if isinstance(output, dict) else None
-    output_url = output.get("audio_url") if isinstance(output, dict) else None
+        output = result.get("output", {})
+        if isinstance(output, dict) and output.get("error"):
+            return {"success": False, "error": output["error"]}
+        return {**state, "output": output}
 
-    if output_r2_key:
-        if verbose:
-            print(f"Downloading result from R2...", file=sys.stderr)
-        downloaded = _download_from_r2(output_r2_key, output_path)
-        if downloaded:
-            r2_keys_to_cleanup.append(output_r2_key)
-            if verbose:
-                size_kb = Path(output_path).stat().st_size // 1024
-                print(f"  Downloaded: {output_path} ({size_kb}KB)", file=sys.stderr)
+    def download(state: dict) -> dict:
+        output = state["output"]
+        r2_keys_to_cleanup = state["r2_keys"]
 
-    if not downloaded and output_url:
-        downloaded = download_from_url(output_url, output_path, verbose=verbose)
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        downloaded = False
 
-    if not downloaded:
-        audio_base64 = output.get("audio_base64")
-        if audio_base64:
-            Path(output_path).write_bytes(base64.b64decode(audio_base64))
-            downloaded = True
-            if verbose:
-                size_kb = Path(output_path).stat().st_size // 1024
-                print(f"  Decoded from base64: {output_path} ({size_kb}KB)", file=sys.stderr)
+        output_r2_key = output.get("r2_key") if isinstance(output, dict) else None
+        output_url = output.get("audio_url") if isinstance(output, dict) else None
 
-    if not downloaded:
-        return {"success": False, "error": f"No audio in result: {list(output.keys()) if isinstance(output, dict) else output}"}
-
-    # Cleanup R2 objects
-    for key in r2_keys_to_cleanup:
-        _delete_from_r2(key)
+        if output_r2_key:
+            if verbose:
+                print(f"Downloading result from R2...", file=sys.stderr)
+            downloaded = r2_transfer.download(output_r2_key, output_path)
+            if downloaded:
+                r2_keys_to_cleanup.append(output_r2_key)
+                if verbose:
+                    print(f"  Downloaded: {output_path} ({r2_transfer.format_stats(downloaded)})", file=sys.stderr)
+
+        if not downloaded and output_url:
+            downloaded = download_from_url(output_url, output_path, verbose=verbose)
+
+        if not downloaded:
+            audio_base64 = output.get("audio_base64")
+            if audio_base64:
+                Path(output_path).write_bytes(base64.b64decode(audio_base64))
+                downloaded = True
+                if verbose:
+                    size_kb = Path(output_path).stat().st_size // 1024
+                    print(f"  Decoded from base64: {output_path} ({size_kb}KB)", file=sys.stderr)
+
+        if not downloaded:
+            return {"success": False, "error": f"No audio in result: {list(output.keys()) if isinstance(output, dict) else output}"}
+
+        # Cleanup R2 objects
+        upload_cache.cleanup(r2_keys_to_cleanup)
+
+        duration = get_audio_duration(output_path)
+
+        result_dict = {
+            "success": True,
+            "output": output_path,
+            "script_chars": len(text),
+        }
+        if duration:
+            result_dict["duration_seconds"] = round(duration, 2)
+            result_dict["duration_frames_30fps"] = int(duration * 30)
+
+        return result_dict
+
+    return runpod_jobs.RunPodJob(
+        name=Path(output_path).name,
+        upload=upload,
+        run=run,
+        download=download,
+        cleanup=lambda state: upload_cache.cleanup(state["r2_keys"]),
+        state={"r2_keys": []},
+    )
 
-    duration = get_audio_duration(output_path)
 
-    result_dict = {
-        "success": True,
-        "output": output_path,
-        "script_chars": len(text),
-    }
-    if duration:
-        result_dict["duration_seconds"] = round(duration, 2)
-        result_dict["duration_frames_30fps"] = int(duration * 30)
+def generate_audio(
+    text: str,
+    output_path: str,
+    speaker: str = "Ryan",
+    language: str = "Auto",
+    instruct: str = "",
+    ref_audio: str | None = None,
+    ref_text: str | None = None,
+    output_format: str = "mp3",
+    timeout: int = 300,
+    verbose: bool = True,
+    temperature: float | None = None,
+    top_p: float | None = None,
+) -> dict:
+    """Generate audio using Qwen3-TTS via RunPod.
 
-    return result_dict
+    This is the main entry point, importable by voiceover.py.
+    Returns dict with: success, output, duration_seconds, duration_frames_30fps
+    """
+    result = runpod_jobs.run_job(runpod_job(
+        text, output_path, speaker, language, instruct, ref_audio, ref_text,
+        output_format, timeout, verbose, temperature, top_p,
+    ))
+    if result.get("error"):
+        result.setdefault("success", False)
+    return result
 
 
 # =============================================================================
 # RunPod Setup (GraphQL API)
 # =============================================================================
 
-RUNPOD_GRAPHQL_URL = "https://api.runpod.io/graphql"
 
 
 def runpod_graphql_query(api_key: str, query: str, variables: dict | None = None) -> dict:
     """Execute a GraphQL query against RunPod API."""
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-    }
-
-    payload = {"query": query}
-    if variables:
-        payload["variables"] = variables
-
-    response = requests.post(
-        RUNPOD_GRAPHQL_URL,
-        json=payload,
-        headers=headers,
-        timeout=30,
-    )
-
-    if response.status_code != 200:
-        raise Exception(f"GraphQL request failed: HTTP {response.status_code}: {response.text}")
-
-    data = response.json()
-    if "errors" in data:
-        raise Exception(f"GraphQL errors: {data['errors']}")
-
-    return data.get("data", {})
+    return runpod_api.graphql(api_key, query, variables)
 
 
 def list_runpod_templates(api_key: str) -> list[dict]:
@@ -915,6 +855,9 @@ Examples:
   # Voice cloning
   python tools/qwen3_tts.py --text "Hello" --ref-audio sample.wav --ref-text "transcript" --output cloned.mp3
 
+  # Many lines at once (JSON Lines: {"text": "...", "output": "line1.mp3"} per line)
+  python tools/qwen3_tts.py --batch lines.jsonl --speaker Ryan --concurrency 4
+
   # List voices
   python tools/qwen3_tts.py --list-voices
 
@@ -998,6 +941,7 @@ Examples:
         default=300,
         help="RunPod job timeout in seconds (default: 300)",
     )
+    runpod_jobs.add_batch_arguments(parser)
     parser.add_argument(
         "--setup",
         action="store_true",
@@ -1031,6 +975,26 @@ Examples:
     return parser.parse_args()
 
 
+def batch_job(options: dict) -> runpod_jobs.RunPodJob:
+    """Build the RunPod job for one --batch entry (CLI options merged in)."""
+    # Clone mode takes its tone from the reference recording
+    instruct = "" if options["ref_audio"] else resolve_tone(options["tone"], options["instruct"])
+    return runpod_job(
+        text=options["text"],
+        output_path=options["output"],
+        speaker=options["speaker"],
+        language=options["language"].capitalize(),
+        instruct=instruct,
+        ref_audio=options["ref_audio"],
+        ref_text=options["ref_text"],
+        output_format=options["format"],
+        timeout=options["timeout"],
+        verbose=False,
+        temperature=options["temperature"],
+        top_p=options["top_p"],
+    )
+
+
 def main():
     args = parse_args()
     verbose = not args.json
@@ -1076,6 +1040,10 @@ def main():
             sys.exit(1)
         sys.exit(0)
 
+    # Batch: every line runs on RunPod, streamed back as it completes
+    if args.batch:
+        sys.exit(runpod_jobs.run_batch_cli(args, batch_job, required=("text", "output")))
+
     # Validate required arguments
     if not args.text:
         print("Error: --text is required", file=sys.stderr)
@@ -0,0 +1,228 @@
+"""Shared Cloudflare R2 transfers for the RunPod tools.
+
+One boto3 client is built per R2 account and reused, with a connection pool
+sized for multipart transfers. Uploads and downloads of large files are split
+into parts sent in parallel, report progress on stderr, and record their
+throughput. Cleanup deletes keys in batches with ``delete_objects``.
+
+``configured_client()`` and ``download()`` use the toolkit's R2 settings
+from ``.env`` (see ``config.get_r2_config``).
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Multipart tuning. R2 accepts parts from 5MB; 16MB parts with 8 in flight
+# keep a residential uplink busy without a long tail on the last part.
+MULTIPART_THRESHOLD = 16 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+MAX_CONCURRENCY = 8
+
+# Print progress at most this often for transfers above MULTIPART_THRESHOLD
+PROGRESS_INTERVAL = 5.0
+
+# delete_objects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+_lock = threading.Lock()
+_clients: dict[tuple, object] = {}
+_transfer_config = None
+
+# Every completed transfer: {"direction", "key", "bytes", "seconds", "mb_per_s"}
+transfer_log: list[dict] = []
+
+
+def get_client(r2_config: dict):
+    """Return a cached S3 client for an R2 config.
+
+    Raises ImportError if boto3 isn't installed.
+    """
+    cache_key = (
+        r2_config["endpoint_url"],
+        r2_config["access_key_id"],
+        r2_config["secret_access_key"],
+    )
+    with _lock:
+        client = _clients.get(cache_key)
+        if client is None:
+            import boto3
+            from botocore.config import Config
+
+            client = boto3.client(
+                "s3",
+                endpoint_url=r2_config["endpoint_url"],
+                aws_access_key_id=r2_config["access_key_id"],
+                aws_secret_access_key=r2_config["secret_access_key"],
+                config=Config(
+                    signature_version="s3v4",
+                    max_pool_connections=MAX_CONCURRENCY * 2,
+                    retries={"max_attempts": 5, "mode": "adaptive"},
+                ),
+            )
+            _clients[cache_key] = client
+    return client
+
+
+def load_config() -> dict | None:
+    """The toolkit's R2 settings, or None if R2 isn't configured."""
+    try:
+        from config import get_r2_config
+        return get_r2_config()
+    except ImportError:
+        return None
+
+
+def configured_client() -> tuple[object | None, dict | None]:
+    """Return (client, config) for the toolkit's R2 settings.
+
+    Returns (None, None) if R2 isn't configured or boto3 isn't installed.
+    """
+    r2_config = load_config()
+    if not r2_config:
+        return None, None
+    try:
+        # Cached per account, so every transfer in a run shares one connection pool
+        return get_client(r2_config), r2_config
+    except ImportError:
+        print("  boto3 not installed, skipping R2", file=sys.stderr)
+        return None, None
+
+
+def _get_transfer_config():
+    global _transfer_config
+    if _transfer_config is None:
+        from boto3.s3.transfer import TransferConfig
+
+        _transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_CHUNKSIZE,
+            max_concurrency=MAX_CONCURRENCY,
+            use_threads=True,
+        )
+    return _transfer_config
+
+
+class TransferProgress:
+    """boto3 transfer callback that prints throttled progress and throughput.
+
+    boto3 calls it from its worker threads with the bytes moved since the
+    last call.
+    """
+
+    def __init__(self, label: str, total_bytes: int | None, verbose: bool = True):
+        self.label = label
+        self.total_bytes = total_bytes
+        self.verbose = verbose and (total_bytes is None or total_bytes > MULTIPART_THRESHOLD)
+        self.bytes_done = 0
+        self.started = time.time()
+        self._last_print = self.started
+        self._lock = threading.Lock()
+
+    def __call__(self, bytes_amount: int) -> None:
+        with self._lock:
+            self.bytes_done += bytes_amount
+            now = time.time()
+            if not self.verbose or now - self._last_print < PROGRESS_INTERVAL:
+                return
+            self._last_print = now
+            done_mb = self.bytes_done / (1024 * 1024)
+            rate = done_mb / max(now - self.started, 1e-6)
+            if self.total_bytes:
+                percent = 100 * self.bytes_done / self.total_bytes
+                total_mb = self.total_bytes / (1024 * 1024)
+                print(
+                    f"  {self.label}: {percent:.0f}% ({done_mb:.0f}/{total_mb:.0f}MB, {rate:.1f} MB/s)",
+                    file=sys.stderr,
+                )
+            else:
+                print(f"  {self.label}: {done_mb:.0f}MB ({rate:.1f} MB/s)", file=sys.stderr)
+
+    def finish(self, direction: str, key: str) -> dict:
+        """Record the finished transfer in transfer_log and return its stats."""
+        seconds = max(time.time() - self.started, 1e-6)
+        stats = {
+            "direction": direction,
+            "key": key,
+            "bytes": self.bytes_done,
+            "seconds": round(seconds, 2),
+            "mb_per_s": round(self.bytes_done / (1024 * 1024) / seconds, 2),
+        }
+        with _lock:
+            transfer_log.append(stats)
+        return stats
+
+
+def upload_file(
+    client,
+    bucket: str,
+    file_path: str,
+    object_key: str,
+    extra_args: dict | None = None,
+    verbose: bool = True,
+) -> dict:
+    """Upload a file with parallel multipart parts. Returns transfer stats."""
+    size = Path(file_path).stat().st_size
+    progress = TransferProgress(f"Uploading {Path(file_path).name}", size, verbose)
+    client.upload_file(
+        str(file_path),
+        bucket,
+        object_key,
+        ExtraArgs=extra_args,
+        Callback=progress,
+        Config=_get_transfer_config(),
+    )
+    return progress.finish("upload", object_key)
+
+
+def download_file(client, bucket: str, object_key: str, output_path: str, verbose: bool = True) -> dict:
+    """Download an object with parallel ranged parts. Returns transfer stats."""
+    try:
+        size = client.head_object(Bucket=bucket, Key=object_key).get("ContentLength")
+    except Exception:
+        size = None
+    progress = TransferProgress(f"Downloading {Path(object_key).name}", size, verbose)
+    client.download_file(
+        bucket,
+        object_key,
+        str(output_path),
+        Callback=progress,
+        Config=_get_transfer_config(),
+    )
+    return progress.finish("download", object_key)
+
+
+def download(object_key: str, output_path: str) -> dict | None:
+    """Download an object from the configured bucket. Returns transfer stats, or None on failure."""
+    client, r2_config = configured_client()
+    if not client:
+        return None
+    try:
+        return download_file(client, r2_config["bucket_name"], object_key, output_path)
+    except Exception as e:
+        print(f"  R2 download error: {e}", file=sys.stderr)
+        return None
+
+
+def delete_objects(client, bucket: str, object_keys: list[str]) -> int:
+    """Delete keys in batches of up to 1000. Returns how many were deleted."""
+    keys = list(dict.fromkeys(key for key in object_keys if key))
+    deleted = 0
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        batch = keys[start:start + DELETE_BATCH_SIZE]
+        try:
+            response = client.delete_objects(
+                Bucket=bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            deleted += len(batch) - len(response.get("Errors", []))
+        except Exception:
+            continue
+    return deleted
+
+
+def format_stats(stats: dict) -> str:
+    """Human-readable size, time and throughput of one transfer."""
+    size_mb = stats["bytes"] / (1024 * 1024)
+    return f"{size_mb:.1f}MB in {stats['seconds']:.1f}s ({stats['mb_per_s']:.1f} MB/s)"
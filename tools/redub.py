@@ -54,6 +54,7 @@ from elevenlabs.client import ElevenLabs
 # Add parent to path for local imports
 sys.path.insert(0, str(Path(__file__).parent))
 from config import get_elevenlabs_api_key, get_voice_id
+import media_probe
 
 
 def parse_args():
@@ -173,24 +174,8 @@ Examples:
 
 
 def get_media_duration(file_path: str) -> float | None:
-    """Get media duration using ffprobe."""
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe",
-                "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "csv=p=0",
-                file_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-    except (FileNotFoundError, ValueError):
-        pass
-    return None
+    """Get media duration from the shared probe cache, if ffprobe is available."""
+    return media_probe.get_duration(file_path)
 
 
 def extract_audio(video_path: str, audio_path: str, verbose: bool = True) -> bool:
@@ -0,0 +1,261 @@
+"""Shared HTTP client for the RunPod serverless and GraphQL APIs.
+
+All RunPod calls go through one keep-alive ``requests.Session``, so status
+polls and batch submissions reuse pooled TLS connections. Requests that are
+safe to repeat are retried on connection errors, 429 and 5xx with jittered
+exponential backoff, honouring ``Retry-After``. Job submissions are not
+idempotent; they are only retried when RunPod refused them (429/503) or the
+connection was never made. Every request's latency is recorded in
+``latency_log``.
+
+Short jobs can be submitted to ``/runsync``, which returns the output in the
+same request when the job finishes within ``RUNSYNC_WAIT_SECONDS``. Longer
+jobs are polled on a ``PollSchedule`` that starts fast and backs off.
+"""
+
+import email.utils
+import random
+import sys
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RUNPOD_API_URL = "https://api.runpod.ai/v2"
+RUNPOD_GRAPHQL_URL = "https://api.runpod.io/graphql"
+
+POOL_SIZE = 32
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses that mean RunPod rejected the request without acting on it
+REFUSED_STATUSES = {429, 503}
+
+# Job states after which polling stops
+TERMINAL_STATUSES = {"COMPLETED", "FAILED", "CANCELLED", "TIMED_OUT"}
+
+# How long /runsync holds the request open before handing back a job ID
+RUNSYNC_WAIT_SECONDS = 60
+
+_lock = threading.Lock()
+_session: requests.Session | None = None
+
+# Every request: {"method", "url", "status", "seconds", "attempt"}
+latency_log: list[dict] = []
+
+
+def get_session() -> requests.Session:
+    """Return the shared keep-alive session."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def _retry_after(response: requests.Response | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if response is None:
+        return None
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given (1-based) attempt."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def request(
+    method: str,
+    url: str,
+    api_key: str | None = None,
+    idempotent: bool = True,
+    timeout: float = 30,
+    max_attempts: int = MAX_ATTEMPTS,
+    **kwargs,
+) -> requests.Response:
+    """Send a request through the shared session, retrying transient failures.
+
+    Returns the last response, which may still be an error status once
+    retries are used up. Raises the last exception if no response was ever
+    received.
+    """
+    headers = dict(kwargs.pop("headers", None) or {})
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+
+    session = get_session()
+    for attempt in range(1, max_attempts + 1):
+        start = time.time()
+        response = None
+        error = None
+        try:
+            response = session.request(method, url, headers=headers, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            error = e
+
+        with _lock:
+            latency_log.append({
+                "method": method,
+                "url": url,
+                "status": response.status_code if response is not None else None,
+                "seconds": round(time.time() - start, 3),
+                "attempt": attempt,
+            })
+
+        if response is not None:
+            retryable = response.status_code in (RETRY_STATUSES if idempotent else REFUSED_STATUSES)
+        else:
+            # A non-idempotent request may have reached RunPod unless the
+            # connection itself failed
+            retryable = idempotent or isinstance(error, requests.exceptions.ConnectTimeout)
+
+        if not retryable or attempt == max_attempts:
+            if response is None:
+                raise error
+            return response
+
+        delay = _retry_after(response)
+        if delay is None:
+            delay = _backoff(attempt)
+        reason = f"HTTP {response.status_code}" if response is not None else type(error).__name__
+        print(f"  RunPod API {reason}, retrying in {delay:.1f}s ({attempt}/{max_attempts - 1})", file=sys.stderr)
+        time.sleep(delay)
+
+    raise AssertionError("unreachable")
+
+
+def get(url: str, api_key: str | None = None, **kwargs) -> requests.Response:
+    return request("GET", url, api_key=api_key, **kwargs)
+
+
+def post(url: str, api_key: str | None = None, idempotent: bool = False, **kwargs) -> requests.Response:
+    return request("POST", url, api_key=api_key, idempotent=idempotent, **kwargs)
+
+
+def submit_job(endpoint_id: str, api_key: str, payload: dict, sync: bool = False) -> requests.Response:
+    """Submit a job to /run, or to /runsync to wait for short jobs in one request.
+
+    A /runsync response carries the output if the job finished in time,
+    otherwise the job ID and an IN_QUEUE/IN_PROGRESS status to poll.
+    """
+    if sync:
+        url = f"{RUNPOD_API_URL}/{endpoint_id}/runsync?wait={RUNSYNC_WAIT_SECONDS * 1000}"
+        # The read timeout must outlast the wait, or the job ID is lost
+        return post(url, api_key, json=payload, timeout=RUNSYNC_WAIT_SECONDS + 30)
+    return post(f"{RUNPOD_API_URL}/{endpoint_id}/run", api_key, json=payload)
+
+
+def is_finished(data: dict | None) -> bool:
+    """Whether a /run, /runsync or /status response is in a terminal state."""
+    return bool(data) and data.get("status") in TERMINAL_STATUSES
+
+
+class PollSchedule:
+    """Adaptive intervals for polling one job's status.
+
+    Polls every ``min_interval`` right after submission and after each status
+    change (notably IN_QUEUE -> IN_PROGRESS), growing by ``growth`` per poll
+    up to ``max_interval``. With ``expected_seconds`` (estimated run time once
+    IN_PROGRESS), it waits out the estimate in steps of up to ``max_interval``,
+    then polls fast again.
+    """
+
+    def __init__(
+        self,
+        expected_seconds: float | None = None,
+        min_interval: float = 0.5,
+        max_interval: float = 10.0,
+        growth: float = 1.5,
+    ):
+        self.expected_seconds = expected_seconds
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.growth = growth
+        self.status = None
+        self.interval = min_interval / growth
+        self.running_since = None
+        self.overdue = False
+
+    def observe(self, status: str | None) -> None:
+        """Record the latest status; a change resets to fast polling."""
+        if status != self.status:
+            self.status = status
+            self.interval = self.min_interval / self.growth
+            if status == "IN_PROGRESS":
+                self.running_since = time.time()
+
+    def next_interval(self) -> float:
+        """Seconds to sleep before the next poll."""
+        self.interval = min(self.max_interval, self.interval * self.growth)
+        if self.status != "IN_PROGRESS" or not self.expected_seconds or self.running_since is None:
+            return self.interval
+
+        remaining = self.expected_seconds - (time.time() - self.running_since)
+        if remaining > 0:
+            return min(self.max_interval, max(self.min_interval, remaining))
+        if not self.overdue:
+            # Past the estimate: the job is likely about to finish
+            self.overdue = True
+            self.interval = self.min_interval
+        return self.interval
+
+
+def graphql(api_key: str, query: str, variables: dict | None = None) -> dict:
+    """Execute a GraphQL query or mutation. Only queries are retried freely."""
+    payload = {"query": query}
+    if variables:
+        payload["variables"] = variables
+
+    response = post(
+        RUNPOD_GRAPHQL_URL,
+        api_key=api_key,
+        idempotent=not query.lstrip().startswith("mutation"),
+        json=payload,
+        headers={"Content-Type": "application/json"},
+    )
+    if response.status_code != 200:
+        raise Exception(f"GraphQL request failed: HTTP {response.status_code}: {response.text}")
+
+    data = response.json()
+    if "errors" in data:
+        raise Exception(f"GraphQL errors: {data['errors']}")
+
+    return data.get("data", {})
+
+
+def latency_summary() -> dict:
+    """Count, mean, p50, p95 and max latency (seconds) of recorded requests."""
+    with _lock:
+        samples = sorted(entry["seconds"] for entry in latency_log)
+    if not samples:
+        return {"count": 0}
+
+    def percentile(p: float) -> float:
+        return samples[min(len(samples) - 1, int(round(p * (len(samples) - 1))))]
+
+    return {
+        "count": len(samples),
+        "mean": round(sum(samples) / len(samples), 3),
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+        "max": samples[-1],
+    }
@@ -0,0 +1,256 @@
+"""Concurrent orchestration of RunPod jobs for the toolkit's RunPod tools.
+
+Each tool splits its RunPod path into three blocking stages, bundled in a
+``RunPodJob``:
+
+    upload(state)   -> state   push inputs to R2 / file hosting
+    run(state)      -> state   submit the job and wait for it (holds a GPU slot)
+    download(state) -> result  fetch the output, post-process, clean up
+
+Every stage takes and returns a dict; a dict with an "error" key ends the
+job, and ``cleanup(state)`` (if given) releases whatever was uploaded;
+stages record uploads in place (e.g. appending to a list seeded in
+``RunPodJob.state``) so cleanup also sees a stage that failed halfway. The
+final dict has the same shape as the tool's ``--json`` output.
+
+``run_jobs()`` runs many jobs with separate concurrency limits per stage and
+yields results as they complete, so uploads for later jobs overlap GPU time
+and downloads of earlier ones. ``run_jobs_blocking()`` wraps it for
+synchronous callers, and ``run_job()`` runs a single job in order.
+
+Example:
+    jobs = [upscale.runpod_job(p, out_dir / p.name) for p in images]
+    async for result in runpod_jobs.run_jobs(jobs, gpu_concurrency=8):
+        print(result["name"], result.get("output") or result["error"])
+"""
+
+import asyncio
+import json
+import sys
+import time
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+DEFAULT_UPLOAD_CONCURRENCY = 4
+DEFAULT_GPU_CONCURRENCY = 4
+DEFAULT_DOWNLOAD_CONCURRENCY = 4
+
+Stage = Callable[[dict], dict]
+
+
+@dataclass
+class RunPodJob:
+    """One RunPod job split into blocking stages (see module docstring)."""
+
+    name: str
+    upload: Stage
+    run: Stage
+    download: Stage
+    cleanup: Callable[[dict], object] | None = None
+    state: dict | None = None
+
+
+def _run_stage(job: RunPodJob, stage: Stage, state: dict) -> dict:
+    try:
+        result = stage(state)
+    except Exception as e:
+        result = {"error": str(e)}
+    if not isinstance(result, dict):
+        result = {"error": "stage returned no state"}
+    if result.get("error") and job.cleanup:
+        try:
+            job.cleanup(state)
+        except Exception:
+            pass
+    return result
+
+
+def run_job(job: RunPodJob) -> dict:
+    """Run a job's stages in order in the calling thread."""
+    state = dict(job.state or {})
+    for stage in (job.upload, job.run, job.download):
+        state = _run_stage(job, stage, state)
+        if state.get("error"):
+            break
+    return state
+
+
+async def run_jobs(
+    jobs: list[RunPodJob],
+    upload_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+    gpu_concurrency: int = DEFAULT_GPU_CONCURRENCY,
+    download_concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+    on_stage: Callable[[str, str], object] | None = None,
+) -> AsyncIterator[dict]:
+    """Run jobs concurrently and yield each result as soon as it's done.
+
+    Each result carries the job's "name" and "elapsed_seconds" (including
+    time spent waiting for a free slot). ``on_stage(name, stage)`` is called
+    on the event loop as a job gets a slot for "upload", "run" or "download",
+    e.g. to drive a progress display.
+    """
+    limits = {
+        "upload": asyncio.Semaphore(max(1, upload_concurrency)),
+        "run": asyncio.Semaphore(max(1, gpu_concurrency)),
+        "download": asyncio.Semaphore(max(1, download_concurrency)),
+    }
+    loop = asyncio.get_running_loop()
+    # Stages block on network I/O; give every slot its own thread
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, upload_concurrency) + max(1, gpu_concurrency) + max(1, download_concurrency),
+        thread_name_prefix="runpod-job",
+    )
+
+    async def run_one(job: RunPodJob) -> dict:
+        start = time.time()
+        state = dict(job.state or {})
+        for stage_name in ("upload", "run", "download"):
+            async with limits[stage_name]:
+                if on_stage:
+                    on_stage(job.name, stage_name)
+                state = await loop.run_in_executor(
+                    executor, _run_stage, job, getattr(job, stage_name), state
+                )
+            if state.get("error"):
+                break
+        return {**state, "name": job.name, "elapsed_seconds": round(time.time() - start, 2)}
+
+    try:
+        for next_done in asyncio.as_completed([asyncio.ensure_future(run_one(job)) for job in jobs]):
+            yield await next_done
+    finally:
+        executor.shutdown(wait=False)
+
+
+def run_jobs_blocking(
+    jobs: list[RunPodJob],
+    upload_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+    gpu_concurrency: int = DEFAULT_GPU_CONCURRENCY,
+    download_concurrency: int = DEFAULT_DOWNLOAD_CONCURRENCY,
+    on_result: Callable[[dict], object] | None = None,
+    on_stage: Callable[[str, str], object] | None = None,
+) -> list[dict]:
+    """Synchronous wrapper around run_jobs(); results are in completion order."""
+
+    async def collect() -> list[dict]:
+        results = []
+        async for result in run_jobs(jobs, upload_concurrency, gpu_concurrency, download_concurrency, on_stage):
+            if on_result:
+                on_result(result)
+            results.append(result)
+        return results
+
+    return asyncio.run(collect())
+
+
+def load_batch_file(path: str) -> list[dict]:
+    """Read job specs from a JSON array or a JSON Lines file."""
+    with open(path) as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        specs = json.loads(text)
+    else:
+        specs = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if not all(isinstance(spec, dict) for spec in specs):
+        raise ValueError("each batch entry must be a JSON object")
+    return specs
+
+
+def print_result(result: dict, as_json: bool) -> None:
+    """Stream one finished job to stdout: a JSON line, or a one-line summary."""
+    if as_json:
+        print(json.dumps(result), flush=True)
+    elif result.get("error"):
+        print(f"FAILED  {result['name']}: {result['error']}", flush=True)
+    else:
+        print(f"done    {result['name']} -> {result.get('output')} ({result['elapsed_seconds']:.1f}s)", flush=True)
+
+
+def summarize(results: list[dict]) -> str:
+    failed = sum(1 for result in results if result.get("error"))
+    return f"{len(results) - failed}/{len(results)} jobs succeeded"
+
+
+def add_batch_arguments(parser, gpu_default: int = DEFAULT_GPU_CONCURRENCY) -> None:
+    """Add --batch and concurrency flags to a tool's argument parser."""
+    parser.add_argument(
+        "--batch",
+        type=str,
+        help="JSON array or JSON Lines file of jobs, each an object of this tool's "
+             "options (e.g. {\"input\": \"a.png\", \"output\": \"a_4x.png\"}); "
+             "options not given fall back to the command line. Runs on RunPod concurrently",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=gpu_default,
+        help=f"Batch: RunPod jobs in flight at once (default: {gpu_default})",
+    )
+    parser.add_argument(
+        "--upload-concurrency",
+        type=int,
+        default=DEFAULT_UPLOAD_CONCURRENCY,
+        help=f"Batch: parallel uploads (default: {DEFAULT_UPLOAD_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--download-concurrency",
+        type=int,
+        default=DEFAULT_DOWNLOAD_CONCURRENCY,
+        help=f"Batch: parallel downloads (default: {DEFAULT_DOWNLOAD_CONCURRENCY})",
+    )
+
+
+def _failed_job(error: str) -> RunPodJob:
+    """A job that fails at once, so one bad batch entry doesn't stop the rest."""
+
+    def fail(state: dict) -> dict:
+        return {"error": error}
+
+    return RunPodJob(name="", upload=fail, run=fail, download=fail)
+
+
+def run_batch_cli(
+    args,
+    build_job: Callable[[dict], RunPodJob],
+    required: tuple[str, ...] = (),
+) -> int:
+    """Run a tool's --batch file from parsed args; returns the exit code.
+
+    build_job gets each spec merged over the command-line options (with
+    dashes as underscores) and returns the RunPodJob for it. Entries missing
+    any of the ``required`` options fail without being built.
+    """
+    try:
+        specs = load_batch_file(args.batch)
+    except (OSError, ValueError) as e:
+        print(f"Error: could not read batch file: {e}", file=sys.stderr)
+        return 1
+
+    defaults = vars(args)
+    jobs = []
+    for index, spec in enumerate(specs):
+        options = {**defaults, **{key.replace("-", "_"): value for key, value in spec.items()}}
+        missing = [name for name in required if not options.get(name)]
+        try:
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+            job = build_job(options)
+        except (KeyError, TypeError, ValueError) as e:
+            job = _failed_job(f"invalid job spec: {e}")
+        job.name = spec.get("name") or job.name or f"job-{index}"
+        jobs.append(job)
+
+    if not args.json:
+        print(f"Running {len(jobs)} jobs ({args.concurrency} on RunPod at once)...", file=sys.stderr)
+
+    results = run_jobs_blocking(
+        jobs,
+        upload_concurrency=args.upload_concurrency,
+        gpu_concurrency=args.concurrency,
+        download_concurrency=args.download_concurrency,
+        on_result=lambda result: print_result(result, args.json),
+    )
+    if not args.json:
+        print(summarize(results), file=sys.stderr)
+    return 1 if any(result.get("error") for result in results) else 0
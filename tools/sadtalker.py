@@ -38,6 +38,14 @@ from pathlib import Path
 
 import requests
 
+# Add parent to path for local imports
+sys.path.insert(0, str(Path(__file__).parent))
+import media_probe
+import r2_transfer
+import runpod_api
+import runpod_jobs
+import upload_cache
+
 # Docker image for RunPod endpoint
 SADTALKER_DOCKER_IMAGE = "ghcr.io/conalmullan/video-toolkit-sadtalker:latest"
 SADTALKER_TEMPLATE_NAME = "video-toolkit-sadtalker"
@@ -49,31 +57,24 @@ PROCESSING_TIME_BUFFER = 120  # 2 minute buffer for cold start, upload, etc.
 
 
 def get_audio_duration(audio_path: str) -> float | None:
-    """Get audio duration in seconds using ffprobe."""
-    import subprocess
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe", "-v", "quiet", "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1", audio_path
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-    except Exception:
-        pass
-    return None
+    """Get audio duration in seconds from the shared probe cache, if ffprobe is available."""
+    return media_probe.get_duration(audio_path)
+
+
+def estimate_processing_time(audio_duration: float) -> float:
+    """Estimate the worker's run time (once IN_PROGRESS) from audio duration.
+
+    ~4 minutes processing per minute of audio.
+    """
+    return audio_duration * PROCESSING_TIME_MULTIPLIER
 
 
 def calculate_timeout(audio_duration: float) -> int:
     """Calculate appropriate timeout based on audio duration.
 
-    ~4 minutes processing per minute of audio, plus buffer for cold start.
+    The estimated processing time plus buffer for cold start.
     """
-    processing_time = audio_duration * PROCESSING_TIME_MULTIPLIER
-    return int(processing_time + PROCESSING_TIME_BUFFER)
+    return int(estimate_processing_time(audio_duration) + PROCESSING_TIME_BUFFER)
 
 
 def get_runpod_config() -> dict:
@@ -97,86 +98,6 @@ def get_runpod_config() -> dict:
     }
 
 
-def _get_r2_client():
-    """Get boto3 S3 client configured for Cloudflare R2."""
-    sys.path.insert(0, str(Path(__file__).parent))
-    try:
-        from config import get_r2_config
-        r2_config = get_r2_config()
-    except ImportError:
-        r2_config = None
-
-    if not r2_config:
-        return None, None
-
-    try:
-        import boto3
-        from botocore.config import Config
-
-        client = boto3.client(
-            "s3",
-            endpoint_url=r2_config["endpoint_url"],
-            aws_access_key_id=r2_config["access_key_id"],
-            aws_secret_access_key=r2_config["secret_access_key"],
-            config=Config(signature_version="s3v4"),
-        )
-        return client, r2_config
-    except ImportError:
-        print("  boto3 not installed, skipping R2", file=sys.stderr)
-        return None, None
-
-
-def _upload_to_r2(file_path: str, prefix: str) -> tuple[str | None, str | None]:
-    """Upload to Cloudflare R2 and return presigned download URL."""
-    client, config = _get_r2_client()
-    if not client:
-        return None, None
-
-    import uuid
-    file_name = Path(file_path).name
-    object_key = f"{prefix}/{uuid.uuid4().hex[:8]}_{file_name}"
-
-    try:
-        client.upload_file(file_path, config["bucket_name"], object_key)
-
-        url = client.generate_presigned_url(
-            "get_object",
-            Params={"Bucket": config["bucket_name"], "Key": object_key},
-            ExpiresIn=7200,
-        )
-        return url, object_key
-    except Exception as e:
-        print(f"  R2 upload error: {e}", file=sys.stderr)
-        return None, None
-
-
-def _delete_from_r2(object_key: str) -> bool:
-    """Delete object from R2 after job completion."""
-    client, config = _get_r2_client()
-    if not client or not object_key:
-        return False
-
-    try:
-        client.delete_object(Bucket=config["bucket_name"], Key=object_key)
-        return True
-    except Exception:
-        return False
-
-
-def _download_from_r2(object_key: str, output_path: str) -> bool:
-    """Download object from R2 to local path."""
-    client, config = _get_r2_client()
-    if not client:
-        return False
-
-    try:
-        client.download_file(config["bucket_name"], object_key, output_path)
-        return True
-    except Exception as e:
-        print(f"  R2 download error: {e}", file=sys.stderr)
-        return False
-
-
 def upload_to_storage(file_path: str, prefix: str) -> tuple[str | None, str | None]:
     """Upload a file to temporary storage for job input."""
     file_size = Path(file_path).stat().st_size
@@ -185,7 +106,7 @@ def upload_to_storage(file_path: str, prefix: str) -> tuple[str | None, str | No
     print(f"Uploading {file_name} ({file_size // 1024}KB)...", file=sys.stderr)
 
     # Try R2 first if configured
-    url, r2_key = _upload_to_r2(file_path, prefix)
+    url, r2_key = upload_cache.upload_input(file_path, prefix)
     if url:
         print(f"  Upload complete (R2)", file=sys.stderr)
         return url, r2_key
@@ -287,12 +208,7 @@ def submit_runpod_job(
         }
 
     try:
-        response = requests.post(
-            url,
-            json=payload,
-            headers={"Authorization": f"Bearer {api_key}"},
-            timeout=30,
-        )
+        response = runpod_api.post(url, api_key, json=payload)
 
         if response.status_code == 200:
             return response.json()
@@ -311,29 +227,32 @@ def poll_runpod_job(
     api_key: str,
     job_id: str,
     timeout: int = 600,
-    poll_interval: int = 5,
+    poll_interval: float = 10,
+    expected_seconds: float | None = None,
     verbose: bool = True,
 ) -> dict | None:
-    """Poll RunPod job until completion or timeout."""
+    """Poll RunPod job until completion or timeout.
+
+    Polls fast after submission and after each status change, backing off to
+    every poll_interval seconds (see runpod_api.PollSchedule).
+    """
     url = f"https://api.runpod.ai/v2/{endpoint_id}/status/{job_id}"
     start_time = time.time()
     last_status = None
+    schedule = runpod_api.PollSchedule(expected_seconds, max_interval=poll_interval)
 
     while time.time() - start_time < timeout:
         try:
-            response = requests.get(
-                url,
-                headers={"Authorization": f"Bearer {api_key}"},
-                timeout=30,
-            )
+            response = runpod_api.get(url, api_key)
 
             if response.status_code != 200:
                 print(f"Status check failed: HTTP {response.status_code}", file=sys.stderr)
-                time.sleep(poll_interval)
+                time.sleep(schedule.next_interval())
                 continue
 
             data = response.json()
             status = data.get("status")
+            schedule.observe(status)
 
             if verbose and status != last_status:
                 elapsed = int(time.time() - start_time)
@@ -346,13 +265,13 @@ def poll_runpod_job(
                 print(f"Job failed: {data.get('error', 'Unknown error')}", file=sys.stderr)
                 return data
             elif status in ["IN_QUEUE", "IN_PROGRESS"]:
-                time.sleep(poll_interval)
+                time.sleep(schedule.next_interval())
             else:
-                time.sleep(poll_interval)
+                time.sleep(schedule.next_interval())
 
         except Exception as e:
             print(f"Status check error: {e}", file=sys.stderr)
-            time.sleep(poll_interval)
+            time.sleep(schedule.next_interval())
 
     print(f"Job timed out after {timeout}s", file=sys.stderr)
     return None
@@ -406,11 +325,7 @@ def retrieve_job_result(
     # Get job status
     url = f"https://api.runpod.ai/v2/{endpoint_id}/status/{job_id}"
     try:
-        response = requests.get(
-            url,
-            headers={"Authorization": f"Bearer {api_key}"},
-            timeout=30,
-        )
+        response = runpod_api.get(url, api_key)
 
         if response.status_code != 200:
             return {"error": f"Failed to get job status: HTTP {response.status_code}"}
@@ -453,7 +368,7 @@ def retrieve_job_result(
         return {"error": f"Failed to retrieve job: {e}"}
 
 
-def process_with_runpod(
+def runpod_job(
     image_path: str,
     audio_path: str,
     output_path: str,
@@ -465,195 +380,209 @@ def process_with_runpod(
     pose_style: int = 0,
     timeout: int = 600,
     verbose: bool = True,
-) -> dict:
-    """Process image+audio using RunPod serverless endpoint."""
-    start_time = time.time()
-    r2_keys_to_cleanup = []
+) -> runpod_jobs.RunPodJob:
+    """Build the upload / run / download stages of one RunPod SadTalker job."""
 
-    # Get RunPod config
-    config = get_runpod_config()
-    api_key = config.get("api_key")
-    endpoint_id = config.get("endpoint_id")
+    def upload(state: dict) -> dict:
+        start_time = time.time()
+        config = get_runpod_config()
+        api_key = config.get("api_key")
+        endpoint_id = config.get("endpoint_id")
 
-    if not api_key:
-        return {"error": "RUNPOD_API_KEY not set. Add to .env file."}
-    if not endpoint_id:
-        return {"error": "RUNPOD_SADTALKER_ENDPOINT_ID not set. Run with --setup first."}
+        if not api_key:
+            return {"error": "RUNPOD_API_KEY not set. Add to .env file."}
+        if not endpoint_id:
+            return {"error": "RUNPOD_SADTALKER_ENDPOINT_ID not set. Run with --setup first."}
 
-    # Get R2 config (optional but recommended)
-    sys.path.insert(0, str(Path(__file__).parent))
-    try:
-        from config import get_r2_config
-        r2_config = get_r2_config()
-    except ImportError:
-        r2_config = None
+        # Get R2 config (optional but recommended)
+        r2_config = r2_transfer.load_config()
 
-    if not r2_config:
-        print("Warning: R2 not configured. Video will be returned as base64.", file=sys.stderr)
+        if not r2_config:
+            print("Warning: R2 not configured. Video will be returned as base64.", file=sys.stderr)
 
-    # Auto-calculate timeout if not specified
-    if timeout <= 0:
+        # Auto-calculate timeout if not specified
+        job_timeout = timeout
         audio_duration = get_audio_duration(audio_path)
-        if audio_duration:
-            timeout = calculate_timeout(audio_duration)
-            if verbose:
-                print(f"Audio duration: {audio_duration:.1f}s, timeout: {timeout}s", file=sys.stderr)
-        else:
-            timeout = 900  # Default 15 minutes if we can't determine duration
-            if verbose:
-                print(f"Could not determine audio duration, using default timeout: {timeout}s", file=sys.stderr)
+        if job_timeout <= 0:
+            if audio_duration:
+                job_timeout = calculate_timeout(audio_duration)
+                if verbose:
+                    print(f"Audio duration: {audio_duration:.1f}s, timeout: {job_timeout}s", file=sys.stderr)
+            else:
+                job_timeout = 900  # Default 15 minutes if we can't determine duration
+                if verbose:
+                    print(f"Could not determine audio duration, using default timeout: {job_timeout}s", file=sys.stderr)
 
-    if verbose:
-        print(f"Using RunPod endpoint: {endpoint_id}", file=sys.stderr)
-
-    # Upload image
-    image_url, image_r2_key = upload_to_storage(image_path, "sadtalker/input")
-    if not image_url:
-        return {"error": "Failed to upload image"}
-    if image_r2_key:
-        r2_keys_to_cleanup.append(image_r2_key)
-
-    # Upload audio
-    audio_url, audio_r2_key = upload_to_storage(audio_path, "sadtalker/input")
-    if not audio_url:
-        return {"error": "Failed to upload audio"}
-    if audio_r2_key:
-        r2_keys_to_cleanup.append(audio_r2_key)
-
-    # Submit job
-    if verbose:
-        print(f"Submitting job (size={size}, enhancer={enhancer})...", file=sys.stderr)
-
-    job_response = submit_runpod_job(
-        endpoint_id=endpoint_id,
-        api_key=api_key,
-        image_url=image_url,
-        audio_url=audio_url,
-        still_mode=still_mode,
-        enhancer=enhancer,
-        preprocess=preprocess,
-        size=size,
-        expression_scale=expression_scale,
-        pose_style=pose_style,
-        r2_config=r2_config,
-    )
+        if verbose:
+            print(f"Using RunPod endpoint: {endpoint_id}", file=sys.stderr)
+
+        # Upload image
+        image_url, image_r2_key = upload_to_storage(image_path, "sadtalker/input")
+        if not image_url:
+            return {"error": "Failed to upload image"}
+        if image_r2_key:
+            state["r2_keys"].append(image_r2_key)
+
+        # Upload audio
+        audio_url, audio_r2_key = upload_to_storage(audio_path, "sadtalker/input")
+        if not audio_url:
+            return {"error": "Failed to upload audio"}
+        if audio_r2_key:
+            state["r2_keys"].append(audio_r2_key)
+
+        return {
+            **state,
+            "start_time": start_time,
+            "api_key": api_key,
+            "endpoint_id": endpoint_id,
+            "r2_config": r2_config,
+            "timeout": job_timeout,
+            "expected_seconds": estimate_processing_time(audio_duration) if audio_duration else None,
+            "image_url": image_url,
+            "audio_url": audio_url,
+        }
 
-    if not job_response:
-        return {"error": "Failed to submit job"}
+    def run(state: dict) -> dict:
+        if verbose:
+            print(f"Submitting job (size={size}, enhancer={enhancer})...", file=sys.stderr)
+
+        job_response = submit_runpod_job(
+            endpoint_id=state["endpoint_id"],
+            api_key=state["api_key"],
+            image_url=state["image_url"],
+            audio_url=state["audio_url"],
+            still_mode=still_mode,
+            enhancer=enhancer,
+            preprocess=preprocess,
+            size=size,
+            expression_scale=expression_scale,
+            pose_style=pose_style,
+            r2_config=state["r2_config"],
+        )
 
-    job_id = job_response.get("id")
-    if not job_id:
-        return {"error": f"No job ID in response: {job_response}"}
+        if not job_response:
+            return {"error": "Failed to submit job"}
 
-    if verbose:
-        print(f"Job submitted: {job_id}", file=sys.stderr)
-
-    # Poll for completion
-    result = poll_runpod_job(
-        endpoint_id=endpoint_id,
-        api_key=api_key,
-        job_id=job_id,
-        timeout=timeout,
-        verbose=verbose,
-    )
+        job_id = job_response.get("id")
+        if not job_id:
+            return {"error": f"No job ID in response: {job_response}"}
+
+        if verbose:
+            print(f"Job submitted: {job_id}", file=sys.stderr)
+
+        # Poll for completion
+        result = poll_runpod_job(
+            endpoint_id=state["endpoint_id"],
+            api_key=state["api_key"],
+            job_id=job_id,
+            timeout=state["timeout"],
+            verbose=verbose,
+            expected_seconds=state["expected_seconds"],
+        )
 
-    if not result:
-        return {"error": "Job timed out or failed to get status"}
+        if not result:
+            return {"error": "Job timed out or failed to get status"}
 
-    status = result.get("status")
-    if status != "COMPLETED":
-        error = result.get("error") or result.get("output", {}).get("error") or "Unknown error"
-        return {"error": f"Job failed: {error}"}
+        status = result.get("status")
+        if status != "COMPLETED":
+            error = result.get("error") or result.get("output", {}).get("error") or "Unknown error"
+            return {"error": f"Job failed: {error}"}
 
-    # Get output from result
-    output = result.get("output", {})
-    if isinstance(output, dict) and output.get("error"):
-        return {"error": output["error"]}
+        # Get output from result
+        output = result.get("output", {})
+        if isinstance(output, dict) and output.get("error"):
+            return {"error": output["error"]}
+        return {**state, "job_id": job_id, "output": output}
 
-    # Download result
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    downloaded = False
+    def download(state: dict) -> dict:
+        output = state["output"]
+        r2_keys_to_cleanup = state["r2_keys"]
 
-    output_r2_key = output.get("r2_key") if isinstance(output, dict) else None
-    output_url = output.get("video_url") if isinstance(output, dict) else None
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        downloaded = False
 
-    if output_r2_key:
-        if verbose:
-            print(f"Downloading result from R2...", file=sys.stderr)
-        downloaded = _download_from_r2(output_r2_key, output_path)
-        if downloaded:
-            r2_keys_to_cleanup.append(output_r2_key)
-            if verbose:
-                size_kb = Path(output_path).stat().st_size // 1024
-                print(f"  Downloaded: {output_path} ({size_kb}KB)", file=sys.stderr)
-
-    if not downloaded and output_url:
-        downloaded = download_from_url(output_url, output_path, verbose=verbose)
-
-    if not downloaded:
-        # Try base64 fallback
-        video_base64 = output.get("video_base64")
-        if video_base64:
-            import base64
-            Path(output_path).write_bytes(base64.b64decode(video_base64))
-            downloaded = True
+        output_r2_key = output.get("r2_key") if isinstance(output, dict) else None
+        output_url = output.get("video_url") if isinstance(output, dict) else None
+
+        if output_r2_key:
             if verbose:
-                size_kb = Path(output_path).stat().st_size // 1024
-                print(f"  Decoded from base64: {output_path} ({size_kb}KB)", file=sys.stderr)
+                print(f"Downloading result from R2...", file=sys.stderr)
+            downloaded = r2_transfer.download(output_r2_key, output_path)
+            if downloaded:
+                r2_keys_to_cleanup.append(output_r2_key)
+                if verbose:
+                    print(f"  Downloaded: {output_path} ({r2_transfer.format_stats(downloaded)})", file=sys.stderr)
+
+        if not downloaded and output_url:
+            downloaded = download_from_url(output_url, output_path, verbose=verbose)
+
+        if not downloaded:
+            # Try base64 fallback
+            video_base64 = output.get("video_base64")
+            if video_base64:
+                import base64
+                Path(output_path).write_bytes(base64.b64decode(video_base64))
+                downloaded = True
+                if verbose:
+                    size_kb = Path(output_path).stat().st_size // 1024
+                    print(f"  Decoded from base64: {output_path} ({size_kb}KB)", file=sys.stderr)
+
+        if not downloaded:
+            return {"error": f"No video in result: {list(output.keys()) if isinstance(output, dict) else output}"}
+
+        # Cleanup R2 objects
+        upload_cache.cleanup(r2_keys_to_cleanup)
+
+        elapsed = time.time() - state["start_time"]
 
-    if not downloaded:
-        return {"error": f"No video in result: {list(output.keys()) if isinstance(output, dict) else output}"}
+        return {
+            "success": True,
+            "output": output_path,
+            "job_id": state["job_id"],
+            "processing_time_seconds": round(elapsed, 2),
+            "duration_seconds": output.get("duration_seconds"),
+            "chunks_processed": output.get("chunks_processed"),
+        }
 
-    # Cleanup R2 objects
-    if r2_keys_to_cleanup:
-        for key in r2_keys_to_cleanup:
-            _delete_from_r2(key)
+    return runpod_jobs.RunPodJob(
+        name=Path(output_path).name,
+        upload=upload,
+        run=run,
+        download=download,
+        cleanup=lambda state: upload_cache.cleanup(state["r2_keys"]),
+        state={"r2_keys": []},
+    )
 
-    elapsed = time.time() - start_time
 
-    return {
-        "success": True,
-        "output": output_path,
-        "job_id": job_id,
-        "processing_time_seconds": round(elapsed, 2),
-        "duration_seconds": output.get("duration_seconds"),
-        "chunks_processed": output.get("chunks_processed"),
-    }
+def process_with_runpod(
+    image_path: str,
+    audio_path: str,
+    output_path: str,
+    still_mode: bool = False,
+    enhancer: str = "gfpgan",
+    preprocess: str = "crop",
+    size: int = 256,
+    expression_scale: float = 1.0,
+    pose_style: int = 0,
+    timeout: int = 600,
+    verbose: bool = True,
+) -> dict:
+    """Process image+audio using RunPod serverless endpoint."""
+    return runpod_jobs.run_job(runpod_job(
+        image_path, audio_path, output_path, still_mode, enhancer, preprocess,
+        size, expression_scale, pose_style, timeout, verbose,
+    ))
 
 
 # =============================================================================
 # RunPod Setup (GraphQL API)
 # =============================================================================
 
-RUNPOD_GRAPHQL_URL = "https://api.runpod.io/graphql"
 
 
 def runpod_graphql_query(api_key: str, query: str, variables: dict | None = None) -> dict:
     """Execute a GraphQL query against RunPod API."""
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-    }
-
-    payload = {"query": query}
-    if variables:
-        payload["variables"] = variables
-
-    response = requests.post(
-        RUNPOD_GRAPHQL_URL,
-        json=payload,
-        headers=headers,
-        timeout=30,
-    )
-
-    if response.status_code != 200:
-        raise Exception(f"GraphQL request failed: HTTP {response.status_code}: {response.text}")
-
-    data = response.json()
-    if "errors" in data:
-        raise Exception(f"GraphQL errors: {data['errors']}")
-
-    return data.get("data", {})
+    return runpod_api.graphql(api_key, query, variables)
 
 
 def list_runpod_templates(api_key: str) -> list[dict]:
@@ -931,6 +860,37 @@ def setup_runpod(gpu_id: str = "AMPERE_24", verbose: bool = True) -> dict:
     return result
 
 
+# Presets for common use cases; they override the individual options
+PRESETS = {
+    "default": {},  # Use CLI defaults
+    "natural": {"pose_style": 45, "expression_scale": 1.0},
+    "expressive": {"pose_style": 45, "expression_scale": 1.3},
+    "professional": {"still": True, "expression_scale": 0.8},
+    "fullbody": {"still": True, "preprocess": "full"},
+}
+
+
+def generation_settings(options: dict) -> dict:
+    """Resolve CLI-style options (and --preset) into process_with_runpod settings."""
+    settings = {
+        "still_mode": options["still"],
+        "enhancer": "none" if options["no_enhance"] else "gfpgan",
+        "preprocess": options["preprocess"],
+        "size": options["size"],
+        "expression_scale": options["expression_scale"],
+        "pose_style": options["pose_style"],
+    }
+
+    # Override with preset if specified
+    preset = PRESETS.get(options.get("preset") or "", {})
+    if "still" in preset:
+        settings["still_mode"] = preset["still"]
+    for key in ("expression_scale", "pose_style", "preprocess"):
+        if key in preset:
+            settings[key] = preset[key]
+    return settings
+
+
 def parse_args():
     parser = argparse.ArgumentParser(
         description="Generate talking head videos using SadTalker",
@@ -949,6 +909,9 @@ Examples:
   # No face enhancement (faster)
   python tools/sadtalker.py --image avatar.png --audio voiceover.mp3 --no-enhance --output talking.mp4
 
+  # Many videos at once (JSON Lines: {"image": ..., "audio": ..., "output": ...} per line)
+  python tools/sadtalker.py --batch scenes.jsonl --preset natural --json
+
   # Setup RunPod endpoint (first-time)
   python tools/sadtalker.py --setup
         """,
@@ -1021,6 +984,7 @@ Examples:
         default=0,
         help="RunPod job timeout in seconds (default: auto-calculated from audio duration)",
     )
+    runpod_jobs.add_batch_arguments(parser)
     parser.add_argument(
         "--retrieve",
         type=str,
@@ -1075,6 +1039,17 @@ def main():
             sys.exit(1)
         sys.exit(0)
 
+    # Batch: every job runs on RunPod, streamed back as it completes
+    if args.batch:
+        sys.exit(runpod_jobs.run_batch_cli(args, lambda options: runpod_job(
+            image_path=options["image"],
+            audio_path=options["audio"],
+            output_path=options["output"],
+            timeout=options["timeout"],
+            verbose=False,
+            **generation_settings(options),
+        ), required=("image", "audio", "output")))
+
     # Validate required arguments
     if not args.image:
         print("Error: --image is required", file=sys.stderr)
@@ -1094,36 +1069,8 @@ def main():
         print(f"Error: Audio file not found: {args.audio}", file=sys.stderr)
         sys.exit(1)
 
-    # Apply presets
-    presets = {
-        "default": {},  # Use CLI defaults
-        "natural": {"pose_style": 45, "expression_scale": 1.0},
-        "expressive": {"pose_style": 45, "expression_scale": 1.3},
-        "professional": {"still": True, "expression_scale": 0.8},
-        "fullbody": {"still": True, "preprocess": "full"},
-    }
-
-    # Start with CLI args
-    still_mode = args.still
-    enhancer = "none" if args.no_enhance else "gfpgan"
-    preprocess = args.preprocess
-    size = args.size
-    expression_scale = args.expression_scale
-    pose_style = args.pose_style
-
-    # Override with preset if specified
-    if args.preset and args.preset in presets:
-        preset = presets[args.preset]
-        if "still" in preset:
-            still_mode = preset["still"]
-        if "expression_scale" in preset:
-            expression_scale = preset["expression_scale"]
-        if "pose_style" in preset:
-            pose_style = preset["pose_style"]
-        if "preprocess" in preset:
-            preprocess = preset["preprocess"]
-        if verbose:
-            print(f"Using preset '{args.preset}': {preset}")
+    if verbose and args.preset in PRESETS:
+        print(f"Using preset '{args.preset}': {PRESETS[args.preset]}")
 
     if verbose:
         print("Generating talking head video with SadTalker...")
@@ -1132,14 +1079,9 @@ def main():
         image_path=args.image,
         audio_path=args.audio,
         output_path=args.output,
-        still_mode=still_mode,
-        enhancer=enhancer,
-        preprocess=preprocess,
-        size=size,
-        expression_scale=expression_scale,
-        pose_style=pose_style,
         timeout=args.timeout,
         verbose=verbose,
+        **generation_settings(vars(args)),
     )
 
     if result.get("error"):
@@ -25,6 +25,7 @@ from elevenlabs.client import ElevenLabs
 # Add parent to path for local imports
 sys.path.insert(0, str(Path(__file__).parent))
 from config import get_elevenlabs_api_key
+import media_probe
 
 
 # Common SFX presets
@@ -121,29 +122,8 @@ Available presets: {', '.join(PRESETS.keys())}
 
 
 def get_audio_duration(file_path: str) -> float | None:
-    """Get audio duration using ffprobe if available."""
-    import subprocess
-
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe",
-                "-v",
-                "error",
-                "-show_entries",
-                "format=duration",
-                "-of",
-                "csv=p=0",
-                file_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-    except (FileNotFoundError, ValueError):
-        pass
-    return None
+    """Get audio duration from the shared probe cache, if ffprobe is available."""
+    return media_probe.get_duration(file_path)
 
 
 def main():
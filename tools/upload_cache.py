@@ -0,0 +1,232 @@
+"""Content-addressed R2 uploads shared by the RunPod tools.
+
+Job inputs are stored under ``<prefix>/<sha256><ext>`` instead of a random
+key, so retrying a job or reusing the same clip, portrait or reference voice
+skips the upload. ``~/.video-toolkit/r2-uploads.json`` records each object's
+presigned URL and expiry, how many jobs are using it, and when it was last
+used. Objects aren't deleted when a job finishes; ``release()`` drops the
+reference and ``sweep()`` deletes objects nobody has used for
+``RETAIN_SECONDS``.
+
+Tools call ``upload_input()`` and ``cleanup()``, which use the R2 bucket
+configured in ``.env``.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import r2_transfer
+
+INDEX_PATH = Path(
+    os.getenv("VIDEO_TOOLKIT_UPLOAD_INDEX", Path.home() / ".video-toolkit" / "r2-uploads.json")
+)
+
+# Presigned URLs are valid for 2 hours; reuse one only if a job still has an
+# hour left to download from it.
+URL_EXPIRES_IN = 7200
+URL_MIN_REMAINING = 3600
+
+# Keep unreferenced inputs this long so retries and batches can reuse them
+RETAIN_SECONDS = 24 * 3600
+
+# References older than this belong to runs that crashed without releasing
+STALE_REF_SECONDS = 7 * 24 * 3600
+
+HASH_CACHE_MAX_ENTRIES = 500
+
+_lock = threading.Lock()
+
+
+def _load_index() -> dict:
+    try:
+        with open(INDEX_PATH) as f:
+            index = json.load(f)
+        if isinstance(index, dict):
+            index.setdefault("objects", {})
+            index.setdefault("hashes", {})
+            return index
+    except (OSError, ValueError):
+        pass
+    return {"objects": {}, "hashes": {}}
+
+
+def _save_index(index: dict) -> None:
+    tmp = None
+    try:
+        INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=INDEX_PATH.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp, INDEX_PATH)
+    except OSError:
+        if tmp:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of a file, remembered by path, size and mtime."""
+    path = Path(file_path).resolve()
+    stat = path.stat()
+    cache_key = f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    with _lock:
+        cached = _load_index()["hashes"].get(cache_key)
+    if cached:
+        return cached
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(8 * 1024 * 1024), b""):
+            digest.update(block)
+    hexdigest = digest.hexdigest()
+
+    with _lock:
+        index = _load_index()
+        hashes = index["hashes"]
+        hashes[cache_key] = hexdigest
+        for stale in list(hashes)[: max(0, len(hashes) - HASH_CACHE_MAX_ENTRIES)]:
+            del hashes[stale]
+        _save_index(index)
+    return hexdigest
+
+
+def _object_exists(client, bucket: str, object_key: str) -> bool:
+    try:
+        client.head_object(Bucket=bucket, Key=object_key)
+        return True
+    except Exception:
+        # 404, or no permission to HEAD; uploading again is always safe
+        return False
+
+
+def upload(client, bucket: str, file_path: str, prefix: str) -> tuple[str, str]:
+    """Upload a job input unless the same content is already in the bucket.
+
+    Returns (presigned_url, object_key) and takes a reference on the object,
+    to be dropped with ``release()`` once the job is done. Upload errors are
+    raised to the caller.
+    """
+    object_key = f"{prefix}/{file_digest(file_path)}{Path(file_path).suffix.lower()}"
+    entry_id = f"{bucket}/{object_key}"
+    now = time.time()
+
+    with _lock:
+        entry = _load_index()["objects"].get(entry_id)
+
+    url = None
+    if entry and entry.get("url_expires", 0) - now >= URL_MIN_REMAINING:
+        url = entry["url"]
+        print(f"  Reusing uploaded copy: {object_key}", file=sys.stderr)
+    else:
+        if _object_exists(client, bucket, object_key):
+            print(f"  Already in R2, skipping upload: {object_key}", file=sys.stderr)
+        else:
+            stats = r2_transfer.upload_file(client, bucket, file_path, object_key)
+            print(f"  Uploaded {r2_transfer.format_stats(stats)}", file=sys.stderr)
+        url = client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket, "Key": object_key},
+            ExpiresIn=URL_EXPIRES_IN,
+        )
+
+    with _lock:
+        index = _load_index()
+        entry = index["objects"].setdefault(entry_id, {"bucket": bucket, "key": object_key, "refs": 0})
+        if entry.get("url") != url:
+            entry["url"] = url
+            entry["url_expires"] = now + URL_EXPIRES_IN
+        entry["refs"] = entry.get("refs", 0) + 1
+        entry["last_used"] = now
+        _save_index(index)
+
+    return url, object_key
+
+
+def upload_input(file_path: str, prefix: str) -> tuple[str | None, str | None]:
+    """Upload a job input to the configured bucket (see upload()).
+
+    Returns (presigned_url, object_key), or (None, None) if R2 isn't
+    configured or the upload failed.
+    """
+    client, r2_config = r2_transfer.configured_client()
+    if not client:
+        return None, None
+    try:
+        return upload(client, r2_config["bucket_name"], file_path, prefix)
+    except Exception as e:
+        print(f"  R2 upload error: {e}", file=sys.stderr)
+        return None, None
+
+
+def cleanup(object_keys: list[str | None]) -> int:
+    """Clean up a job's R2 objects once it's done.
+
+    Inputs uploaded through this module are only released, and deleted once
+    unused for RETAIN_SECONDS; anything else (job outputs) is deleted now, in
+    one batch. Returns the number of objects deleted.
+    """
+    object_keys = [key for key in object_keys if key]
+    if not object_keys:
+        return 0
+    client, r2_config = r2_transfer.configured_client()
+    if not client:
+        return 0
+
+    bucket = r2_config["bucket_name"]
+    try:
+        outputs = [key for key in object_keys if not release(client, bucket, key, sweep_expired=False)]
+        return r2_transfer.delete_objects(client, bucket, outputs) + sweep(client, bucket)
+    except Exception:
+        return 0
+
+
+def release(client, bucket: str, object_key: str, sweep_expired: bool = True) -> bool:
+    """Drop a job's reference to an uploaded input, then sweep expired ones.
+
+    Returns False if the object wasn't uploaded through this module (for
+    example a job output), in which case the caller should delete it itself.
+    """
+    entry_id = f"{bucket}/{object_key}"
+    with _lock:
+        index = _load_index()
+        entry = index["objects"].get(entry_id)
+        if entry is None:
+            return False
+        entry["refs"] = max(0, entry.get("refs", 0) - 1)
+        entry["last_used"] = time.time()
+        _save_index(index)
+
+    if sweep_expired:
+        sweep(client, bucket)
+    return True
+
+
+def sweep(client, bucket: str) -> int:
+    """Delete uploaded inputs that have gone unused for RETAIN_SECONDS."""
+    now = time.time()
+    with _lock:
+        index = _load_index()
+        expired = [
+            entry_id
+            for entry_id, entry in index["objects"].items()
+            if entry.get("bucket") == bucket
+            and (
+                (entry.get("refs", 0) <= 0 and now - entry.get("last_used", 0) >= RETAIN_SECONDS)
+                or now - entry.get("last_used", 0) >= STALE_REF_SECONDS
+            )
+        ]
+        if not expired:
+            return 0
+        entries = {entry_id: index["objects"].pop(entry_id) for entry_id in expired}
+        _save_index(index)
+
+    return r2_transfer.delete_objects(client, bucket, [entry["key"] for entry in entries.values()])
@@ -38,6 +38,7 @@ from dotenv import load_dotenv
 # Add parent to path for local imports
 sys.path.insert(0, str(Path(__file__).parent))
 from config import get_brand_dir, get_elevenlabs_api_key, get_voice_id, load_brand_voice_config
+import media_probe
 
 
 def _get_elevenlabs_imports():
@@ -213,29 +214,8 @@ def read_script(script_path: str | None) -> str:
 
 
 def get_audio_duration(file_path: str) -> float | None:
-    """Get audio duration using ffprobe if available."""
-    import subprocess
-
-    try:
-        result = subprocess.run(
-            [
-                "ffprobe",
-                "-v",
-                "error",
-                "-show_entries",
-                "format=duration",
-                "-of",
-                "csv=p=0",
-                file_path,
-            ],
-            capture_output=True,
-            text=True,
-        )
-        if result.returncode == 0:
-            return float(result.stdout.strip())
-    except (FileNotFoundError, ValueError):
-        pass
-    return None
+    """Get audio duration from the shared probe cache, if ffprobe is available."""
+    return media_probe.get_duration(file_path)
 
 
 def generate_single_audio(